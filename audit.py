@@ -0,0 +1,128 @@
+"""Trilha de auditoria sem custo no caminho da requisição.
+
+As rotas registram quem decifrou ou alterou o quê (`audit_trail.record`), o
+que só acrescenta o evento a uma fila em memória limitada, sem I/O. Uma task
+em segundo plano grava a fila em `audit_log` com INSERTs de várias linhas:
+assim que AUDIT_BATCH_SIZE eventos se acumulam ou a cada AUDIT_FLUSH_INTERVAL
+segundos, o que vier primeiro.
+
+- Contrapressão: com a fila cheia (AUDIT_QUEUE_SIZE, por worker) o evento é
+  descartado e contado, em vez de segurar a requisição; descartes, falhas de
+  gravação e a profundidade da fila ficam em `GET /health/audit` e `/metrics`.
+- Desligamento: `stop()` acorda o gravador, que grava tudo o que estiver na
+  fila antes de terminar (evento de shutdown do app).
+- Os eventos são registrados depois do commit: uma escrita desfeita não entra
+  na trilha. A gravação usa o primário, numa transação própria por lote.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Optional
+from sqlalchemy import insert
+from config import AUDIT_BATCH_SIZE, AUDIT_ENABLED, AUDIT_FLUSH_INTERVAL, AUDIT_QUEUE_SIZE
+from database import engine
+from models.auditoria import AuditoriaModel
+
+logger = logging.getLogger(__name__)
+
+
+class AuditTrail:
+    """Fila limitada de eventos e o gravador em lote que a esvazia."""
+
+    def __init__(self, enabled: bool = AUDIT_ENABLED, capacity: int = AUDIT_QUEUE_SIZE):
+        self.enabled = enabled
+        self.capacity = capacity
+        self._events = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.flushes = 0
+        self.flush_seconds_total = 0.0
+
+    def record(self, user_id, acao: str, entidade: str, id_entidade=None, detalhe: Optional[str] = None):
+        """Enfileira um evento (O(1), sem I/O); descarta e conta se a fila estiver cheia."""
+        if not self.enabled:
+            return
+        if len(self._events) >= self.capacity:
+            self.dropped += 1
+            return
+        self._events.append({
+            "ocorrido_em": datetime.now(timezone.utc),
+            "user_id": user_id,
+            "acao": acao,
+            "entidade": entidade,
+            "id_entidade": id_entidade,
+            "detalhe": detalhe[:255] if detalhe else None,
+        })
+        self.recorded += 1
+        if self._wakeup is not None and len(self._events) >= AUDIT_BATCH_SIZE:
+            self._wakeup.set()
+
+    async def _write(self, batch: list):
+        started = time.perf_counter()
+        try:
+            async with engine.begin() as conn:
+                await conn.execute(insert(AuditoriaModel.__table__).values(batch))
+        except Exception:
+            # Sem retentativa: um banco fora do ar não pode fazer a fila crescer sem limite
+            self.failed += len(batch)
+            logger.exception("Falha ao gravar %d evento(s) de auditoria", len(batch))
+        else:
+            self.written += len(batch)
+        self.flushes += 1
+        self.flush_seconds_total += time.perf_counter() - started
+
+    async def flush(self):
+        """Grava tudo o que está na fila, em lotes de até AUDIT_BATCH_SIZE linhas."""
+        while self._events:
+            batch = [self._events.popleft() for _ in range(min(AUDIT_BATCH_SIZE, len(self._events)))]
+            await self._write(batch)
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), AUDIT_FLUSH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+        await self.flush()
+
+    def start(self):
+        if self.enabled and self._task is None:
+            self._stopping = False
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Encerra o gravador depois de gravar todos os eventos pendentes."""
+        if self._task is None:
+            await self.flush()
+            return
+        self._stopping = True
+        self._wakeup.set()
+        await self._task
+        self._task = None
+        self._wakeup = None
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "queued": len(self._events),
+            "capacity": self.capacity,
+            "recorded": self.recorded,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "flushes": self.flushes,
+            "flush_avg_ms": round(self.flush_seconds_total / self.flushes * 1000, 3) if self.flushes else 0.0,
+        }
+
+
+audit_trail = AuditTrail()
@@ -0,0 +1,31 @@
+"""Acesso às rotas de diagnóstico (`/metrics` e `/health/pool`, `/replicas`, `/audit`, `/auth`).
+
+Exigem `Authorization: Bearer <METRICS_TOKEN>`, um token estático que o coletor
+(Prometheus) consegue enviar, independente dos usuários do app. Sem
+METRICS_TOKEN configurado, só respondem em ENVIRONMENT=development. O `/health`
+simples (liveness) continua aberto.
+"""
+import hmac
+from typing import Optional
+from fastapi import Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from config import DEBUG, METRICS_TOKEN
+
+_bearer = HTTPBearer(auto_error=False)
+
+
+def require_diagnostics_token(credentials: Optional[HTTPAuthorizationCredentials] = Depends(_bearer)):
+    """Dependência das rotas de diagnóstico: 401 sem o token certo, 403 se nenhum estiver configurado."""
+    if METRICS_TOKEN is None:
+        if DEBUG:
+            return
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Rota de diagnóstico desativada: configure METRICS_TOKEN.",
+        )
+    if credentials is None or not hmac.compare_digest(credentials.credentials.encode(), METRICS_TOKEN.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token de diagnóstico inválido.",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
@@ -0,0 +1,89 @@
+"""Execução de bcrypt fora do event loop, com limite de concorrência e de fila.
+
+Cada hash/verify bcrypt consome ~250ms de CPU. Rodá-los num ProcessPoolExecutor
+dedicado mantém o worker livre para as demais rotas durante picos de login, e
+a fila limitada rejeita o excesso (503) em vez de acumular latência.
+"""
+import asyncio
+from typing import Optional
+from config import PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_QUEUE
+from auth.utils import hash_password, verify_password
+
+
+class PasswordPoolSaturated(Exception):
+    """A fila de hashing está cheia; o chamador deve tentar novamente mais tarde."""
+
+
+class PasswordWorkPool:
+    """Pool de processos para bcrypt com admissão controlada e métricas de fila."""
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.in_flight = 0
+        self.waiting = 0
+        self.completed = 0
+        self.rejected = 0
+        self._executor = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    def _get_executor(self):
+        # workers == 0 roda no threadpool padrão (útil em testes e ambientes sem multiprocessing)
+        if self.workers > 0 and self._executor is None:
+            # Importados aqui: o pool só nasce no primeiro login
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+
+            # spawn: não herda o event loop nem as conexões abertas do processo pai
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    async def run(self, fn, *args):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(max(self.workers, 1))
+        if self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise PasswordPoolSaturated()
+
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._get_executor(), fn, *args)
+            self.completed += 1
+            return result
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+
+    async def hash_password(self, password: str) -> str:
+        return await self.run(hash_password, password)
+
+    async def verify_password(self, plain: str, hashed: str) -> bool:
+        return await self.run(verify_password, plain, hashed)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "max_queue": self.max_queue,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_pool = PasswordWorkPool(workers=PASSWORD_HASH_WORKERS, max_queue=PASSWORD_HASH_MAX_QUEUE)
@@ -0,0 +1,100 @@
+"""Cache de principais autenticados (claims verificadas + snapshot do usuário).
+
+Evita `jwt.decode` e o SELECT em `usuarios` a cada requisição autenticada.
+A entrada expira no que vier primeiro: o TTL do cache ou o `exp` do token.
+Cada worker tem seu próprio cache; alterações feitas por outro processo só são
+vistas após o TTL, por isso ele deve ser curto.
+"""
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping, Optional
+from sqlalchemy import event
+from config import PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL
+from models.usuario import UsuarioModel
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Snapshot imutável e desacoplado da sessão do usuário autenticado."""
+    id_usuario: uuid.UUID
+    is_active: bool
+    is_admin: bool
+    claims: Mapping
+
+    @classmethod
+    def from_user(cls, user: UsuarioModel, claims: dict) -> "Principal":
+        return cls(
+            id_usuario=user.id_usuario,
+            is_active=bool(user.is_active),
+            is_admin=bool(user.is_admin),
+            claims=MappingProxyType(dict(claims)),
+        )
+
+
+class PrincipalCache:
+    """Cache LRU limitado com TTL, indexado pelo digest do token."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple[float, Principal]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Optional[Principal]:
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, principal = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return principal
+
+    def put(self, token: str, principal: Principal):
+        if self.maxsize <= 0:
+            return
+        lifetime = self.ttl
+        exp = principal.claims.get("exp")
+        if exp is not None:
+            lifetime = min(lifetime, float(exp) - time.time())
+        if lifetime <= 0:
+            return
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + lifetime, principal)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate_user(self, user_id):
+        """Remove todas as entradas de um usuário (desativado, alterado ou removido)."""
+        with self._lock:
+            stale = [key for key, (_, principal) in self._entries.items() if str(principal.id_usuario) == str(user_id)]
+            for key in stale:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+principal_cache = PrincipalCache(maxsize=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL)
+
+
+# Invalidação explícita: qualquer alteração de usuário via ORM neste processo
+@event.listens_for(UsuarioModel, "after_update")
+@event.listens_for(UsuarioModel, "after_delete")
+def _invalidate_changed_user(mapper, connection, target):
+    principal_cache.invalidate_user(target.id_usuario)
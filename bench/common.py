@@ -0,0 +1,174 @@
+"""Utilidades compartilhadas pelos benchmarks: ambiente isolado, cliente ASGI e estatísticas.
+
+`configure_env()` precisa ser chamado antes de importar qualquer módulo do app,
+pois `config.py` lê as variáveis de ambiente na importação.
+"""
+import os
+import tempfile
+import uuid
+from datetime import datetime, timedelta
+
+
+def configure_env(**overrides):
+    """Define variáveis padrão (SQLite temporário, chaves aleatórias) sem sobrescrever as existentes."""
+    for key, value in overrides.items():
+        if value is not None:
+            os.environ[key] = str(value)
+    if "DATABASE_URL" not in os.environ:
+        path = os.path.join(tempfile.mkdtemp(prefix="nexus-bench-"), "bench.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    if "ENCRYPTION_KEY" not in os.environ:
+        from cryptography.fernet import Fernet
+        os.environ["ENCRYPTION_KEY"] = Fernet.generate_key().decode()
+    os.environ.setdefault("SECRET_KEY", uuid.uuid4().hex)
+
+
+async def app_client():
+    """Inicializa o schema e devolve um httpx.AsyncClient ligado ao app em processo."""
+    import httpx
+    from database import init_db
+    from main import app
+
+    await init_db()
+    transport = httpx.ASGITransport(app=app)
+    return httpx.AsyncClient(transport=transport, base_url="http://bench")
+
+
+async def create_user(client, nome: str, password: str) -> dict:
+    """Cadastra um usuário e devolve o cabeçalho Authorization do seu token."""
+    response = await client.post("/auth/users/", json={"nome": nome, "email": f"{nome}@example.com", "password": password})
+    response.raise_for_status()
+    response = await client.post("/auth/token", data={"username": nome, "password": password})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+# Vocabulário dos dados sintéticos
+_EMPRESAS = ("Padaria", "Clínica", "Construtora", "Transportadora", "Escritório", "Loja", "Academia", "Farmácia", "Imobiliária", "Restaurante")
+_NOMES = ("Aurora", "Horizonte", "São Jorge", "Bela Vista", "Nova Era", "Primavera", "Central", "Atlântico", "Ipê", "Santa Clara")
+_PESSOAS = ("Ana", "Bruno", "Carla", "Diego", "Elisa", "Fábio", "Gabriela", "Heitor", "Isabela", "João", "Larissa", "Marcos")
+_SOBRENOMES = ("Silva", "Souza", "Oliveira", "Santos", "Pereira", "Lima", "Costa", "Ribeiro", "Almeida", "Carvalho")
+_CIDADES = (("São Paulo", "SP"), ("Campinas", "SP"), ("Rio de Janeiro", "RJ"), ("Belo Horizonte", "MG"), ("Curitiba", "PR"),
+            ("Porto Alegre", "RS"), ("Salvador", "BA"), ("Recife", "PE"), ("Fortaleza", "CE"), ("Goiânia", "GO"))
+_RUAS = ("Rua das Flores", "Avenida Brasil", "Rua XV de Novembro", "Avenida Paulista", "Rua Sete de Setembro", "Rua da Consolação")
+_PROJETOS = ("Site institucional", "Loja virtual", "Migração para a nuvem", "Aplicativo de agendamento", "Integração com ERP",
+             "Painel de indicadores", "Manutenção mensal", "Automação de e-mails")
+_ITENS = {
+    "servidor": ("Servidor de produção", "https://painel.{dominio}"),
+    "dominio": ("Registro do domínio", "https://registro.br/{dominio}"),
+    "certificado": ("Certificado TLS", "https://{dominio}"),
+    "banco": ("Banco de dados principal", "postgres://db.{dominio}:5432/app"),
+}
+
+
+def _uuid(rng):
+    return uuid.UUID(int=rng.getrandbits(128), version=4) if rng else uuid.uuid4()
+
+
+async def seed_tenant(db, user_id, rows: int, rng=None) -> dict:
+    """Insere um conjunto sintético de dados para um usuário, direto no banco.
+
+    Gera `rows` clientes e projetos, `rows // 5` desenvolvedores e `2 * rows`
+    itens de infraestrutura (com endereços, senhas criptografadas e valores
+    variados nos campos filtráveis) e devolve os IDs gerados por entidade.
+    Com um `random.Random` semeado em `rng`, IDs e conteúdo são reproduzíveis
+    (só o texto cifrado das senhas muda, pelo IV aleatório do Fernet).
+    """
+    import random
+    from sqlalchemy import insert
+    from models.cliente import ClienteModel
+    from models.desenvolvedor import DesenvolvedorModel
+    from models.descriptar_senha import encrypt_password
+    from models.endereco import EnderecoModel
+    from models.itens_infraestrutura import InfraestruturaItemModel
+    from models.servico_projeto import ServicoProjetoModel
+
+    rand = rng or random.Random()
+    now = datetime.now()
+    tag = uuid.UUID(str(user_id)).hex[:12]
+    n_devs = max(1, rows // 5)
+
+    def endereco(i):
+        cidade, estado = rand.choice(_CIDADES)
+        return {"id_endereco": _uuid(rng), "user_id": user_id, "rua": rand.choice(_RUAS), "numero": str(rand.randint(1, 3000)),
+                "complemento": f"Sala {rand.randint(1, 120)}" if i % 3 == 0 else None, "bairro": "Centro",
+                "cidade": cidade, "estado": estado, "cep": f"{rand.randint(10000, 99999)}-{rand.randint(0, 999):03d}",
+                "data_criacao": now}
+
+    def pessoa():
+        return f"{rand.choice(_PESSOAS)} {rand.choice(_SOBRENOMES)}"
+
+    enderecos = [endereco(i) for i in range(rows + n_devs)]
+    clientes = [
+        {"id_cliente": _uuid(rng), "user_id": user_id, "id_endereco": enderecos[i]["id_endereco"],
+         "nome": f"{rand.choice(_EMPRESAS)} {rand.choice(_NOMES)} {i:06d}", "email": f"{tag}-c{i}@example.com",
+         "telefone": f"({rand.randint(11, 99)}) 9{rand.randint(1000, 9999)}-{rand.randint(1000, 9999)}",
+         "pessoa_contato": pessoa(), "documento_fiscal": f"{rand.randint(0, 99_999_999):08d}/0001-{rand.randint(10, 99)}",
+         "segmento": ("varejo", "saude", "tecnologia", None)[i % 4],
+         "status_relacionamento": ("ativo", "inativo", "prospecto")[i % 3], "data_criacao": now}
+        for i in range(rows)
+    ]
+    desenvolvedores = [
+        {"id_desenvolvedor": _uuid(rng), "user_id": user_id, "id_endereco": enderecos[rows + i]["id_endereco"],
+         "nome": f"{pessoa()} {i:06d}", "email": f"{tag}-d{i}@example.com", "documento_fiscal": f"{rand.randint(0, 99_999_999_999):011d}",
+         "tipo_contrato": ("PJ", "CLT", None)[i % 3], "taxa_horaria": rand.randint(60, 250), "data_criacao": now}
+        for i in range(n_devs)
+    ]
+    projetos = [
+        {"id_servico": _uuid(rng), "user_id": user_id, "id_cliente": clientes[i]["id_cliente"],
+         "id_desenvolvedor": desenvolvedores[i % n_devs]["id_desenvolvedor"],
+         "titulo": f"{rand.choice(_PROJETOS)} {i:06d}", "escopo": f"{rand.choice(_PROJETOS)} para {clientes[i]['nome']}",
+         "status_projeto": ("ativo", "pausado", "concluido")[i % 3],
+         "data_inicio": now - timedelta(days=rand.randint(0, 365)), "data_limite": now + timedelta(days=rand.randint(15, 180)),
+         "orcamento": round(rand.uniform(500, 80000), 2)}
+        for i in range(rows)
+    ]
+    itens = []
+    for i in range(2 * rows):
+        tipo_item = ("servidor", "dominio", "certificado", "banco")[i % 4]
+        descricao, url = _ITENS[tipo_item]
+        dominio = f"cliente{i % rows}.example.com"
+        itens.append({
+            "id_item": _uuid(rng), "user_id": user_id, "id_cliente": clientes[i % rows]["id_cliente"],
+            "id_servico": projetos[i % rows]["id_servico"] if i % 3 else None,
+            "id_desenvolvedor": desenvolvedores[i % n_devs]["id_desenvolvedor"],
+            "tipo_item": tipo_item, "descricao": f"{descricao} {i:06d}", "url_acesso": url.format(dominio=dominio),
+            "usuario": "admin", "referencia_senha": encrypt_password(f"s3nha-{rand.getrandbits(48):012x}"),
+            "is_critico": i % 5 == 0, "data_expiracao": now + timedelta(days=i % 400 - 30) if i % 7 else None,
+        })
+
+    for model, batch in (
+        (EnderecoModel, enderecos),
+        (ClienteModel, clientes),
+        (DesenvolvedorModel, desenvolvedores),
+        (ServicoProjetoModel, projetos),
+        (InfraestruturaItemModel, itens),
+    ):
+        await db.execute(insert(model), batch)
+    await db.commit()
+    return {
+        "enderecos": [row["id_endereco"] for row in enderecos],
+        "clientes": [row["id_cliente"] for row in clientes],
+        "desenvolvedores": [row["id_desenvolvedor"] for row in desenvolvedores],
+        "projetos": [row["id_servico"] for row in projetos],
+        "infra": [row["id_item"] for row in itens],
+    }
+
+
+def percentiles(samples) -> dict:
+    """Resumo de latências (segundos) em milissegundos."""
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def pick(q):
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 3)
+
+    return {
+        "count": len(ordered),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3),
+        "p50_ms": pick(0.50),
+        "p95_ms": pick(0.95),
+        "p99_ms": pick(0.99),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
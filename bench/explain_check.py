@@ -0,0 +1,156 @@
+"""Verifica, com EXPLAIN, que as queries das rotas de leitura usam índices.
+
+Popula um banco com vários usuários, chama as rotas GET de cada router em
+processo, captura o SQL realmente emitido (com os parâmetros) e roda EXPLAIN
+em cada SELECT. Falha (código de saída 1) se alguma tabela da aplicação for
+lida por varredura completa: `SCAN <tabela>` no SQLite, `Seq Scan` no
+PostgreSQL. No PostgreSQL o EXPLAIN roda com `enable_seqscan = off`, então um
+Seq Scan só aparece quando nenhum índice atende a query, independentemente do
+volume de dados (use --planner-defaults para ver o plano com custos normais).
+
+    python -m bench.explain_check                         # SQLite temporário
+    DATABASE_URL=postgresql://... python -m bench.explain_check --tenants 50 --rows 500
+"""
+import argparse
+import asyncio
+import json
+import re
+import sys
+import uuid
+from bench.common import configure_env
+
+APP_TABLES = {"clientes", "desenvolvedores", "enderecos", "servicos_projetos", "itens_infraestrutura"}
+
+
+def _routes(ids: dict) -> list:
+    """Rotas de leitura exercitadas, com filtros que usam cada índice declarado."""
+    cliente, dev, projeto, item = ids["clientes"][0], ids["desenvolvedores"][0], ids["projetos"][0], ids["infra"][0]
+    return [
+        ("/clientes", {}),
+        ("/clientes", {"status_relacionamento": "ativo"}),
+        ("/clientes", {"sort": "email"}),
+        (f"/clientes/{cliente}", {}),
+        ("/desenvolvedores", {}),
+        ("/desenvolvedores", {"sort": "email"}),
+        (f"/desenvolvedores/{dev}", {}),
+        (f"/enderecos/{ids['enderecos'][0]}", {}),
+        ("/projetos", {}),
+        ("/projetos", {"id_cliente": str(cliente)}),
+        ("/projetos", {"id_desenvolvedor": str(dev)}),
+        ("/projetos", {"status_projeto": "ativo"}),
+        ("/projetos", {"sort": "status_projeto"}),
+        (f"/projetos/{projeto}", {}),
+        ("/infra", {}),
+        ("/infra", {"id_cliente": str(cliente)}),
+        ("/infra", {"id_servico": str(projeto)}),
+        ("/infra", {"is_critico": "true"}),
+        ("/infra", {"sort": "tipo_item"}),
+        (f"/infra/{item}", {}),
+        ("/infra/expiring", {}),
+        ("/infra/expiring", {"critical_only": "true", "within_days": 90}),
+        ("/dashboard/summary", {}),
+        ("/export/clientes", {}),
+        ("/export/projetos", {}),
+        ("/export/infra", {}),
+        ("/search", {"q": "c1"}),
+        ("/search", {"q": "c1 example", "entity": "clientes"}),
+    ]
+
+
+def _full_scans_sqlite(plan_rows) -> list:
+    scans = []
+    for row in plan_rows:
+        match = re.match(r"SCAN (\w+)", row[-1])
+        if match and match.group(1) in APP_TABLES:
+            scans.append(row[-1])
+    return scans
+
+
+def _full_scans_postgresql(node) -> list:
+    scans = []
+    if node.get("Node Type") == "Seq Scan" and node.get("Relation Name") in APP_TABLES:
+        scans.append(f"Seq Scan on {node['Relation Name']}")
+    for child in node.get("Plans", []):
+        scans.extend(_full_scans_postgresql(child))
+    return scans
+
+
+async def _explain(engine, statement, parameters, planner_defaults: bool):
+    """Devolve (plano legível, varreduras completas em tabelas da aplicação)."""
+    async with engine.connect() as conn:
+        if conn.dialect.name == "postgresql":
+            if not planner_defaults:
+                await conn.exec_driver_sql("SET enable_seqscan = off")
+            result = await conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters)
+            plan = result.scalar()
+            plan = json.loads(plan) if isinstance(plan, str) else plan
+            return plan[0]["Plan"], _full_scans_postgresql(plan[0]["Plan"])
+        rows = (await conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)).all()
+        return [row[-1] for row in rows], _full_scans_sqlite(rows)
+
+
+async def run(args) -> dict:
+    from sqlalchemy import event, text
+    from bench.common import app_client, create_user, seed_tenant
+    from database import SessionLocal, engine
+
+    client = await app_client()
+    async with client:
+        headers = await create_user(client, f"bench_explain_{uuid.uuid4().hex[:8]}", "senha-bench")
+        me = (await client.get("/auth/me", headers=headers)).json()
+
+        # O usuário consultado é um entre vários: user_id precisa ser seletivo
+        async with SessionLocal() as db:
+            ids = await seed_tenant(db, uuid.UUID(me["id_usuario"]), args.rows)
+            for _ in range(args.tenants - 1):
+                await seed_tenant(db, uuid.uuid4(), args.rows)
+        async with engine.connect() as conn:
+            await conn.execute(text("ANALYZE"))
+            await conn.commit()
+
+        captured = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("SELECT") and "usuarios" not in statement:
+                captured.append((current_route, statement, parameters))
+
+        event.listen(engine.sync_engine, "before_cursor_execute", capture)
+        try:
+            for path, params in _routes(ids):
+                current_route = path + ("?" + "&".join(f"{k}={v}" for k, v in params.items()) if params else "")
+                response = await client.get(path, params=params, headers=headers)
+                response.raise_for_status()
+        finally:
+            event.remove(engine.sync_engine, "before_cursor_execute", capture)
+
+    checks = []
+    for route, statement, parameters in captured:
+        plan, scans = await _explain(engine, statement, parameters, args.planner_defaults)
+        checks.append({"route": route, "ok": not scans, "full_scans": scans, "sql": " ".join(statement.split())[:160], "plan": plan})
+    await engine.dispose()
+    return {
+        "dialect": engine.dialect.name,
+        "tenants": args.tenants,
+        "rows_per_tenant": args.rows,
+        "queries": len(checks),
+        "failed": sum(not check["ok"] for check in checks),
+        "checks": checks if args.verbose else [check for check in checks if not check["ok"]],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tenants", type=int, default=20, help="Usuários sintéticos no banco")
+    parser.add_argument("--rows", type=int, default=200, help="Clientes/projetos por usuário")
+    parser.add_argument("--planner-defaults", action="store_true", help="PostgreSQL: não desativa enable_seqscan")
+    parser.add_argument("--verbose", action="store_true", help="Inclui o plano de todas as queries, não só das que falharam")
+    args = parser.parse_args()
+
+    configure_env()
+    result = asyncio.run(run(args))
+    print(json.dumps(result, indent=2, ensure_ascii=False, default=str))
+    sys.exit(1 if result["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,470 @@
+"""Teste de carga em processo: usuários virtuais concorrentes percorrendo todas as rotas.
+
+Cada usuário virtual pertence a um tenant (usuário do app) e sorteia, com pesos
+fixos e uma semente própria, a próxima operação: listagens e detalhes (com e sem
+If-None-Match), dashboard, busca, exportação, vencimentos, ciclos de CRUD de
+clientes, desenvolvedores, projetos e itens, importação e remoção em lote, decifragem de
+senhas (uma a uma e por projeto) e login. Com a mesma --seed, a sequência de
+operações se repete.
+
+Por rota (método + template do caminho) o relatório traz chamadas, vazão,
+status, p50/p95/p99 e queries SQL por requisição, além dos totais. Com
+--output o JSON é salvo; com --compare, cada rota é comparada a um relatório
+anterior (razão do p95 e da vazão), para acompanhar regressões entre execuções.
+
+    python -m bench.load --users 4 --rows 200 --concurrency 16 --duration 20
+    python -m bench.seed --database-url sqlite:///bench.db --users 10 --rows 1000
+    python -m bench.load --database-url sqlite:///bench.db --existing --users 10 --output atual.json --compare base.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from contextvars import ContextVar
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from bench.common import configure_env, percentiles
+from bench.seed import BENCH_ENCRYPTION_KEY, DEFAULT_PASSWORD, DEFAULT_PREFIX
+
+ID_SAMPLE = 500  # IDs por entidade carregados de cada tenant existente
+
+
+class QueryTally:
+    __slots__ = ("count",)
+
+    def __init__(self):
+        self.count = 0
+
+
+_tally: ContextVar[Optional[QueryTally]] = ContextVar("bench_load_queries", default=None)
+
+
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    tally = _tally.get()
+    if tally is not None:
+        tally.count += 1
+
+
+class Recorder:
+    """Latências, status e queries por rota; desligado durante o aquecimento."""
+
+    def __init__(self):
+        self.enabled = False
+        self.routes = {}
+
+    def record(self, route: str, elapsed: float, status_code: int, queries: int):
+        if not self.enabled:
+            return
+        entry = self.routes.setdefault(route, {"latencies": [], "status": {}, "queries": []})
+        entry["latencies"].append(elapsed)
+        entry["status"][status_code] = entry["status"].get(status_code, 0) + 1
+        entry["queries"].append(queries)
+
+    def report(self, elapsed: float) -> dict:
+        routes, all_latencies, all_queries, errors = {}, [], [], 0
+        for route, entry in sorted(self.routes.items()):
+            all_latencies += entry["latencies"]
+            all_queries += entry["queries"]
+            errors += sum(count for code, count in entry["status"].items() if code >= 400)
+            routes[route] = {
+                **percentiles(entry["latencies"]),
+                "throughput_rps": round(len(entry["latencies"]) / elapsed, 1),
+                "status_codes": {str(code): count for code, count in sorted(entry["status"].items())},
+                "queries_mean": round(sum(entry["queries"]) / len(entry["queries"]), 2),
+                "queries_max": max(entry["queries"]),
+            }
+        return {
+            "seconds": round(elapsed, 2),
+            "requests": len(all_latencies),
+            "throughput_rps": round(len(all_latencies) / elapsed, 1),
+            "errors": errors,
+            "latency": percentiles(all_latencies),
+            "queries_per_request": round(sum(all_queries) / len(all_queries), 2) if all_queries else None,
+            "routes": routes,
+        }
+
+
+class Tenant:
+    """Usuário do app usado pela carga: credenciais, token e IDs conhecidos por entidade."""
+
+    def __init__(self, nome: str, password: str, ids: dict):
+        self.nome = nome
+        self.password = password
+        self.ids = {entity: [str(value) for value in values] for entity, values in ids.items()}
+        self.headers = {}
+        self.etags = {}
+
+
+class VirtualUser:
+    def __init__(self, client, tenant: Tenant, rng: random.Random, recorder: Recorder):
+        self.client = client
+        self.tenant = tenant
+        self.rng = rng
+        self.recorder = recorder
+
+    def pick(self, entity: str) -> str:
+        return self.rng.choice(self.tenant.ids[entity])
+
+    async def call(self, route: str, method: str, url: str, expected=(200,), **kwargs):
+        """Executa e registra uma requisição; `route` agrupa as URLs concretas no relatório."""
+        kwargs["headers"] = {**self.tenant.headers, **kwargs.get("headers", {})}
+        tally = QueryTally()
+        token = _tally.set(tally)
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            _tally.reset(token)
+        self.recorder.record(route, elapsed, response.status_code, tally.count)
+        if response.status_code not in expected:
+            return None
+        return response
+
+
+# --- PAYLOADS ---
+def _endereco(rng) -> dict:
+    from bench.common import _CIDADES, _RUAS
+
+    cidade, estado = rng.choice(_CIDADES)
+    return {"rua": rng.choice(_RUAS), "numero": str(rng.randint(1, 3000)), "bairro": "Centro",
+            "cidade": cidade, "estado": estado, "cep": f"{rng.randint(10000, 99999)}-{rng.randint(0, 999):03d}"}
+
+
+def _cliente(rng) -> dict:
+    from bench.common import _EMPRESAS, _NOMES
+
+    tag = f"{rng.getrandbits(64):016x}"
+    return {"nome": f"{rng.choice(_EMPRESAS)} {rng.choice(_NOMES)} {tag[:6]}", "email": f"carga-{tag}@example.com",
+            "segmento": rng.choice(("varejo", "saude", "tecnologia")), "status_relacionamento": "prospecto",
+            "endereco_obj": _endereco(rng)}
+
+
+def _desenvolvedor(rng) -> dict:
+    from bench.common import _PESSOAS, _SOBRENOMES
+
+    tag = f"{rng.getrandbits(64):016x}"
+    return {"nome": f"{rng.choice(_PESSOAS)} {rng.choice(_SOBRENOMES)}", "email": f"carga-{tag}@example.com",
+            "documento_fiscal": f"{rng.randint(0, 99_999_999_999):011d}", "tipo_contrato": "PJ",
+            "taxa_horaria": rng.randint(60, 250), "endereco_obj": _endereco(rng)}
+
+
+def _projeto(vu: VirtualUser) -> dict:
+    from bench.common import _PROJETOS
+
+    return {"titulo": f"{vu.rng.choice(_PROJETOS)} {vu.rng.getrandbits(24):06x}", "escopo": "Escopo gerado pelo teste de carga",
+            "status_projeto": "ativo", "id_cliente": vu.pick("clientes"), "id_desenvolvedor": vu.pick("desenvolvedores"),
+            "orcamento": round(vu.rng.uniform(500, 80000), 2)}
+
+
+def _item(vu: VirtualUser) -> dict:
+    expira = datetime.now(timezone.utc) + timedelta(days=vu.rng.randint(1, 365))
+    return {"tipo_item": "servidor", "descricao": f"Servidor de carga {vu.rng.getrandbits(32):08x}",
+            "url_acesso": "https://painel.carga.example.com", "usuario": "admin",
+            "referencia_senha": f"s3nha-{vu.rng.getrandbits(48):012x}", "is_critico": vu.rng.random() < 0.2,
+            "id_cliente": vu.pick("clientes"), "id_desenvolvedor": vu.pick("desenvolvedores"),
+            "id_servico": vu.pick("projetos"), "data_expiracao": expira.isoformat()}
+
+
+# --- OPERAÇÕES ---
+async def list_clientes(vu):
+    await vu.call("GET /clientes", "GET", "/clientes", params={"segmento": vu.rng.choice(("varejo", "saude", "tecnologia"))})
+
+
+async def list_clientes_conditional(vu):
+    """Revalidação com If-None-Match do último ETag visto (304 enquanto nada mudar)."""
+    etag = vu.tenant.etags.get("clientes")
+    headers = {"If-None-Match": etag} if etag else {}
+    response = await vu.call("GET /clientes (If-None-Match)", "GET", "/clientes", expected=(200, 304), headers=headers)
+    if response is not None and "etag" in response.headers:
+        vu.tenant.etags["clientes"] = response.headers["etag"]
+
+
+async def get_cliente(vu):
+    await vu.call("GET /clientes/{cliente_id}", "GET", f"/clientes/{vu.pick('clientes')}")
+
+
+async def list_desenvolvedores(vu):
+    await vu.call("GET /desenvolvedores", "GET", "/desenvolvedores")
+
+
+async def get_desenvolvedor(vu):
+    await vu.call("GET /desenvolvedores/{dev_id}", "GET", f"/desenvolvedores/{vu.pick('desenvolvedores')}")
+
+
+async def get_endereco(vu):
+    await vu.call("GET /enderecos/{endereco_id}", "GET", f"/enderecos/{vu.pick('enderecos')}")
+
+
+async def list_projetos(vu):
+    await vu.call("GET /projetos", "GET", "/projetos", params={"status_projeto": vu.rng.choice(("ativo", "pausado", "concluido"))})
+
+
+async def get_projeto(vu):
+    await vu.call("GET /projetos/{projeto_id}", "GET", f"/projetos/{vu.pick('projetos')}")
+
+
+async def list_infra(vu):
+    await vu.call("GET /infra", "GET", "/infra", params={"tipo_item": vu.rng.choice(("servidor", "dominio", "certificado", "banco"))})
+
+
+async def get_infra(vu):
+    await vu.call("GET /infra/{item_id}", "GET", f"/infra/{vu.pick('infra')}")
+
+
+async def expiring(vu):
+    await vu.call("GET /infra/expiring", "GET", "/infra/expiring", params={"within_days": 30})
+
+
+async def decrypt(vu):
+    await vu.call("GET /infra/decrypt/{item_id}", "GET", f"/infra/decrypt/{vu.pick('infra')}")
+
+
+async def decrypt_project(vu):
+    await vu.call("POST /infra/decrypt", "POST", "/infra/decrypt", json={"id_servico": vu.pick("projetos")})
+
+
+async def dashboard(vu):
+    await vu.call("GET /dashboard/summary", "GET", "/dashboard/summary")
+
+
+async def search(vu):
+    termo = vu.rng.choice(("servidor", "loja", "migra", "certificado", "clinica", "aurora"))
+    await vu.call("GET /search", "GET", "/search", params={"q": termo})
+
+
+async def export(vu):
+    await vu.call("GET /export/{entity}", "GET", f"/export/{vu.rng.choice(('clientes', 'projetos', 'infra'))}")
+
+
+async def me(vu):
+    await vu.call("GET /auth/me", "GET", "/auth/me")
+
+
+async def login(vu):
+    await vu.call("POST /auth/token", "POST", "/auth/token", data={"username": vu.tenant.nome, "password": vu.tenant.password})
+
+
+async def cliente_crud(vu):
+    payload = _cliente(vu.rng)
+    created = await vu.call("POST /clientes", "POST", "/clientes", expected=(201,), json=payload)
+    if created is None:
+        return
+    cliente_id = created.json()["id_cliente"]
+    payload["observacoes"] = "Atualizado pelo teste de carga"
+    await vu.call("PUT /clientes/{cliente_id}", "PUT", f"/clientes/{cliente_id}", json=payload)
+    await vu.call("DELETE /clientes/{cliente_id}", "DELETE", f"/clientes/{cliente_id}", expected=(204,))
+
+
+async def desenvolvedor_crud(vu):
+    payload = _desenvolvedor(vu.rng)
+    created = await vu.call("POST /desenvolvedores", "POST", "/desenvolvedores", expected=(201,), json=payload)
+    if created is None:
+        return
+    dev_id = created.json()["id_desenvolvedor"]
+    payload["taxa_horaria"] += 10
+    await vu.call("PUT /desenvolvedores/{dev_id}", "PUT", f"/desenvolvedores/{dev_id}", json=payload)
+    await vu.call("DELETE /desenvolvedores/{dev_id}", "DELETE", f"/desenvolvedores/{dev_id}", expected=(204,))
+
+
+async def projeto_write(vu):
+    """Cria e atualiza um projeto (não há DELETE de projetos; eles se acumulam no tenant)."""
+    payload = _projeto(vu)
+    created = await vu.call("POST /projetos", "POST", "/projetos", expected=(201,), json=payload)
+    if created is None:
+        return
+    payload["status_projeto"] = "pausado"
+    await vu.call("PUT /projetos/{projeto_id}", "PUT", f"/projetos/{created.json()['id_servico']}", json=payload)
+
+
+async def infra_crud(vu):
+    payload = _item(vu)
+    created = await vu.call("POST /infra", "POST", "/infra", expected=(201,), json=payload)
+    if created is None:
+        return
+    item_id = created.json()["id_item"]
+    payload["referencia_senha"] = f"s3nha-{vu.rng.getrandbits(48):012x}"
+    await vu.call("PUT /infra/{item_id}", "PUT", f"/infra/{item_id}", json=payload)
+    await vu.call("DELETE /infra/{item_id}", "DELETE", f"/infra/{item_id}", expected=(204,))
+
+
+async def endereco_update(vu):
+    await vu.call("PUT /enderecos/{endereco_id}", "PUT", f"/enderecos/{vu.pick('enderecos')}", json=_endereco(vu.rng))
+
+
+async def bulk_clientes(vu):
+    """Importa 25 clientes num segmento próprio e os remove em lote pelo filtro."""
+    segmento = f"lote-{vu.rng.getrandbits(48):012x}"
+    rows = [{**_cliente(vu.rng), "segmento": segmento} for _ in range(25)]
+    await vu.call("POST /clientes/bulk", "POST", "/clientes/bulk", json=rows)
+    await vu.call("DELETE /clientes", "DELETE", "/clientes", json={"segmento": segmento})
+
+
+# (operação, peso): ~80% leituras, ~17% escritas, o restante em logins (bcrypt)
+OPERATIONS = (
+    (list_clientes, 10), (list_clientes_conditional, 4), (get_cliente, 8),
+    (list_desenvolvedores, 3), (get_desenvolvedor, 3), (get_endereco, 2),
+    (list_projetos, 8), (get_projeto, 6), (list_infra, 8), (get_infra, 6),
+    (expiring, 3), (decrypt, 3), (decrypt_project, 1), (dashboard, 3), (search, 3), (export, 1), (me, 2),
+    (cliente_crud, 3), (desenvolvedor_crud, 1), (projeto_write, 2), (infra_crud, 2),
+    (endereco_update, 2), (bulk_clientes, 1), (login, 1),
+)
+
+
+# --- EXECUÇÃO ---
+async def load_existing_tenants(prefix: str, users: int, password: str) -> list:
+    """Tenants criados pelo bench.seed: usuários com o prefixo e uma amostra de IDs de cada entidade."""
+    from sqlalchemy import select
+    from database import SessionLocal
+    from models.cliente import ClienteModel
+    from models.desenvolvedor import DesenvolvedorModel
+    from models.itens_infraestrutura import InfraestruturaItemModel
+    from models.servico_projeto import ServicoProjetoModel
+    from models.usuario import UsuarioModel
+
+    columns = {
+        "clientes": ClienteModel.id_cliente,
+        "desenvolvedores": DesenvolvedorModel.id_desenvolvedor,
+        "projetos": ServicoProjetoModel.id_servico,
+        "infra": InfraestruturaItemModel.id_item,
+        "enderecos": ClienteModel.id_endereco,
+    }
+    tenants = []
+    async with SessionLocal() as db:
+        rows = (await db.execute(
+            select(UsuarioModel.id_usuario, UsuarioModel.nome)
+            .where(UsuarioModel.nome.startswith(prefix)).order_by(UsuarioModel.nome).limit(users)
+        )).all()
+        for user_id, nome in rows:
+            ids = {}
+            for entity, column in columns.items():
+                ids[entity] = list(await db.scalars(
+                    select(column).where(column.class_.user_id == user_id).order_by(column).limit(ID_SAMPLE)
+                ))
+            tenants.append(Tenant(nome, password, ids))
+    if not tenants:
+        raise SystemExit(f"Nenhum usuário com o prefixo {prefix!r}; rode antes `python -m bench.seed`.")
+    empty = [f"{tenant.nome}:{entity}" for tenant in tenants for entity, ids in tenant.ids.items() if not ids]
+    if empty:
+        raise SystemExit(f"Tenants sem dados ({', '.join(empty[:5])}); popule-os com `python -m bench.seed`.")
+    return tenants
+
+
+async def _drive(client, tenants, args, recorder: Recorder, seconds: float, budget: Optional[list]):
+    operations = [operation for operation, _ in OPERATIONS]
+    weights = [weight for _, weight in OPERATIONS]
+    deadline = time.perf_counter() + seconds
+
+    async def worker(index: int):
+        vu = VirtualUser(client, tenants[index % len(tenants)], random.Random(args.seed * 10_000 + index), recorder)
+        while time.perf_counter() < deadline:
+            if budget is not None:
+                if budget[0] <= 0:
+                    return
+                budget[0] -= 1
+            await vu.rng.choices(operations, weights)[0](vu)
+
+    await asyncio.gather(*(worker(index) for index in range(args.concurrency)))
+
+
+def compare(current: dict, baseline: dict) -> dict:
+    """Razões atual/anterior por rota: p95 > 1 ou vazão < 1 indicam regressão."""
+    def ratio(new, old):
+        return round(new / old, 2) if old else None
+
+    routes = {}
+    for route, entry in current["routes"].items():
+        old = baseline.get("routes", {}).get(route)
+        if old:
+            routes[route] = {"p95_ratio": ratio(entry["p95_ms"], old["p95_ms"]),
+                             "throughput_ratio": ratio(entry["throughput_rps"], old["throughput_rps"]),
+                             "queries_mean_delta": round(entry["queries_mean"] - old["queries_mean"], 2)}
+    return {
+        "throughput_ratio": ratio(current["throughput_rps"], baseline.get("throughput_rps")),
+        "p95_ratio": ratio(current["latency"]["p95_ms"], baseline.get("latency", {}).get("p95_ms")),
+        "routes": routes,
+    }
+
+
+async def run(args) -> dict:
+    from sqlalchemy import event
+    from bench.common import app_client
+    from auth.password_pool import password_pool
+    from config import FAST_JSON_RESPONSES
+    from database import engine
+
+    client = await app_client()
+    async with client:
+        if args.existing:
+            tenants = await load_existing_tenants(args.prefix, args.users, args.password)
+        else:
+            from bench.seed import seed_users
+            prefix = f"{args.prefix}{random.Random().getrandbits(32):08x}_"
+            seeded = await seed_users(args.users, args.rows, prefix, args.password, args.seed)
+            tenants = [Tenant(user["nome"], args.password, user["ids"]) for user in seeded]
+
+        for tenant in tenants:
+            response = await client.post("/auth/token", data={"username": tenant.nome, "password": tenant.password})
+            response.raise_for_status()
+            tenant.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        event.listen(engine.sync_engine, "before_cursor_execute", _count_query)
+        recorder = Recorder()
+        if args.warmup > 0:
+            await _drive(client, tenants, args, recorder, args.warmup, None)
+        recorder.enabled = True
+        budget = [args.requests] if args.requests else None
+        start = time.perf_counter()
+        await _drive(client, tenants, args, recorder, args.duration if not args.requests else float("inf"), budget)
+        elapsed = time.perf_counter() - start
+        event.remove(engine.sync_engine, "before_cursor_execute", _count_query)
+
+    password_pool.shutdown()
+    await engine.dispose()
+    report = {
+        "config": {
+            "dialect": engine.dialect.name,
+            "tenants": len(tenants),
+            "rows_per_tenant": None if args.existing else args.rows,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+            "fast_json_responses": FAST_JSON_RESPONSES,
+        },
+        **recorder.report(elapsed),
+    }
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as baseline:
+            report["comparison"] = compare(report, json.load(baseline))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None, help="Banco usado (padrão: DATABASE_URL ou um SQLite temporário)")
+    parser.add_argument("--existing", action="store_true", help="Usa usuários já criados pelo bench.seed em vez de popular novos")
+    parser.add_argument("--users", type=int, default=4, help="Tenants exercitados")
+    parser.add_argument("--rows", type=int, default=200, help="Linhas por tenant ao popular (ver bench.seed)")
+    parser.add_argument("--prefix", default=DEFAULT_PREFIX, help="Prefixo dos usuários (com --existing)")
+    parser.add_argument("--password", default=DEFAULT_PASSWORD, help="Senha dos usuários")
+    parser.add_argument("--concurrency", type=int, default=16, help="Usuários virtuais simultâneos")
+    parser.add_argument("--duration", type=float, default=10.0, help="Segundos de medição")
+    parser.add_argument("--requests", type=int, default=None, help="Encerra após N operações (em vez de --duration)")
+    parser.add_argument("--warmup", type=float, default=1.0, help="Segundos de aquecimento fora da medição")
+    parser.add_argument("--seed", type=int, default=42, help="Semente dos dados e da sequência de operações")
+    parser.add_argument("--output", default=None, help="Também grava o relatório JSON neste arquivo")
+    parser.add_argument("--compare", default=None, help="Relatório anterior (--output) para comparar")
+    args = parser.parse_args()
+
+    configure_env(DATABASE_URL=args.database_url, ENCRYPTION_KEY=os.environ.get("ENCRYPTION_KEY", BENCH_ENCRYPTION_KEY))
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            output.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
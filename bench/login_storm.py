@@ -0,0 +1,88 @@
+"""Latência das rotas comuns durante uma rajada de logins (bcrypt).
+
+Mede o p50/p95/p99 de GET /clientes antes e durante N logins simultâneos,
+executando o app em processo (um único worker), e imprime o resultado em JSON.
+
+    python -m bench.login_storm --logins 200 --concurrency 50 --workers 2
+    python -m bench.login_storm --workers 0   # bcrypt no threadpool, para comparar
+"""
+import argparse
+import asyncio
+import json
+import time
+from bench.common import configure_env, percentiles
+
+
+async def _probe(client, headers, samples, stop: asyncio.Event):
+    while not stop.is_set():
+        start = time.perf_counter()
+        response = await client.get("/clientes", headers=headers)
+        response.raise_for_status()
+        samples.append(time.perf_counter() - start)
+        await asyncio.sleep(0.005)
+
+
+async def run(args) -> dict:
+    from bench.common import app_client, create_user
+    from auth.password_pool import password_pool
+
+    client = await app_client()
+    async with client:
+        headers = await create_user(client, "bench_storm", "senha-bench")
+
+        # Linha de base: rotas comuns sem logins concorrentes
+        baseline = []
+        stop = asyncio.Event()
+        probe = asyncio.create_task(_probe(client, headers, baseline, stop))
+        await asyncio.sleep(args.baseline_seconds)
+        stop.set()
+        await probe
+
+        # Rajada de logins com a sonda rodando em paralelo
+        during, login_times, statuses = [], [], {}
+        stop = asyncio.Event()
+        probe = asyncio.create_task(_probe(client, headers, during, stop))
+        slots = asyncio.Semaphore(args.concurrency)
+
+        async def login():
+            async with slots:
+                start = time.perf_counter()
+                response = await client.post("/auth/token", data={"username": "bench_storm", "password": "senha-bench"})
+                login_times.append(time.perf_counter() - start)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        storm_start = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(args.logins)))
+        storm_elapsed = time.perf_counter() - storm_start
+        stop.set()
+        await probe
+
+    password_pool.shutdown()
+    return {
+        "password_hash_workers": password_pool.workers,
+        "logins": args.logins,
+        "concurrency": args.concurrency,
+        "storm_seconds": round(storm_elapsed, 3),
+        "login_status_codes": statuses,
+        "login_latency": percentiles(login_times),
+        "non_auth_baseline": percentiles(baseline),
+        "non_auth_during_storm": percentiles(during),
+        "password_pool": password_pool.stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=None, help="PASSWORD_HASH_WORKERS (padrão: config)")
+    parser.add_argument("--max-queue", type=int, default=None, help="PASSWORD_HASH_MAX_QUEUE (padrão: config)")
+    parser.add_argument("--baseline-seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    configure_env(PASSWORD_HASH_WORKERS=args.workers, PASSWORD_HASH_MAX_QUEUE=args.max_queue)
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Custo por atualização das métricas (metrics.py), em nanossegundos.
+
+Mede Counter.inc e Histogram.observe em séries já existentes (o caso comum em
+produção) e o trabalho completo que o MetricsMiddleware faz ao fim de cada
+requisição (um contador e três histogramas).
+
+    python -m bench.metrics_overhead --number 1000000
+"""
+import argparse
+import json
+import random
+import timeit
+from bench.common import configure_env
+
+
+def run(args) -> dict:
+    from metrics import Counter, Histogram, LATENCY_BUCKETS
+
+    counter = Counter("bench_total", "bench", ("method", "route", "status"))
+    histogram = Histogram("bench_seconds", "bench", LATENCY_BUCKETS, ("method", "route"))
+    key = ("GET", "/clientes")
+    status_key = ("GET", "/clientes", 200)
+    values = [random.expovariate(20) for _ in range(1024)]
+    counter.inc(status_key)
+    histogram.observe(0.01, key)
+
+    def request_end():
+        counter.inc(status_key)
+        histogram.observe(values[0], key)
+        histogram.observe(values[1], key)
+        histogram.observe(3, key)
+
+    timings = {
+        "counter_inc": lambda: counter.inc(status_key),
+        "histogram_observe": lambda: histogram.observe(values[7], key),
+        "request_end_4_updates": request_end,
+    }
+    result = {}
+    for name, fn in timings.items():
+        best = min(timeit.repeat(fn, number=args.number, repeat=args.repeat))
+        result[f"{name}_ns"] = round(best / args.number * 1e9, 1)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=1_000_000, help="Chamadas por medida")
+    parser.add_argument("--repeat", type=int, default=5, help="Repetições (vale a melhor)")
+    args = parser.parse_args()
+
+    configure_env()
+    print(json.dumps(run(args), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Verifica os orçamentos de queries (query_budget.py) com o cache de usuários frio.
+
+Roda o app com QUERY_BUDGET_STRICT=true e chama cada rota que declara um
+orçamento, limpando o cache de principais (auth/principal.py) antes de cada
+requisição: a autenticação passa a custar a consulta em `usuarios`, o pior caso
+que todo orçamento precisa comportar (o "+1" de cada rota). Falha (código de
+saída 1) se alguma rota responder 500 por exceder o orçamento.
+
+    python -m bench.query_budget_check
+    DATABASE_URL=postgresql://... python -m bench.query_budget_check
+"""
+import argparse
+import asyncio
+import json
+import sys
+import uuid
+from bench.common import configure_env
+
+ENDERECO = {"rua": "Rua das Flores", "numero": "10", "bairro": "Centro", "cidade": "Curitiba", "estado": "PR", "cep": "80000-000"}
+
+
+def _routes(ids: dict) -> list:
+    """(método, caminho, corpo JSON) de cada rota com orçamento declarado."""
+    cliente, dev, projeto, item = ids["clientes"][0], ids["desenvolvedores"][0], ids["projetos"][0], ids["infra"][0]
+    novo_cliente = {"nome": "Cliente Orçamento", "email": f"orcamento-{uuid.uuid4().hex[:8]}@example.com",
+                    "status_relacionamento": "ativo", "endereco_obj": ENDERECO}
+    novo_dev = {"nome": "Dev Orçamento", "email": f"dev-{uuid.uuid4().hex[:8]}@example.com", "documento_fiscal": "1",
+                "endereco_obj": ENDERECO}
+    projeto_body = {"titulo": "Projeto Orçamento", "escopo": "Escopo", "status_projeto": "ativo", "id_cliente": str(cliente),
+                    "id_desenvolvedor": str(dev)}
+    item_body = {"tipo_item": "servidor", "descricao": "Item Orçamento", "referencia_senha": "segredo",
+                 "id_cliente": str(cliente), "id_desenvolvedor": str(dev), "id_servico": str(projeto)}
+    return [
+        ("GET", "/clientes", None),
+        ("GET", f"/clientes/{cliente}", None),
+        ("POST", "/clientes", novo_cliente),
+        ("PUT", f"/clientes/{cliente}", {**novo_cliente, "email": f"put-{uuid.uuid4().hex[:8]}@example.com"}),
+        ("GET", "/desenvolvedores", None),
+        ("GET", f"/desenvolvedores/{dev}", None),
+        ("POST", "/desenvolvedores", novo_dev),
+        ("PUT", f"/desenvolvedores/{dev}", {**novo_dev, "email": f"put-{uuid.uuid4().hex[:8]}@example.com"}),
+        ("PUT", f"/enderecos/{ids['enderecos'][0]}", ENDERECO),
+        ("GET", "/projetos", None),
+        ("GET", f"/projetos/{projeto}", None),
+        ("POST", "/projetos", projeto_body),
+        ("PUT", f"/projetos/{projeto}", projeto_body),
+        ("GET", "/infra", None),
+        ("GET", "/infra/expiring", None),
+        ("GET", f"/infra/{item}", None),
+        ("POST", "/infra", item_body),
+        ("PUT", f"/infra/{item}", item_body),
+        ("POST", "/infra/decrypt", {"ids": [str(item_id) for item_id in ids["infra"][:5]]}),
+        ("POST", "/infra/decrypt", {"id_servico": str(projeto)}),
+        ("GET", "/dashboard/summary", None),
+        ("GET", "/search", None),
+        ("DELETE", f"/desenvolvedores/{dev}", None),  # 409 (tem itens): o orçamento vale igual
+        ("DELETE", f"/clientes/{cliente}", None),
+        ("DELETE", "/clientes", {"ids": [str(cliente_id) for cliente_id in ids["clientes"][1:4]]}),
+    ]
+
+
+async def run(args) -> dict:
+    from auth.principal import principal_cache
+    from bench.common import app_client, create_user, seed_tenant
+    from database import SessionLocal, engine
+    from query_budget import assert_max_queries
+
+    client = await app_client()
+    async with client:
+        headers = await create_user(client, f"bench_budget_{uuid.uuid4().hex[:8]}", "senha-bench")
+        me = (await client.get("/auth/me", headers=headers)).json()
+        async with SessionLocal() as db:
+            ids = await seed_tenant(db, uuid.UUID(me["id_usuario"]), args.rows)
+
+        checks = []
+        for method, path, body in _routes(ids):
+            params = {"q": "Aurora"} if path == "/search" else None
+            principal_cache.clear()
+            with assert_max_queries(1000) as counter:
+                response = await client.request(method, path, headers=headers, json=body, params=params)
+            checks.append({
+                "route": f"{method} {path}",
+                "status": response.status_code,
+                "queries": counter.count,
+                "ok": response.status_code < 500,
+                "detail": response.text[:200] if response.status_code >= 500 else None,
+            })
+    await engine.dispose()
+    return {
+        "dialect": engine.dialect.name,
+        "routes": len(checks),
+        "failed": sum(not check["ok"] for check in checks),
+        "checks": checks if args.verbose else [check for check in checks if not check["ok"]],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20, help="Clientes/projetos do usuário de teste")
+    parser.add_argument("--verbose", action="store_true", help="Inclui todas as rotas, não só as que falharam")
+    args = parser.parse_args()
+
+    configure_env(QUERY_BUDGET_STRICT="true")
+    result = asyncio.run(run(args))
+    print(json.dumps(result, indent=2, ensure_ascii=False, default=str))
+    sys.exit(1 if result["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
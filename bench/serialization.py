@@ -0,0 +1,156 @@
+"""Vazão da serialização das listagens: caminho padrão do FastAPI x FAST_JSON_RESPONSES.
+
+Monta objetos ORM transitórios (com os relacionamentos exibidos pelos schemas
+de leitura) e mede, para cada entidade e tamanho de lista:
+
+- `fastapi`: validação do response_model, dump_python(mode="json") e
+  JSONResponse (json.dumps), como o FastAPI faz por padrão;
+- `fast`: routers.serialization.dump_list_json (schema de saída sem revalidar
+  e-mails, TypeAdapter pré-compilado e JSON gerado no pydantic-core);
+- `orjson`: validação padrão + orjson.dumps, se o orjson estiver instalado.
+
+Também confere que `fast` produz exatamente os mesmos bytes que `fastapi`.
+
+    python -m bench.serialization --rows 1000 10000 --repeat 5
+"""
+import argparse
+import gc
+import json
+import time
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+from bench.common import configure_env
+
+MASK = "*** CRIPTOGRAFADO ***"
+
+
+def _endereco(i):
+    from models.endereco import EnderecoModel
+    return EnderecoModel(
+        id_endereco=uuid.uuid4(), rua=f"Rua {i}", numero=str(i), complemento=None, bairro="Centro",
+        cidade="São Paulo", estado="SP", cep="01000-000",
+    )
+
+
+def build_rows(entity: str, count: int) -> list:
+    """Objetos ORM transitórios equivalentes aos carregados pelas rotas de listagem."""
+    from models.cliente import ClienteModel
+    from models.desenvolvedor import DesenvolvedorModel
+    from models.itens_infraestrutura import InfraestruturaItemModel
+    from models.servico_projeto import ServicoProjetoModel
+
+    now = datetime(2025, 1, 1, 12, 0, 0)
+    rows = []
+    for i in range(count):
+        endereco = _endereco(i)
+        cliente = ClienteModel(
+            id_cliente=uuid.uuid4(), id_endereco=endereco.id_endereco, endereco_obj=endereco,
+            nome=f"Cliente {i} Ltda", email=f"cliente{i}@example.com", telefone="+55 11 99999-0000",
+            pessoa_contato="Fulano", documento_fiscal=f"{i:014d}", segmento="varejo",
+            status_relacionamento="ativo", origem="indicação", observacoes=None, data_criacao=now,
+        )
+        if entity == "clientes":
+            rows.append(cliente)
+            continue
+        dev = DesenvolvedorModel(
+            id_desenvolvedor=uuid.uuid4(), id_endereco=endereco.id_endereco, endereco_obj=endereco,
+            nome=f"Dev {i}", email=f"dev{i}@example.com", telefone=None, documento_fiscal=f"{i:011d}",
+            tipo_contrato="PJ", taxa_horaria=Decimal("150.50"), data_criacao=now,
+        )
+        if entity == "desenvolvedores":
+            rows.append(dev)
+            continue
+        projeto = ServicoProjetoModel(
+            id_servico=uuid.uuid4(), id_cliente=cliente.id_cliente, id_desenvolvedor=dev.id_desenvolvedor,
+            cliente=cliente, desenvolvedor=dev, titulo=f"Projeto {i}", escopo="Escopo " * 20,
+            status_projeto="ativo", data_inicio=now, data_limite=now + timedelta(days=90),
+            orcamento=Decimal("12345.67"), notas_internas=None,
+        )
+        if entity == "projetos":
+            rows.append(projeto)
+            continue
+        rows.append(InfraestruturaItemModel(
+            id_item=uuid.uuid4(), id_cliente=cliente.id_cliente, id_desenvolvedor=dev.id_desenvolvedor,
+            id_servico=projeto.id_servico, projeto=projeto, tipo_item="database",
+            descricao=f"Banco {i}", url_acesso=f"postgres://db{i}.example.com", usuario="admin",
+            referencia_senha=MASK, is_critico=i % 3 == 0, data_expiracao=now + timedelta(days=i % 365),
+            notas_acesso="VPN obrigatória",
+        ))
+    return rows
+
+
+def _time(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(args) -> list:
+    from typing import List
+    from fastapi.responses import JSONResponse
+    from pydantic import TypeAdapter
+    from models.cliente import ClienteRead
+    from models.desenvolvedor import DesenvolvedorRead
+    from models.itens_infraestrutura import InfraestruturaRead
+    from models.servico_projeto import ServicoProjetoRead
+    from routers.serialization import dump_list_json
+    try:
+        import orjson
+    except ImportError:
+        orjson = None
+
+    schemas = {
+        "clientes": ClienteRead,
+        "desenvolvedores": DesenvolvedorRead,
+        "projetos": ServicoProjetoRead,
+        "infra": InfraestruturaRead,
+    }
+    results = []
+    for entity in args.entities:
+        schema = schemas[entity]
+        adapter = TypeAdapter(List[schema])
+        for count in args.rows:
+            rows = build_rows(entity, count)
+
+            def default_path():
+                validated = adapter.validate_python(rows, from_attributes=True)
+                return JSONResponse(adapter.dump_python(validated, mode="json", by_alias=True)).body
+
+            paths = {"fastapi": default_path, "fast": lambda: dump_list_json(schema, rows)}
+            if orjson is not None:
+                paths["orjson"] = lambda: orjson.dumps(
+                    adapter.dump_python(adapter.validate_python(rows, from_attributes=True), mode="json", by_alias=True)
+                )
+
+            identical = default_path() == dump_list_json(schema, rows)
+            timings = {name: _time(fn, args.repeat) for name, fn in paths.items()}
+            results.append({
+                "entity": entity,
+                "rows": count,
+                "identical_bytes": identical,
+                **{f"{name}_ms": round(seconds * 1000, 1) for name, seconds in timings.items()},
+                **{f"{name}_rows_per_s": int(count / seconds) for name, seconds in timings.items()},
+                "speedup": round(timings["fastapi"] / timings["fast"], 2),
+            })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000], help="Tamanhos de lista medidos")
+    parser.add_argument("--repeat", type=int, default=5, help="Repetições por medida (vale a melhor)")
+    parser.add_argument("--entities", nargs="+", default=["clientes", "desenvolvedores", "projetos", "infra"],
+                        choices=["clientes", "desenvolvedores", "projetos", "infra"])
+    args = parser.parse_args()
+
+    configure_env()
+    print(json.dumps(run(args), indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -17,4 +17,99 @@ ENABLE_DOCS = os.environ.get("ENABLE_DOCS", "false").lower() in ("true", "1", "y
 if ENCRYPTION_KEY is not None and len(ENCRYPTION_KEY) != 44:
 	# don't raise here to avoid breaking simple scripts, but warn in logs when used
 	# callers that require a valid Fernet key should validate explicitly
-	pass
\ No newline at end of file
+	pass
+
+# --- SCHEMA DO BANCO ---
+# Na inicialização o worker só confere a versão do schema (uma consulta). Com
+# SCHEMA_AUTO_MIGRATE (padrão em desenvolvimento) um schema desatualizado é
+# criado/atualizado ali mesmo; desativado, o worker não sobe até que
+# `python -m migrations.schema` seja executado
+SCHEMA_AUTO_MIGRATE = os.environ.get("SCHEMA_AUTO_MIGRATE", "true" if DEBUG else "false").lower() in ("true", "1", "yes")
+
+# --- PARTICIONAMENTO (SOMENTE POSTGRESQL) ---
+# Número de partições por hash de user_id de servicos_projetos e itens_infraestrutura
+# (0 = tabelas comuns). Em bancos existentes, alterar o valor exige
+# `python -m migrations.partitions`, que recria as tabelas (janela de manutenção)
+DB_HASH_PARTITIONS = int(os.environ.get("DB_HASH_PARTITIONS", "0"))
+
+# --- ROTAÇÃO DA CHAVE DE CRIPTOGRAFIA ---
+# Chaves anteriores (separadas por vírgula), aceitas só para decifrar enquanto
+# `python -m migrations.rotate_key` re-criptografa as senhas com a ENCRYPTION_KEY
+ENCRYPTION_OLD_KEYS = [key.strip() for key in os.environ.get("ENCRYPTION_OLD_KEYS", "").split(",") if key.strip()]
+KEY_ROTATION_BATCH_SIZE = int(os.environ.get("KEY_ROTATION_BATCH_SIZE", "500"))
+KEY_ROTATION_ROWS_PER_SECOND = float(os.environ.get("KEY_ROTATION_ROWS_PER_SECOND", "1000"))  # 0 = sem limite
+
+# --- POOL DE CONEXÕES DO BANCO ---
+# Dimensione DB_POOL_SIZE + DB_MAX_OVERFLOW pela concorrência de cada worker
+# e pelo limite de conexões do PostgreSQL dividido pelo número de workers
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", "1800"))  # segundos; -1 desativa
+DB_POOL_PRE_PING = os.environ.get("DB_POOL_PRE_PING", "true").lower() in ("true", "1", "yes")
+DB_POOL_USE_LIFO = os.environ.get("DB_POOL_USE_LIFO", "false").lower() in ("true", "1", "yes")
+
+# --- RÉPLICAS DE LEITURA ---
+# Uma ou mais URLs (separadas por vírgula) de réplicas somente leitura. GET/HEAD
+# leem de uma réplica; escritas, e as leituras de quem acabou de escrever durante
+# REPLICA_STICKY_SECONDS, usam o primário. Réplicas com atraso acima de
+# REPLICA_MAX_LAG_SECONDS (checado a cada REPLICA_CHECK_INTERVAL, 0 desativa) ou
+# que falharem ao conectar saem do rodízio (estas por REPLICA_RETRY_SECONDS)
+DATABASE_REPLICA_URLS = [url.strip() for url in os.environ.get("DATABASE_REPLICA_URL", "").split(",") if url.strip()]
+REPLICA_STICKY_SECONDS = float(os.environ.get("REPLICA_STICKY_SECONDS", "10"))
+REPLICA_MAX_LAG_SECONDS = float(os.environ.get("REPLICA_MAX_LAG_SECONDS", "5"))
+REPLICA_CHECK_INTERVAL = float(os.environ.get("REPLICA_CHECK_INTERVAL", "2"))
+REPLICA_RETRY_SECONDS = float(os.environ.get("REPLICA_RETRY_SECONDS", "30"))
+REPLICA_CONNECT_TIMEOUT = float(os.environ.get("REPLICA_CONNECT_TIMEOUT", "2"))
+
+# --- CACHE DE USUÁRIOS AUTENTICADOS ---
+# TTL curto: cada worker tem seu próprio cache e só invalida as alterações feitas nele
+PRINCIPAL_CACHE_TTL = float(os.environ.get("PRINCIPAL_CACHE_TTL", "60"))  # segundos
+PRINCIPAL_CACHE_SIZE = int(os.environ.get("PRINCIPAL_CACHE_SIZE", "10000"))  # 0 desativa
+
+# --- HASHING DE SENHAS (BCRYPT) ---
+# Processos dedicados ao bcrypt (0 = threadpool do próprio worker) e tamanho máximo
+# da fila de logins aguardando; acima disso o login responde 503
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", str(min(2, os.cpu_count() or 1))))
+PASSWORD_HASH_MAX_QUEUE = int(os.environ.get("PASSWORD_HASH_MAX_QUEUE", "32"))
+
+# --- IMPORTAÇÃO EM LOTE ---
+# Registros por transação (cada lote vira um INSERT em lote por tabela)
+BULK_IMPORT_CHUNK_SIZE = int(os.environ.get("BULK_IMPORT_CHUNK_SIZE", "500"))
+BULK_IMPORT_MAX_ROWS = int(os.environ.get("BULK_IMPORT_MAX_ROWS", "50000"))
+
+# --- EXPORTAÇÃO ---
+# Linhas buscadas por vez do cursor no servidor (memória constante por exportação)
+EXPORT_BATCH_SIZE = int(os.environ.get("EXPORT_BATCH_SIZE", "1000"))
+
+# --- ORÇAMENTO DE QUERIES POR REQUISIÇÃO ---
+# Quando ativo, um endpoint que exceder seu orçamento de queries responde 500
+# (útil em testes/CI). Desativado, o excesso é apenas registrado em log.
+QUERY_BUDGET_STRICT = os.environ.get("QUERY_BUDGET_STRICT", "false").lower() in ("true", "1", "yes")
+
+# --- SERIALIZAÇÃO DAS LISTAGENS ---
+# Quando ativo, as listagens validam os objetos com TypeAdapters pré-compilados e
+# geram o JSON direto no pydantic-core, sem o dict intermediário e o json.dumps
+FAST_JSON_RESPONSES = os.environ.get("FAST_JSON_RESPONSES", "false").lower() in ("true", "1", "yes")
+
+# --- COMPRESSÃO DAS RESPOSTAS ---
+# gzip nas respostas da API a partir de RESPONSE_GZIP_MIN_SIZE bytes (abaixo disso
+# o ganho não paga a CPU). O dashboard é servido com as variantes pré-comprimidas.
+RESPONSE_GZIP_ENABLED = os.environ.get("RESPONSE_GZIP_ENABLED", "true").lower() in ("true", "1", "yes")
+RESPONSE_GZIP_MIN_SIZE = int(os.environ.get("RESPONSE_GZIP_MIN_SIZE", "1024"))
+RESPONSE_GZIP_LEVEL = int(os.environ.get("RESPONSE_GZIP_LEVEL", "5"))
+
+# --- MÉTRICAS (PROMETHEUS) ---
+# Expõe /metrics e mede cada requisição. /metrics e os diagnósticos /health/* exigem
+# `Authorization: Bearer <METRICS_TOKEN>`; sem ele só respondem com ENVIRONMENT=development
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "true").lower() in ("true", "1", "yes")
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN") or None
+
+# --- TRILHA DE AUDITORIA ---
+# Eventos (decrypt e escritas) vão para uma fila em memória de até AUDIT_QUEUE_SIZE
+# itens, gravada em lote em `audit_log` a cada AUDIT_BATCH_SIZE eventos ou
+# AUDIT_FLUSH_INTERVAL segundos; com a fila cheia o evento é descartado (e contado)
+AUDIT_ENABLED = os.environ.get("AUDIT_ENABLED", "true").lower() in ("true", "1", "yes")
+AUDIT_QUEUE_SIZE = int(os.environ.get("AUDIT_QUEUE_SIZE", "10000"))
+AUDIT_BATCH_SIZE = int(os.environ.get("AUDIT_BATCH_SIZE", "500"))
+AUDIT_FLUSH_INTERVAL = float(os.environ.get("AUDIT_FLUSH_INTERVAL", "1"))
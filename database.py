@@ -1,7 +1,20 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.orm import DeclarativeBase
-from config import DATABASE_URL
+from fastapi import Request
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import DeclarativeBase, Session
+from config import (
+    DATABASE_URL,
+    DATABASE_REPLICA_URLS,
+    REPLICA_CONNECT_TIMEOUT,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE,
+    DB_POOL_PRE_PING,
+    DB_POOL_USE_LIFO,
+)
+from pool_metrics import InstrumentedAsyncQueuePool, instrument_pool
+from replicas import REPLICA_KEY, USE_PRIMARY, ReplicaSet
 
 # --- CONFIGURAÇÃO SQLALCHEMY ---
 class Base(DeclarativeBase):
@@ -9,50 +22,134 @@ class Base(DeclarativeBase):
     pass
 
 
-# Engine de conexão (Sincrona)
-# check_same_thread é exclusivo do SQLite — não enviar para PostgreSQL
-_engine_kwargs = {"echo": False}
-if DATABASE_URL and DATABASE_URL.startswith("sqlite"):
-    _engine_kwargs["connect_args"] = {"check_same_thread": False}
+# Drivers assíncronos usados para cada dialeto (a DATABASE_URL pode vir no formato síncrono)
+_ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+
+def to_async_url(database_url: str):
+    """Converte a DATABASE_URL para o driver assíncrono equivalente (asyncpg/aiosqlite)."""
+    url = make_url(database_url)
+    drivername = _ASYNC_DRIVERS.get(url.drivername, url.drivername)
+    url = url.set(drivername=drivername)
+    # asyncpg não entende o parâmetro `sslmode` da libpq; o equivalente é `ssl`
+    if drivername == "postgresql+asyncpg" and "sslmode" in url.query:
+        url = url.update_query_dict({"ssl": url.query["sslmode"]}).difference_update_query(["sslmode"])
+    return url
+
+
+def build_engine_kwargs(database_url: str, connect_timeout: float = None) -> dict:
+    """Argumentos da engine: pool configurável via config.py (exceto SQLite em memória)."""
+    kwargs = {"echo": False}
+    # check_same_thread é exclusivo do SQLite — não enviar para PostgreSQL
+    if database_url.startswith("sqlite"):
+        kwargs["connect_args"] = {"check_same_thread": False}
+        if make_url(database_url).database in (None, "", ":memory:"):
+            return kwargs  # StaticPool padrão: uma única conexão compartilhada
+    elif connect_timeout:
+        kwargs["connect_args"] = {"timeout": connect_timeout}  # asyncpg: falha rápido numa réplica fora do ar
+
+    kwargs.update(
+        poolclass=InstrumentedAsyncQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+        pool_use_lifo=DB_POOL_USE_LIFO,
+    )
+    return kwargs
+
+
+# Engine de conexão (Assíncrona)
+engine = create_async_engine(to_async_url(DATABASE_URL), **build_engine_kwargs(DATABASE_URL))
+if isinstance(engine.pool, InstrumentedAsyncQueuePool):
+    instrument_pool(engine.pool)
 
-engine = create_engine(DATABASE_URL, **_engine_kwargs)
+# Réplicas de leitura (opcionais, ver replicas.py), com o mesmo pool do primário
+replica_engines = [
+    create_async_engine(to_async_url(url), **build_engine_kwargs(url, REPLICA_CONNECT_TIMEOUT))
+    for url in DATABASE_REPLICA_URLS
+]
+for replica_engine in replica_engines:
+    if isinstance(replica_engine.pool, InstrumentedAsyncQueuePool):
+        instrument_pool(replica_engine.pool)
+replica_set = ReplicaSet(replica_engines)
 
-SessionLocal = sessionmaker(
+
+class RoutingSession(Session):
+    """Sessão que manda os SELECTs para a réplica escolhida pela requisição.
+
+    Sem réplica em `info` (escritas, leituras de quem acabou de escrever, réplicas
+    indisponíveis) tudo vai para o primário, como antes; com ela, flush, DML e
+    SELECTs marcados com `use_primary` continuam no primário.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        replica = self.info.get(REPLICA_KEY)
+        if (
+            replica is not None
+            and not self._flushing
+            and getattr(clause, "is_select", False)
+            and not clause.get_execution_options().get(USE_PRIMARY)
+        ):
+            return replica.engine.sync_engine
+        return super().get_bind(mapper, clause=clause, **kw)
+
+
+SessionLocal = async_sessionmaker(
     bind=engine,
-    autocommit=False,
     autoflush=False,
     expire_on_commit=False,
-    class_=Session
+    class_=AsyncSession,
+    sync_session_class=RoutingSession,
 )
 
 
-def get_db():
-    """Fornece uma sessão do banco de dados para as rotas do FastAPI."""
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+async def get_db(request: Request):
+    """Fornece uma sessão assíncrona do banco de dados para as rotas do FastAPI.
 
+    Em leituras (GET/HEAD) com réplicas configuradas, os SELECTs da sessão vão
+    para uma réplica saudável; ver replicas.py.
+    """
+    async with SessionLocal() as db:
+        if replica_set:
+            await replica_set.route(db, request)
+        yield db
 
-def init_db():
-    """Importa os módulos de modelos e cria as tabelas no banco se não existirem.
 
-    Ao importar explicitamente os módulos que definem os modelos, garantimos que
-    as classes estão registradas em `Base.metadata` antes de chamar
-    `create_all`.
-    """
-    # Importar módulos que declaram modelos para registrá-los em Base.metadata
+def import_models():
+    """Importa os módulos que declaram modelos para registrá-los em Base.metadata."""
     try:
+        import models.auditoria
         import models.cliente
         import models.desenvolvedor
         import models.endereco
         import models.itens_infraestrutura
+        import models.rotacao_chave
         import models.servico_projeto
         import models.usuario
+        import models.versao
     except Exception:
         # Import silencioso: se algum modelo não existir, ainda tentamos criar o restante
         pass
 
+
+async def init_db():
+    """Importa os módulos de modelos e cria as tabelas no banco se não existirem.
+
+    Ao importar explicitamente os módulos que definem os modelos, garantimos que
+    as classes estão registradas em `Base.metadata` antes de chamar
+    `create_all`. Índices novos em tabelas já existentes não são criados aqui;
+    use `python -m migrations.indexes`.
+    """
+    import_models()
+
     # Cria as tabelas declarativas que ainda não existem
-    Base.metadata.create_all(bind=engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
@@ -0,0 +1,77 @@
+"""Versão por usuário e tabela, incrementada a cada transação que altera os dados.
+
+As rotas de leitura derivam seus ETags dessas versões (routers/conditional.py),
+então descobrir se uma listagem mudou custa uma consulta à chave primária de
+`versoes_entidades`, sem carregar as linhas.
+
+- Escritas pelo ORM (`db.add`, `db.delete`, alterações de atributos) são
+  detectadas automaticamente no flush.
+- DML direto (`insert(...)`, `update(...)`, `delete(...)` via `db.execute`) não
+  passa pelo flush: chame `touch(db, user_id, tabela, ...)` na mesma transação.
+
+Os incrementos pendentes são gravados num único UPSERT logo antes do commit,
+na mesma transação das alterações: um rollback descarta os dois juntos.
+"""
+from sqlalchemy import event, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from models.versao import VersaoEntidadeModel
+
+_PENDING_KEY = "entity_versions_pending"
+
+
+def _pending(session) -> set:
+    return session.info.setdefault(_PENDING_KEY, set())
+
+
+def touch(db, user_id, *tables: str):
+    """Marca as tabelas do usuário como alteradas na transação corrente (para DML direto)."""
+    _pending(db).update((user_id, table) for table in tables)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_flushed(session, flush_context):
+    pending = _pending(session)
+    for obj in (*session.new, *session.deleted, *session.dirty):
+        user_id = getattr(obj, "user_id", None)
+        if user_id is None or obj in session.dirty and not session.is_modified(obj, include_collections=False):
+            continue
+        pending.add((user_id, obj.__table__.name))
+
+
+@event.listens_for(Session, "before_commit")
+def _bump_versions(session):
+    if session.in_nested_transaction():
+        return
+    session.flush()  # o flush do commit acontece depois deste evento
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    connection = session.connection()
+    dialect_insert = postgresql.insert if connection.dialect.name == "postgresql" else sqlite.insert
+    table = VersaoEntidadeModel.__table__
+    # Ordem fixa das linhas: transações concorrentes do mesmo usuário não entram em deadlock
+    rows = [{"user_id": user_id, "entidade": name, "versao": 1} for user_id, name in sorted(pending, key=lambda p: (str(p[0]), p[1]))]
+    statement = dialect_insert(table).values(rows)
+    connection.execute(statement.on_conflict_do_update(
+        index_elements=[table.c.user_id, table.c.entidade],
+        set_={"versao": table.c.versao + 1},
+    ))
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending(session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop(_PENDING_KEY, None)
+
+
+async def read_versions(db, user_id, tables) -> dict:
+    """Versões atuais das tabelas do usuário (0 para as que nunca foram alteradas)."""
+    result = await db.execute(
+        select(VersaoEntidadeModel.entidade, VersaoEntidadeModel.versao).where(
+            VersaoEntidadeModel.user_id == user_id,
+            VersaoEntidadeModel.entidade.in_(tables),
+        )
+    )
+    versions = dict(result.all())
+    return {table: versions.get(table, 0) for table in tables}
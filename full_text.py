@@ -0,0 +1,98 @@
+"""Busca textual: índice GIN sobre tsvector (PostgreSQL) ou tabela FTS5 (SQLite).
+
+Cada modelo pesquisável declara suas colunas com `search_index(...)` em
+`__table_args__`:
+
+- PostgreSQL: índice GIN de expressão sobre `to_tsvector('simple', ...)`,
+  mantido pelo próprio banco a cada escrita. Em bancos existentes ele é criado
+  por `python -m migrations.indexes`, como os demais índices.
+- SQLite: tabela virtual FTS5 de conteúdo externo (`<tabela>_fts`) mantida por
+  triggers, criada e populada pelo `init_db`. O vínculo é pelo rowid; após um
+  VACUUM, recrie-a com `INSERT INTO <tabela>_fts(<tabela>_fts) VALUES('rebuild')`.
+
+A configuração `simple` não aplica stemming nem stopwords, o que combina com o
+conteúdo pesquisado (nomes, e-mails, documentos, URLs). Cada termo da busca é
+tratado como prefixo e todos precisam ocorrer.
+"""
+import re
+from sqlalchemy import Index, column, event, func, literal_column, select, table
+from database import Base
+
+SEARCH_CONFIG = "simple"
+MAX_TERMS = 8
+
+# Colunas pesquisáveis por tabela, registradas por search_index()
+_searchable = {}
+
+
+def search_terms(q: str) -> list:
+    """Quebra a busca em termos alfanuméricos (descarta operadores e pontuação)."""
+    return re.findall(r"\w+", q.lower())[:MAX_TERMS]
+
+
+def search_document(*columns):
+    """Expressão tsvector das colunas (idêntica no índice e nas queries)."""
+    document = func.coalesce(columns[0], literal_column("''"))
+    for col in columns[1:]:
+        document = document.concat(literal_column("' '")).concat(func.coalesce(col, literal_column("''")))
+    return func.to_tsvector(literal_column(f"'{SEARCH_CONFIG}'::regconfig"), document)
+
+
+def search_index(table_name: str, name: str, *columns):
+    """Índice GIN (somente PostgreSQL) e registro das colunas para o FTS5 do SQLite."""
+    _searchable[table_name] = columns
+    return Index(name, search_document(*columns), postgresql_using="gin").ddl_if(dialect="postgresql")
+
+
+def search_select(model, *result_columns, terms: list, dialect_name: str):
+    """SELECT das linhas de `model` que contêm todos os termos, com a coluna `score` (maior = melhor).
+
+    Filtro por usuário, ordenação e paginação ficam por conta do chamador.
+    """
+    table_name = model.__tablename__
+    if dialect_name == "postgresql":
+        document = search_document(*_searchable[table_name])
+        query = func.to_tsquery(
+            literal_column(f"'{SEARCH_CONFIG}'::regconfig"),
+            " & ".join(f"{term}:*" for term in terms),
+        )
+        return select(*result_columns, func.ts_rank(document, query).label("score")).where(document.op("@@")(query))
+
+    fts = table(f"{table_name}_fts", column("rowid"))
+    fts_ref = literal_column(fts.name)
+    return (
+        select(*result_columns, (-func.bm25(fts_ref)).label("score"))
+        .join_from(model, fts, fts.c.rowid == literal_column(f"{table_name}.rowid"))
+        .where(fts_ref.op("MATCH")(" ".join(f'"{term}"*' for term in terms)))
+    )
+
+
+def _fts5_statements(table_name: str, names: list) -> list:
+    fts = f"{table_name}_fts"
+    cols = ", ".join(names)
+    new_values = ", ".join(f"new.{name}" for name in names)
+    old_values = ", ".join(f"old.{name}" for name in names)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({cols}, content='{table_name}', content_rowid='rowid')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table_name} BEGIN "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.rowid, {new_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table_name} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.rowid, {old_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {table_name} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.rowid, {old_values}); "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.rowid, {new_values}); END",
+    ]
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _install_sqlite_fts(target, connection, **kw):
+    """Cria (se faltarem) as tabelas FTS5 e seus triggers, populando as recém-criadas."""
+    if connection.dialect.name != "sqlite":
+        return
+    for table_name, columns in _searchable.items():
+        fts = f"{table_name}_fts"
+        exists = connection.exec_driver_sql("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (fts,)).first()
+        for statement in _fts5_statements(table_name, [col.name for col in columns]):
+            connection.exec_driver_sql(statement)
+        if not exists:
+            connection.exec_driver_sql(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
@@ -1,18 +1,33 @@
 # main.py
-from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, RedirectResponse
+from fastapi import Depends, FastAPI, Request
+from fastapi.responses import PlainTextResponse, RedirectResponse
 from fastapi.middleware.cors import CORSMiddleware
-from config import DATABASE_URL, ENCRYPTION_KEY, DEBUG, ENABLE_DOCS
+from fastapi.middleware.gzip import GZipMiddleware
+from config import (
+    DATABASE_URL, ENCRYPTION_KEY, DEBUG, ENABLE_DOCS, METRICS_ENABLED,
+    RESPONSE_GZIP_ENABLED, RESPONSE_GZIP_MIN_SIZE, RESPONSE_GZIP_LEVEL,
+)
 from routers import (
     cliente,
     desenvolvedor,
     endereco,
     servicos_projeto,
-    itens_infraestrutura
+    itens_infraestrutura,
+    export,
+    dashboard,
+    search
 )
 from routers import auth
-from database import init_db
+from database import engine, replica_set
+from migrations.schema import ensure_schema
+from pool_metrics import pool_status
+from auth.password_pool import password_pool
+from auth.diagnostics import require_diagnostics_token
+from query_budget import QueryBudgetMiddleware
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware, render_metrics
+from replicas import ReadYourWritesMiddleware
+from audit import audit_trail
+from static_assets import PrecompressedStaticFiles, admin_directory
 
 
 # Validação Crítica
@@ -34,8 +49,21 @@ app = FastAPI(
 
 
 @app.on_event("startup")
-def startup_event():
-    init_db()
+async def startup_event():
+    # Só confere a versão do schema; a migração é `python -m migrations.schema`
+    await ensure_schema()
+    # Atraso e disponibilidade das réplicas de leitura (se configuradas)
+    replica_set.start_monitor()
+    # Gravador em lote da trilha de auditoria
+    audit_trail.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    password_pool.shutdown()
+    # Grava os eventos de auditoria ainda na fila antes de fechar as conexões
+    await audit_trail.stop()
+    await replica_set.stop_monitor()
 
 
 # CORS
@@ -45,18 +73,38 @@ app.add_middleware(
     allow_credentials=True,         # Permite cookies de credenciais
     allow_methods=["*"],            # Permite todos os métodos (GET, POST, OPTIONS, etc.)
     allow_headers=["*"],            # Permite todos os cabeçalhos
+    expose_headers=["X-Next-Cursor", "ETag"],  # Cursor da próxima página e ETag das leituras
 )
 
+# Contagem de queries por requisição (orçamento declarado em cada rota)
+app.add_middleware(QueryBudgetMiddleware)
+
+# Leituras logo após uma escrita do mesmo cliente ficam no primário (só com réplicas)
+if replica_set:
+    app.add_middleware(ReadYourWritesMiddleware)
+
+# Compressão das respostas da API acima do limite (o dashboard já sai pré-comprimido)
+if RESPONSE_GZIP_ENABLED:
+    app.add_middleware(GZipMiddleware, minimum_size=RESPONSE_GZIP_MIN_SIZE, compresslevel=RESPONSE_GZIP_LEVEL)
+
+# Latência, status e tempo de banco por rota (mais externo: vê o status final)
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # Incluir routers
 app.include_router(cliente.router)
 app.include_router(desenvolvedor.router)
 app.include_router(endereco.router)
 app.include_router(servicos_projeto.router)
 app.include_router(itens_infraestrutura.router)
+app.include_router(export.router)
+app.include_router(dashboard.router)
+app.include_router(search.router)
 app.include_router(auth.router)
 
-# Serve arquivos estáticos da pasta `admin` em /admin
-app.mount("/admin", StaticFiles(directory="admin", html=True), name="admin")
+# Dashboard em /admin: o build de `python -m static_assets` (pré-comprimido, assets
+# com hash) ou, enquanto ele não existir, a pasta `admin` como está
+admin_files = PrecompressedStaticFiles(directory=admin_directory(), html=True)
 
 
 # Se alguém acessar / redireciona para /admin
@@ -65,12 +113,41 @@ def admin_index():
     return RedirectResponse("/admin/")
 
 
-# Rota alternativa para abrir o login
+# Rota alternativa para abrir o login (declarada antes do mount, que a encobriria)
 @app.get("/admin/login", include_in_schema=False)
-def admin_login():
-    return FileResponse("admin/index.html")
+async def admin_login(request: Request):
+    return await admin_files.get_response("index.html", request.scope)
+
+
+app.mount("/admin", admin_files, name="admin")
 
 
 @app.get("/health", tags=["Saúde"], summary="Verifica a saúde da API")
 def read_root():
-    return {"status": "OK", "message": "API GCI (FastAPI) está em execução."}
\ No newline at end of file
+    return {"status": "OK", "message": "API GCI (FastAPI) está em execução."}
+
+
+@app.get("/health/pool", tags=["Saúde"], summary="Métricas do pool de conexões do banco", dependencies=[Depends(require_diagnostics_token)])
+def read_pool_status():
+    return pool_status(engine)
+
+
+@app.get("/health/replicas", tags=["Saúde"], summary="Réplicas de leitura: disponibilidade, atraso e roteamento", dependencies=[Depends(require_diagnostics_token)])
+def read_replica_status():
+    return replica_set.status()
+
+
+@app.get("/health/audit", tags=["Saúde"], summary="Fila e gravação da trilha de auditoria", dependencies=[Depends(require_diagnostics_token)])
+def read_audit_status():
+    return audit_trail.stats()
+
+
+@app.get("/health/auth", tags=["Saúde"], summary="Fila de hashing de senhas (login)", dependencies=[Depends(require_diagnostics_token)])
+def read_password_pool_status():
+    return password_pool.stats()
+
+
+if METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False, dependencies=[Depends(require_diagnostics_token)])
+    async def read_metrics():
+        return PlainTextResponse(render_metrics(engine, password_pool, replica_set, audit_trail), media_type=METRICS_CONTENT_TYPE)
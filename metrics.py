@@ -0,0 +1,283 @@
+"""Métricas da aplicação no formato texto do Prometheus, expostas em /metrics.
+
+- Requisições HTTP por método, rota (o template do caminho, ex.: /clientes/{cliente_id})
+  e status, com histograma de latência.
+- Por requisição: quantidade de queries e tempo gasto no banco, atribuídos via
+  eventos before/after_cursor_execute do SQLAlchemy.
+- Duração de cada query SQL.
+- Lidas no momento da coleta: requisições em andamento, ocupação do threadpool
+  do AnyIO (rotas e dependências síncronas), pool de conexões e fila do bcrypt.
+
+Sem dependências externas. Cada atualização é uma busca em dict e um bisect sobre
+os limites dos buckets, sem locks: as requisições e os eventos do SQLAlchemy
+(engine assíncrona) rodam no event loop de cada processo. Os valores são por
+processo; com vários workers, colete cada um (ou agregue no Prometheus).
+"""
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+UNMATCHED_ROUTE = "<unmatched>"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Contador monotônico, com uma série por combinação de valores dos rótulos."""
+
+    def __init__(self, name: str, documentation: str, labels: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.values = {}
+
+    def inc(self, key: tuple = (), amount: float = 1):
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """Histograma com buckets fixos; cada série guarda as contagens por bucket e a soma."""
+
+    def __init__(self, name: str, documentation: str, buckets: tuple, labels: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self.series = {}
+
+    def observe(self, value: float, key: tuple = ()):
+        series = self.series.get(key)
+        if series is None:
+            # [contagem de cada bucket..., contagem acima do último (+Inf), soma]
+            series = self.series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for key, series in sorted(self.series.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), series):
+                cumulative += count
+                le = 'le="%s"' % _format_value(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {cumulative}")
+        return lines
+
+
+def _gauge(name: str, documentation: str, value) -> list:
+    return [f"# HELP {name} {documentation}", f"# TYPE {name} gauge", f"{name} {_format_value(value)}"]
+
+
+# --- MÉTRICAS REGISTRADAS ---
+HTTP_LABELS = ("method", "route")
+HTTP_REQUESTS = Counter("http_requests_total", "Requisições HTTP concluídas.", ("method", "route", "status"))
+HTTP_LATENCY = Histogram("http_request_duration_seconds", "Duração das requisições HTTP (até o fim do corpo).", LATENCY_BUCKETS, HTTP_LABELS)
+HTTP_DB_TIME = Histogram("http_request_db_seconds", "Tempo gasto em queries SQL por requisição.", LATENCY_BUCKETS, HTTP_LABELS)
+HTTP_QUERIES = Histogram("http_request_queries", "Queries SQL executadas por requisição.", QUERY_COUNT_BUCKETS, HTTP_LABELS)
+DB_QUERY_TIME = Histogram("db_query_duration_seconds", "Duração de cada query SQL (execução no cursor).", QUERY_BUCKETS)
+REGISTRY = (HTTP_REQUESTS, HTTP_LATENCY, HTTP_DB_TIME, HTTP_QUERIES, DB_QUERY_TIME)
+
+_in_flight = 0
+
+
+class RequestStats:
+    """Queries e tempo de banco acumulados pela requisição corrente."""
+    __slots__ = ("queries", "db_time")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+
+
+_current_request: ContextVar[Optional[RequestStats]] = ContextVar("metrics_request", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info["metrics_query_start"] = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _record_query(conn, cursor, statement, parameters, context, executemany):
+    start = conn.info.pop("metrics_query_start", None)
+    if start is None:
+        return
+    elapsed = time.perf_counter() - start
+    DB_QUERY_TIME.observe(elapsed)
+    stats = _current_request.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_time += elapsed
+
+
+class MetricsMiddleware:
+    """Middleware ASGI que mede cada requisição HTTP e atribui a ela as queries executadas.
+
+    Deve ser o middleware mais externo, para registrar o status realmente enviado.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        global _in_flight
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current_request.set(stats)
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        _in_flight += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            _in_flight -= 1
+            _current_request.reset(token)
+            route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+            key = (scope["method"], route)
+            HTTP_REQUESTS.inc((scope["method"], route, status_code))
+            HTTP_LATENCY.observe(elapsed, key)
+            HTTP_DB_TIME.observe(stats.db_time, key)
+            HTTP_QUERIES.observe(stats.queries, key)
+
+
+def _threadpool_lines() -> list:
+    import anyio.to_thread
+
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    statistics = limiter.statistics()
+    return [
+        *_gauge("threadpool_threads_max", "Capacidade do threadpool do AnyIO (rotas e dependências síncronas).", limiter.total_tokens),
+        *_gauge("threadpool_threads_busy", "Threads do threadpool em uso.", statistics.borrowed_tokens),
+        *_gauge("threadpool_tasks_waiting", "Chamadas síncronas aguardando uma thread livre.", statistics.tasks_waiting),
+    ]
+
+
+def _db_pool_lines(engine) -> list:
+    from pool_metrics import pool_status
+
+    status = pool_status(engine)
+    lines = []
+    for key in ("pool_size", "checked_out", "overflow"):
+        if key in status:
+            lines += _gauge(f"db_pool_{key}", f"Pool de conexões: {key}.", status[key])
+    metrics = getattr(engine.pool, "metrics", None)
+    if metrics is not None:
+        for name, documentation, value in (
+            ("db_pool_checkouts_total", "Conexões retiradas do pool.", metrics.checkouts),
+            ("db_pool_checkout_wait_seconds_total", "Tempo total aguardando uma conexão do pool.", metrics.checkout_wait_total),
+            ("db_pool_checkout_timeouts_total", "Esperas por conexão que estouraram o timeout.", metrics.checkout_timeouts),
+        ):
+            lines += [f"# HELP {name} {documentation}", f"# TYPE {name} counter", f"{name} {_format_value(value)}"]
+    return lines
+
+
+def _replica_lines(replica_set) -> list:
+    status = replica_set.status()
+    lines = [
+        "# HELP db_replica_up Réplica de leitura no rodízio (1) ou fora dele (0).",
+        "# TYPE db_replica_up gauge",
+        *(f'db_replica_up{{replica="{r["replica"]}"}} {int(r["available"])}' for r in status["replicas"]),
+        "# HELP db_replica_lag_seconds Atraso de replicação na última checagem.",
+        "# TYPE db_replica_lag_seconds gauge",
+        *(
+            f'db_replica_lag_seconds{{replica="{r["replica"]}"}} {_format_value(r["lag_seconds"])}'
+            for r in status["replicas"] if r["lag_seconds"] is not None
+        ),
+        "# HELP db_reads_total Leituras (GET/HEAD) por destino: réplica ou primário.",
+        "# TYPE db_reads_total counter",
+        f'db_reads_total{{target="replica"}} {status["reads_replica"]}',
+        f'db_reads_total{{target="primary"}} {status["reads_primary"]}',
+        "# HELP db_replica_fallbacks_total Leituras desviadas ao primário por falha ao conectar na réplica.",
+        "# TYPE db_replica_fallbacks_total counter",
+        f'db_replica_fallbacks_total {status["fallbacks"]}',
+    ]
+    return lines
+
+
+def _audit_lines(audit_trail) -> list:
+    stats = audit_trail.stats()
+    lines = [
+        *_gauge("audit_queue_depth", "Eventos de auditoria aguardando gravação.", stats["queued"]),
+        *_gauge("audit_queue_capacity", "Capacidade da fila de auditoria.", stats["capacity"]),
+        "# HELP audit_events_total Eventos de auditoria por destino (gravado, descartado com a fila cheia, falha na gravação).",
+        "# TYPE audit_events_total counter",
+        f'audit_events_total{{result="written"}} {stats["written"]}',
+        f'audit_events_total{{result="dropped"}} {stats["dropped"]}',
+        f'audit_events_total{{result="failed"}} {stats["failed"]}',
+    ]
+    for name, documentation, value in (
+        ("audit_flushes_total", "Lotes gravados em audit_log.", stats["flushes"]),
+        ("audit_flush_seconds_total", "Tempo total gravando lotes de auditoria.", audit_trail.flush_seconds_total),
+    ):
+        lines += [f"# HELP {name} {documentation}", f"# TYPE {name} counter", f"{name} {_format_value(value)}"]
+    return lines
+
+
+def _password_pool_lines(password_pool) -> list:
+    stats = password_pool.stats()
+    return [
+        *_gauge("password_hash_in_flight", "Hashes bcrypt em execução.", stats["in_flight"]),
+        *_gauge("password_hash_waiting", "Logins aguardando o pool do bcrypt.", stats["waiting"]),
+        "# HELP password_hash_rejected_total Logins recusados com 503 por fila cheia.",
+        "# TYPE password_hash_rejected_total counter",
+        f"password_hash_rejected_total {stats['rejected']}",
+    ]
+
+
+def render_metrics(engine=None, password_pool=None, replica_set=None, audit_trail=None) -> str:
+    """Todas as métricas no formato texto do Prometheus (chamar dentro do event loop)."""
+    lines = _gauge("http_requests_in_flight", "Requisições HTTP em andamento.", _in_flight)
+    for metric in REGISTRY:
+        lines += metric.render()
+    lines += _threadpool_lines()
+    if engine is not None:
+        lines += _db_pool_lines(engine)
+    if password_pool is not None:
+        lines += _password_pool_lines(password_pool)
+    if replica_set:
+        lines += _replica_lines(replica_set)
+    if audit_trail is not None and audit_trail.enabled:
+        lines += _audit_lines(audit_trail)
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,116 @@
+"""Aplica as regras ON DELETE declaradas nos modelos às FKs de bancos existentes.
+
+`create_all` só cria as FKs junto com tabelas novas. Em bancos já existentes
+esta migração recria, no PostgreSQL, cada FK cuja regra ON DELETE difere da do
+modelo (ex.: `servicos_projetos.id_cliente` -> CASCADE). A troca é feita em
+duas etapas para não bloquear a tabela durante a checagem das linhas: a nova FK
+entra como NOT VALID (DROP e ADD na mesma instrução, sem janela sem FK) e
+depois é validada com VALIDATE CONSTRAINT, que não bloqueia escritas. Tabelas
+particionadas (`partitioning.py`) não aceitam FK NOT VALID: nelas a FK é
+recriada e checada numa única instrução.
+
+No SQLite as FKs não podem ser alteradas sem recriar a tabela e, sem
+`PRAGMA foreign_keys`, não são aplicadas; as rotas removem os dependentes
+explicitamente, então ali a migração não faz nada.
+
+    python -m migrations.foreign_keys            # aplica
+    python -m migrations.foreign_keys --dry-run  # apenas lista o DDL
+"""
+import argparse
+import asyncio
+import logging
+from sqlalchemy import inspect, text
+from database import Base, engine, import_models
+from partitioning import PARTITIONED, PARTITIONED_TABLES
+
+logger = logging.getLogger(__name__)
+
+
+def _rule(ondelete) -> str:
+    return (ondelete or "NO ACTION").upper()
+
+
+def _existing_foreign_keys(sync_conn) -> dict:
+    """FKs existentes por (tabela, colunas) -> (nome, regra ON DELETE)."""
+    inspector = inspect(sync_conn)
+    tables = set(inspector.get_table_names())
+    existing = {}
+    for table in Base.metadata.sorted_tables:
+        if table.name not in tables:
+            continue
+        for fk in inspector.get_foreign_keys(table.name):
+            key = (table.name, tuple(fk["constrained_columns"]))
+            existing[key] = (fk["name"], _rule(fk.get("options", {}).get("ondelete")))
+    return existing
+
+
+def foreign_key_ddl(constraint, name: str) -> list:
+    """Troca a FK por uma com a regra do modelo: NOT VALID primeiro, validação depois."""
+    table = constraint.parent.name
+    columns = ", ".join(column.name for column in constraint.columns)
+    referred = constraint.referred_table.name
+    referred_columns = ", ".join(element.column.name for element in constraint.elements)
+    on_delete = f" ON DELETE {constraint.ondelete}" if constraint.ondelete else ""
+    if PARTITIONED and table in PARTITIONED_TABLES:
+        return [
+            f"ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {name}, "
+            f"ADD CONSTRAINT {name} FOREIGN KEY ({columns}) REFERENCES {referred} ({referred_columns}){on_delete}",
+        ]
+    return [
+        f"ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {name}, "
+        f"ADD CONSTRAINT {name} FOREIGN KEY ({columns}) REFERENCES {referred} ({referred_columns}){on_delete} NOT VALID",
+        f"ALTER TABLE {table} VALIDATE CONSTRAINT {name}",
+    ]
+
+
+async def migrate_foreign_keys(dry_run: bool = False) -> list:
+    """Recria as FKs com regra ON DELETE divergente e devolve o DDL executado (ou que seria executado)."""
+    import_models()
+    statements = []
+    async with engine.connect() as conn:
+        if conn.dialect.name != "postgresql":
+            logger.info("FKs não são migradas em %s; nada a fazer.", conn.dialect.name)
+            return statements
+        # Cada ALTER em sua própria transação: a validação não segura o lock do ADD
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text("SET statement_timeout = 0"))
+
+        existing = await conn.run_sync(_existing_foreign_keys)
+        for table in Base.metadata.sorted_tables:
+            for constraint in sorted(table.foreign_key_constraints, key=lambda fk: fk.column_keys):
+                key = (table.name, tuple(column.name for column in constraint.columns))
+                if key not in existing:
+                    continue  # tabela nova (create_all) ou FK criada à mão com outro formato
+                name, rule = existing[key]
+                if rule == _rule(constraint.ondelete):
+                    continue
+                for statement in foreign_key_ddl(constraint, name or f"{table.name}_{key[1][0]}_fkey"):
+                    statements.append(statement)
+                    if not dry_run:
+                        logger.info("%s", statement)
+                        await conn.execute(text(statement))
+    return statements
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aplica as regras ON DELETE declaradas nos modelos às FKs existentes.")
+    parser.add_argument("--dry-run", action="store_true", help="Apenas lista o DDL, sem executar")
+    args = parser.parse_args()
+    logging.basicConfig(format="%(message)s")
+    logger.setLevel(logging.INFO)
+
+    async def run():
+        try:
+            return await migrate_foreign_keys(dry_run=args.dry_run)
+        finally:
+            await engine.dispose()
+
+    statements = asyncio.run(run())
+    if args.dry_run:
+        for statement in statements:
+            print(statement + ";")
+    print(f"{len(statements)} instrução(ões) {'pendente(s)' if args.dry_run else 'executada(s)'}.")
+
+
+if __name__ == "__main__":
+    main()
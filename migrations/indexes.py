@@ -0,0 +1,160 @@
+"""Cria os índices declarados nos modelos que ainda não existem no banco.
+
+`create_all` só cria índices junto com tabelas novas; em bancos já existentes
+os índices são entregues por esta migração. No PostgreSQL cada índice é criado
+com CREATE INDEX CONCURRENTLY (fora de transação), sem bloquear escritas, então
+ela pode rodar com a aplicação no ar. Um build concorrente interrompido deixa o
+índice marcado como inválido; ele é removido e recriado na próxima execução.
+
+Tabelas particionadas (`partitioning.py`) não aceitam CONCURRENTLY na tabela
+mãe: o índice é criado só nela (ON ONLY, inválido até receber as partições), o
+de cada partição é construído concorrentemente e anexado a ele.
+
+Índices substituídos por outro nos modelos (SUPERSEDED_INDEXES) são removidos
+depois que os novos da tabela foram criados.
+
+    python -m migrations.indexes            # aplica
+    python -m migrations.indexes --dry-run  # apenas lista o DDL
+"""
+import argparse
+import asyncio
+import logging
+import re
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateIndex
+from database import Base, engine, import_models
+from partitioning import PARTITIONED, PARTITIONED_TABLES, partition_names
+
+logger = logging.getLogger(__name__)
+
+# Índices que saíram dos modelos por tabela, cobertos por um índice novo
+SUPERSEDED_INDEXES = {
+    "servicos_projetos": ("ix_servicos_projetos_user_status",),  # -> ix_servicos_projetos_user_status_pk
+}
+
+
+def index_ddl(index, dialect) -> str:
+    """DDL idempotente do índice; concorrente no PostgreSQL."""
+    ddl = str(CreateIndex(index, if_not_exists=True).compile(dialect=dialect))
+    if dialect.name == "postgresql":
+        ddl = re.sub(r"^CREATE (UNIQUE )?INDEX", r"CREATE \1INDEX CONCURRENTLY", ddl)
+    return ddl
+
+
+def partitioned_index_ddl(index, dialect) -> list:
+    """Índice de tabela particionada: vazio na mãe, concorrente em cada partição e anexado."""
+    table = index.table.name
+    ddl = str(CreateIndex(index, if_not_exists=True).compile(dialect=dialect))
+    head = f"INDEX IF NOT EXISTS {index.name} ON {table} "
+    statements = [ddl.replace(head, f"INDEX IF NOT EXISTS {index.name} ON ONLY {table} ", 1)]
+    for remainder, partition in enumerate(partition_names(table)):
+        name = f"{index.name}_p{remainder}"
+        statements.append(ddl.replace(head, f"INDEX CONCURRENTLY IF NOT EXISTS {name} ON {partition} ", 1))
+        statements.append(f"ALTER INDEX {index.name} ATTACH PARTITION {name}")
+    return statements
+
+
+def _is_partitioned(table, dialect) -> bool:
+    return PARTITIONED and dialect.name == "postgresql" and table.name in PARTITIONED_TABLES
+
+
+def applies_to(index, dialect) -> bool:
+    """Respeita Index.ddl_if(dialect=...), usado por índices específicos de um banco (ex.: GIN)."""
+    ddl_if = getattr(index, "_ddl_if", None)
+    if ddl_if is None or ddl_if.dialect is None:
+        return True
+    dialects = (ddl_if.dialect,) if isinstance(ddl_if.dialect, str) else ddl_if.dialect
+    return dialect.name in dialects
+
+
+def _existing_indexes(sync_conn) -> dict:
+    """Nomes dos índices existentes por tabela (tabelas ausentes ficam de fora)."""
+    inspector = inspect(sync_conn)
+    tables = set(inspector.get_table_names())
+    return {
+        table.name: {index["name"] for index in inspector.get_indexes(table.name)}
+        for table in Base.metadata.sorted_tables
+        if table.name in tables
+    }
+
+
+async def _invalid_indexes(conn) -> set:
+    if conn.dialect.name != "postgresql":
+        return set()
+    result = await conn.execute(text(
+        "SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE NOT i.indisvalid"
+    ))
+    return set(result.scalars())
+
+
+async def migrate_indexes(dry_run: bool = False) -> list:
+    """Cria os índices faltantes e devolve o DDL executado (ou que seria executado)."""
+    import_models()
+    statements = []
+    async with engine.connect() as conn:
+        # CREATE INDEX CONCURRENTLY não pode rodar dentro de uma transação
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        if conn.dialect.name == "postgresql":
+            # Builds em tabelas grandes podem passar do statement_timeout do servidor
+            await conn.execute(text("SET statement_timeout = 0"))
+
+        existing = await conn.run_sync(_existing_indexes)
+        invalid = await _invalid_indexes(conn)
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing:
+                continue  # tabela nova: create_all cria junto com os índices
+            for index in sorted(table.indexes, key=lambda ix: ix.name):
+                if not applies_to(index, conn.dialect):
+                    continue
+                partitioned = _is_partitioned(table, conn.dialect)
+                pending = []
+                if index.name in invalid:
+                    # Índice particionado não aceita DROP ... CONCURRENTLY
+                    pending.append(f"DROP INDEX {'' if partitioned else 'CONCURRENTLY '}IF EXISTS {index.name}")
+                elif index.name in existing[table.name]:
+                    continue
+                if partitioned:
+                    pending.extend(partitioned_index_ddl(index, conn.dialect))
+                else:
+                    pending.append(index_ddl(index, conn.dialect))
+
+                for statement in pending:
+                    statements.append(statement)
+                    if not dry_run:
+                        logger.info("%s", statement)
+                        await conn.execute(text(statement))
+
+            for name in SUPERSEDED_INDEXES.get(table.name, ()):
+                if name not in existing[table.name]:
+                    continue
+                concurrently = "" if _is_partitioned(table, conn.dialect) or conn.dialect.name != "postgresql" else "CONCURRENTLY "
+                statement = f"DROP INDEX {concurrently}IF EXISTS {name}"
+                statements.append(statement)
+                if not dry_run:
+                    logger.info("%s", statement)
+                    await conn.execute(text(statement))
+    return statements
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cria os índices declarados nos modelos que ainda não existem no banco.")
+    parser.add_argument("--dry-run", action="store_true", help="Apenas lista o DDL, sem executar")
+    args = parser.parse_args()
+    logging.basicConfig(format="%(message)s")
+    logger.setLevel(logging.INFO)
+
+    async def run():
+        try:
+            return await migrate_indexes(dry_run=args.dry_run)
+        finally:
+            await engine.dispose()
+
+    statements = asyncio.run(run())
+    if args.dry_run:
+        for statement in statements:
+            print(statement + ";")
+    print(f"{len(statements)} instrução(ões) {'pendente(s)' if args.dry_run else 'executada(s)'}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Converte `servicos_projetos` e `itens_infraestrutura` para o particionamento configurado.
+
+Particionar uma tabela existente por hash de `user_id` (DB_HASH_PARTITIONS),
+mudar o número de partições ou voltar a tabelas comuns exige recriá-la. Numa
+única transação, com as duas tabelas bloqueadas:
+
+1. as tabelas atuais (com partições e índices) ganham o sufixo `_antiga`;
+2. as novas são criadas a partir dos modelos, com as partições;
+3. as linhas são copiadas (INSERT ... SELECT) e os índices criados depois da
+   cópia, o que é bem mais rápido que mantê-los linha a linha;
+4. as antigas são removidas e as novas analisadas (ANALYZE).
+
+As duas tabelas são recriadas juntas porque a FK dos itens para o projeto
+muda de formato com o particionamento (passa a incluir o `user_id`). Leituras
+e escritas nelas ficam bloqueadas durante a cópia: rode numa janela de
+manutenção e, em seguida, `python -m migrations.schema` para registrar a
+versão. Somente PostgreSQL; no SQLite as tabelas nunca são particionadas.
+
+    python -m migrations.partitions            # aplica
+    python -m migrations.partitions --dry-run  # apenas lista o SQL
+"""
+import argparse
+import asyncio
+import logging
+from sqlalchemy import text
+from sqlalchemy.schema import CreateIndex, CreateTable
+from database import Base, engine, import_models
+from migrations.indexes import applies_to
+from partitioning import HASH_PARTITIONS, PARTITIONED, PARTITIONED_TABLES, partition_ddl
+
+logger = logging.getLogger(__name__)
+
+LEGACY_SUFFIX = "_antiga"
+
+
+def _legacy(name: str) -> str:
+    return name[:63 - len(LEGACY_SUFFIX)] + LEGACY_SUFFIX  # limite de 63 caracteres dos nomes
+
+
+async def _layout(conn, table_name: str):
+    """(relkind, nº de partições) da tabela; None se ela não existir."""
+    row = (await conn.execute(text(
+        "SELECT c.relkind::text, count(i.inhrelid) FROM pg_class c "
+        "LEFT JOIN pg_inherits i ON i.inhparent = c.oid "
+        "WHERE c.oid = to_regclass(:name) GROUP BY c.relkind"
+    ), {"name": table_name})).first()
+    return tuple(row) if row else None
+
+
+async def _pending(conn) -> list:
+    expected = ("p", HASH_PARTITIONS) if PARTITIONED else ("r", 0)
+    pending = []
+    for table_name in PARTITIONED_TABLES:
+        layout = await _layout(conn, table_name)
+        if layout is not None and layout != expected:
+            pending.append(table_name)
+    return pending
+
+
+async def pending_partitions() -> list:
+    """Tabelas existentes cujo particionamento difere do configurado (vazio fora do PostgreSQL)."""
+    if engine.dialect.name != "postgresql":
+        return []
+    async with engine.connect() as conn:
+        return await _pending(conn)
+
+
+async def _rename_statements(conn, table_name: str) -> list:
+    """Renomeia a tabela atual, suas partições e todos os índices (os nomes de índice são por schema)."""
+    relations = (await conn.execute(text(
+        "SELECT c.relname FROM pg_class c WHERE c.oid = to_regclass(:name) "
+        "OR c.oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = to_regclass(:name)) "
+        "ORDER BY c.relname"
+    ), {"name": table_name})).scalars().all()
+    statements = []
+    for relation in relations:
+        indexes = (await conn.execute(text(
+            "SELECT i.relname FROM pg_index x JOIN pg_class i ON i.oid = x.indexrelid "
+            "WHERE x.indrelid = to_regclass(:name) ORDER BY i.relname"
+        ), {"name": relation})).scalars().all()
+        statements += [f"ALTER INDEX {index} RENAME TO {_legacy(index)}" for index in indexes]
+        statements.append(f"ALTER TABLE {relation} RENAME TO {_legacy(relation)}")
+    return statements
+
+
+async def migrate_partitions(dry_run: bool = False) -> list:
+    """Recria as tabelas com o particionamento configurado; devolve o SQL executado (ou que seria executado)."""
+    import_models()
+    statements = []
+    async with engine.begin() as conn:
+        if conn.dialect.name != "postgresql":
+            logger.info("Particionamento não se aplica a %s; nada a fazer.", conn.dialect.name)
+            return statements
+        if not await _pending(conn):
+            return statements
+
+        tables = [Base.metadata.tables[name] for name in PARTITIONED_TABLES]
+        statements.append("SET LOCAL statement_timeout = 0")
+        statements.append(f"LOCK TABLE {', '.join(PARTITIONED_TABLES)} IN ACCESS EXCLUSIVE MODE")
+        for table in tables:
+            statements += await _rename_statements(conn, table.name)
+        for table in tables:
+            columns = ", ".join(column.name for column in table.columns)
+            statements.append(str(CreateTable(table).compile(dialect=conn.dialect)).strip())
+            statements += partition_ddl(table.name)
+            statements.append(f"INSERT INTO {table.name} ({columns}) SELECT {columns} FROM {_legacy(table.name)}")
+        for table in tables:
+            for index in sorted(table.indexes, key=lambda ix: ix.name):
+                if applies_to(index, conn.dialect):
+                    statements.append(str(CreateIndex(index).compile(dialect=conn.dialect)))
+        # Itens primeiro: a FK deles aponta para a tabela antiga de projetos
+        statements += [f"DROP TABLE {_legacy(table.name)}" for table in reversed(tables)]
+        statements += [f"ANALYZE {table.name}" for table in tables]
+
+        if not dry_run:
+            for statement in statements:
+                logger.info("%s", statement.splitlines()[0])
+                await conn.execute(text(statement))
+    return statements
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recria as tabelas particionáveis com o particionamento configurado.")
+    parser.add_argument("--dry-run", action="store_true", help="Apenas lista o SQL, sem executar")
+    args = parser.parse_args()
+    logging.basicConfig(format="%(message)s")
+    logger.setLevel(logging.INFO)
+
+    async def run():
+        try:
+            return await migrate_partitions(dry_run=args.dry_run)
+        finally:
+            await engine.dispose()
+
+    statements = asyncio.run(run())
+    if args.dry_run:
+        for statement in statements:
+            print(statement + ";")
+    print(f"{len(statements)} instrução(ões) {'pendente(s)' if args.dry_run else 'executada(s)'}.")
+
+
+if __name__ == "__main__":
+    main()
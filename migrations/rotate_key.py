@@ -0,0 +1,156 @@
+"""Re-criptografa as senhas dos itens de infraestrutura com a ENCRYPTION_KEY atual.
+
+Rotação sem downtime:
+
+1. Gere a nova chave e publique-a em todos os workers como ENCRYPTION_KEY, com a
+   antiga em ENCRYPTION_OLD_KEYS. Novas senhas já saem com a chave nova e as
+   antigas continuam legíveis. Em deploys graduais, publique antes a chave nova
+   só em ENCRYPTION_OLD_KEYS, para que nenhum worker receba um token que não
+   consegue decifrar.
+2. Rode este job (com as mesmas variáveis). Ele percorre `itens_infraestrutura`
+   em lotes pela chave primária, rotaciona cada token (MultiFernet.rotate) e
+   grava o lote num único UPDATE em lote, na mesma transação do checkpoint
+   (tabela `rotacoes_chaves`). Interrompido, retoma do último lote gravado.
+   O ritmo é limitado a --rows-per-second para não disputar o banco com o app.
+3. Concluído, remova a chave antiga de ENCRYPTION_OLD_KEYS.
+
+Uma senha alterada pelo app durante o job não é sobrescrita: o UPDATE só grava
+se o token ainda for o lido. Só o texto cifrado muda (as leituras exibem a
+senha mascarada), então as versões dos ETags não são incrementadas.
+
+    python -m migrations.rotate_key                        # roda ou retoma
+    python -m migrations.rotate_key --rows-per-second 200  # mais devagar
+    python -m migrations.rotate_key --restart              # ignora o checkpoint
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime
+from cryptography.fernet import InvalidToken
+from sqlalchemy import bindparam, select, update
+from config import ENCRYPTION_KEY, KEY_ROTATION_BATCH_SIZE, KEY_ROTATION_ROWS_PER_SECOND
+from database import SessionLocal, engine, import_models
+from models.descriptar_senha import get_fernet, key_fingerprint
+from models.itens_infraestrutura import InfraestruturaItemModel
+from models.rotacao_chave import RotacaoChaveModel
+
+logger = logging.getLogger(__name__)
+
+_items = InfraestruturaItemModel.__table__
+
+# UPDATE em lote (executemany); a condição no token antigo protege escritas concorrentes
+_write_batch = (
+    update(_items)
+    .where(_items.c.id_item == bindparam("b_id"), _items.c.referencia_senha == bindparam("b_old"))
+    .values(referencia_senha=bindparam("b_new"))
+)
+
+
+def _summary(checkpoint: RotacaoChaveModel) -> dict:
+    return {
+        "chave": checkpoint.chave,
+        "rotacionados": checkpoint.rotacionados,
+        "falhas": checkpoint.falhas,
+        "ultimo_id": str(checkpoint.ultimo_id) if checkpoint.ultimo_id else None,
+        "concluido": checkpoint.concluido_em is not None,
+    }
+
+
+async def rotate_secrets(
+    batch_size: int = KEY_ROTATION_BATCH_SIZE,
+    rows_per_second: float = KEY_ROTATION_ROWS_PER_SECOND,
+    restart: bool = False,
+) -> dict:
+    """Rotaciona todas as senhas para a chave primária, retomando do checkpoint dela."""
+    import_models()
+    async with engine.begin() as conn:
+        await conn.run_sync(RotacaoChaveModel.__table__.create, checkfirst=True)
+
+    fernet = get_fernet()
+    async with SessionLocal() as db:
+        checkpoint = await db.get(RotacaoChaveModel, key_fingerprint(ENCRYPTION_KEY))
+        if checkpoint is None:
+            checkpoint = RotacaoChaveModel(chave=key_fingerprint(ENCRYPTION_KEY), rotacionados=0, falhas=0)
+            db.add(checkpoint)
+        elif restart:
+            checkpoint.ultimo_id, checkpoint.rotacionados, checkpoint.falhas, checkpoint.concluido_em = None, 0, 0, None
+        elif checkpoint.concluido_em is not None:
+            logger.info("Rotação para a chave %s já concluída.", checkpoint.chave)
+            return _summary(checkpoint)
+        if checkpoint.ultimo_id is None:
+            checkpoint.iniciado_em = datetime.now()
+        else:
+            logger.info("Retomando após o item %s (%d rotacionados).", checkpoint.ultimo_id, checkpoint.rotacionados)
+        await db.commit()
+
+        start = time.monotonic()
+        processed = 0
+        while True:
+            query = (
+                select(_items.c.id_item, _items.c.referencia_senha)
+                .where(_items.c.referencia_senha.is_not(None))
+                .order_by(_items.c.id_item)
+                .limit(batch_size)
+            )
+            if checkpoint.ultimo_id is not None:
+                query = query.where(_items.c.id_item > checkpoint.ultimo_id)
+            rows = (await db.execute(query)).all()
+            if not rows:
+                checkpoint.concluido_em = checkpoint.atualizado_em = datetime.now()
+                await db.commit()
+                break
+
+            params, failed = [], 0
+            for row in rows:
+                try:
+                    new_token = fernet.rotate(row.referencia_senha.encode()).decode()
+                except InvalidToken:
+                    # Token de uma chave fora de ENCRYPTION_KEY/ENCRYPTION_OLD_KEYS: fica como está
+                    logger.warning("Item %s: senha não decifrável com as chaves configuradas.", row.id_item)
+                    failed += 1
+                    continue
+                params.append({"b_id": row.id_item, "b_old": row.referencia_senha, "b_new": new_token})
+            if params:
+                await db.execute(_write_batch, params)
+
+            # Lote e checkpoint na mesma transação: um crash nunca perde nem repete trabalho
+            checkpoint.ultimo_id = rows[-1].id_item
+            checkpoint.rotacionados += len(params)
+            checkpoint.falhas += failed
+            checkpoint.atualizado_em = datetime.now()
+            await db.commit()
+            processed += len(rows)
+            logger.info("%d senhas rotacionadas (último item %s).", checkpoint.rotacionados, checkpoint.ultimo_id)
+
+            if rows_per_second > 0:
+                delay = start + processed / rows_per_second - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+    result = _summary(checkpoint)
+    result["segundos"] = round(time.monotonic() - start, 2)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=KEY_ROTATION_BATCH_SIZE, help="Itens por lote/transação")
+    parser.add_argument("--rows-per-second", type=float, default=KEY_ROTATION_ROWS_PER_SECOND, help="Ritmo máximo (0 = sem limite)")
+    parser.add_argument("--restart", action="store_true", help="Recomeça do início, ignorando o checkpoint desta chave")
+    args = parser.parse_args()
+    logging.basicConfig(format="%(message)s")
+    logger.setLevel(logging.INFO)
+
+    async def run():
+        try:
+            return await rotate_secrets(args.batch_size, args.rows_per_second, args.restart)
+        finally:
+            await engine.dispose()
+
+    print(json.dumps(asyncio.run(run()), indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
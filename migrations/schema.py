@@ -0,0 +1,130 @@
+"""Versionamento do schema: migração explícita e checagem barata na inicialização.
+
+A versão é uma impressão digital do DDL que os modelos geram para o dialeto do
+banco (tabelas e índices). `python -m migrations.schema` cria as tabelas novas
+(`create_all`, que no SQLite também instala as tabelas FTS5), os índices que
+faltam (`migrations.indexes`, concorrente no PostgreSQL), ajusta as regras
+ON DELETE das FKs (`migrations.foreign_keys`, só no PostgreSQL) e grava a
+impressão digital em `versao_schema`. Colunas alteradas em tabelas existentes continuam
+exigindo DDL manual.
+
+Na inicialização, cada worker só compara a impressão digital gravada com a
+esperada (uma consulta, sem refletir as tabelas). Se divergirem, o schema é
+migrado ali mesmo quando SCHEMA_AUTO_MIGRATE está ativo; senão o worker não sobe.
+
+    python -m migrations.schema          # aplica e registra a versão
+    python -m migrations.schema --check  # só compara (código de saída 1 se pendente)
+"""
+import argparse
+import asyncio
+import hashlib
+import logging
+import sys
+from datetime import datetime
+from sqlalchemy import delete, insert, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.schema import CreateIndex, CreateTable
+from config import SCHEMA_AUTO_MIGRATE
+from database import Base, engine, import_models, init_db
+from migrations.foreign_keys import migrate_foreign_keys
+from migrations.indexes import applies_to, migrate_indexes
+from migrations.partitions import pending_partitions
+from partitioning import partition_ddl
+
+logger = logging.getLogger(__name__)
+
+
+class SchemaOutdated(RuntimeError):
+    """O banco não está na versão de schema esperada pelo código."""
+
+
+def schema_fingerprint(dialect) -> str:
+    """Hash do DDL das tabelas, partições e índices declarados nos modelos, para o dialeto dado."""
+    import_models()
+    ddl = []
+    for table in Base.metadata.sorted_tables:
+        ddl.append(str(CreateTable(table).compile(dialect=dialect)))
+        if dialect.name == "postgresql":
+            ddl.extend(partition_ddl(table.name))
+        for index in sorted(table.indexes, key=lambda ix: ix.name):
+            if applies_to(index, dialect):
+                ddl.append(str(CreateIndex(index).compile(dialect=dialect)))
+    return hashlib.sha256("\n".join(ddl).encode()).hexdigest()[:32]
+
+
+async def current_fingerprint():
+    """Impressão digital gravada no banco (None se o schema nunca foi registrado)."""
+    try:
+        async with engine.connect() as conn:
+            # SQL literal: na inicialização evita compilar a primeira query do ORM
+            return await conn.scalar(text("SELECT fingerprint FROM versao_schema WHERE id = 1"))
+    except DBAPIError:
+        return None  # tabela versao_schema ainda não existe
+
+
+async def upgrade_schema() -> dict:
+    """Cria tabelas e índices faltantes e registra a impressão digital do schema."""
+    from models.versao import VersaoSchemaModel
+
+    await init_db()
+    # Converter tabelas existentes copia todas as linhas: fica para um comando explícito
+    tables = await pending_partitions()
+    if tables:
+        raise SchemaOutdated(
+            f"Particionamento das tabelas {', '.join(tables)} difere de DB_HASH_PARTITIONS. "
+            "Rode `python -m migrations.partitions` (recria as tabelas; exige janela de manutenção)."
+        )
+    statements = await migrate_indexes()
+    foreign_keys = await migrate_foreign_keys()
+    fingerprint = schema_fingerprint(engine.dialect)
+    async with engine.begin() as conn:
+        await conn.execute(delete(VersaoSchemaModel))
+        await conn.execute(insert(VersaoSchemaModel).values(id=1, fingerprint=fingerprint, aplicado_em=datetime.now()))
+    return {"fingerprint": fingerprint, "indexes": statements, "foreign_keys": foreign_keys}
+
+
+async def ensure_schema():
+    """Checagem da inicialização: uma consulta quando o schema já está em dia."""
+    expected = schema_fingerprint(engine.dialect)
+    current = await current_fingerprint()
+    if current == expected:
+        return
+    if not SCHEMA_AUTO_MIGRATE:
+        raise SchemaOutdated(
+            f"Schema do banco desatualizado (registrado: {current}, esperado: {expected}). "
+            "Rode `python -m migrations.schema` antes de iniciar a aplicação."
+        )
+    logger.warning("Schema desatualizado (registrado: %s); aplicando a migração.", current)
+    await upgrade_schema()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--check", action="store_true", help="Apenas compara a versão registrada com a esperada")
+    args = parser.parse_args()
+    logging.basicConfig(format="%(message)s")
+    logging.getLogger("migrations").setLevel(logging.INFO)
+
+    async def run():
+        try:
+            expected = schema_fingerprint(engine.dialect)
+            current = await current_fingerprint()
+            if args.check:
+                return current == expected, f"registrado: {current}, esperado: {expected}"
+            if current == expected:
+                return True, f"Schema já está na versão {expected}."
+            result = await upgrade_schema()
+            return True, f"Schema migrado para {result['fingerprint']} ({len(result['indexes'])} índice(s) criado(s))."
+        finally:
+            await engine.dispose()
+
+    try:
+        ok, message = asyncio.run(run())
+    except SchemaOutdated as e:
+        ok, message = False, str(e)
+    print(message if ok or not args.check else f"Migração pendente ({message}).")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
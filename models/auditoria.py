@@ -0,0 +1,21 @@
+from sqlalchemy import BigInteger, Column, DateTime, Index, Integer, String
+from database_types import UUIDType
+from database import Base
+
+
+# --- MODELOS SQLALCHEMY (Mapeamento das Tabelas) ---
+class AuditoriaModel(Base):
+    """Trilha de auditoria: quem decifrou ou alterou o quê e quando (gravada em lote por audit.py)."""
+    __tablename__ = "audit_log"
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    ocorrido_em = Column(DateTime(timezone=True), nullable=False)  # momento da requisição, não da gravação
+    user_id = Column(UUIDType(), nullable=False)
+    acao = Column(String(20), nullable=False)       # decrypt, create, update, delete
+    entidade = Column(String(50), nullable=False)   # nome da tabela
+    id_entidade = Column(UUIDType(), nullable=True)  # vazio nas operações em lote (resumo em `detalhe`)
+    detalhe = Column(String(255), nullable=True)
+
+    __table_args__ = (
+        Index("ix_audit_log_user_ocorrido", "user_id", "ocorrido_em"),
+        Index("ix_audit_log_entidade", "entidade", "id_entidade"),
+    )
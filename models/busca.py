@@ -0,0 +1,21 @@
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
+import uuid
+
+
+# --- ESQUEMAS PYDANTIC (Busca Textual) ---
+class SearchHit(BaseModel):
+    id: uuid.UUID
+    titulo: str = Field(..., description="Nome do cliente, título do projeto ou descrição do item")
+    detalhe: Optional[str] = Field(None, description="E-mail do cliente, status do projeto ou tipo do item")
+    score: float = Field(..., description="Relevância (maior = mais relevante)")
+
+
+class SearchPage(BaseModel):
+    items: List[SearchHit]
+    next_offset: Optional[int] = Field(None, description="Offset da próxima página desta entidade, se houver")
+
+
+class SearchResults(BaseModel):
+    q: str
+    resultados: Dict[str, SearchPage]
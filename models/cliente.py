@@ -1,19 +1,20 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey
+from sqlalchemy import Column, String, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from database_types import UUIDType
-from pydantic import BaseModel, Field, EmailStr
+from pydantic import BaseModel, Field, EmailStr, model_validator
 from datetime import datetime
 import uuid
-from typing import Optional
+from typing import List, Optional
 from models.endereco import EnderecoBase, EnderecoRead
 from database import Base
+from full_text import search_index
 
 # --- MODELOS SQLALCHEMY (Mapeamento das Tabelas) ---
 class ClienteModel(Base):
     __tablename__ = "clientes"
     id_cliente = Column(UUIDType(), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUIDType(), nullable=False)
-    id_endereco = Column(UUIDType(), ForeignKey('enderecos.id_endereco'), nullable=True)
+    id_endereco = Column(UUIDType(), ForeignKey('enderecos.id_endereco', ondelete='SET NULL'), nullable=True)
     nome = Column(String(255), nullable=False)
     email = Column(String(255), nullable=False, unique=True)
     telefone = Column(String(50), nullable=True)
@@ -25,11 +26,22 @@ class ClienteModel(Base):
     observacoes = Column(String, nullable=True)
     data_criacao = Column(DateTime(timezone=True), default=datetime.now)
     data_ultimo_contato = Column(DateTime(timezone=True), nullable=True)
+
+    # Índices por usuário: toda consulta filtra por user_id (busca por ID,
+    # exportação, listagem na ordenação padrão e filtro de status), mais a busca textual
+    __table_args__ = (
+        Index("ix_clientes_user_pk", "user_id", "id_cliente"),
+        Index("ix_clientes_user_nome", "user_id", "nome", "id_cliente"),
+        Index("ix_clientes_user_email", "user_id", "email", "id_cliente"),
+        Index("ix_clientes_user_status", "user_id", "status_relacionamento"),
+        search_index("clientes", "ix_clientes_busca", nome, email, documento_fiscal),
+    )
     
-    # Relacionamentos
+    # Relacionamentos. Projetos e itens do cliente saem com ele (ON DELETE CASCADE):
+    # passive_deletes impede o ORM de carregá-los linha a linha numa exclusão
     endereco_obj = relationship("EnderecoModel", back_populates="clientes")
-    projetos = relationship("ServicoProjetoModel", back_populates="cliente")
-    infra = relationship("InfraestruturaItemModel", back_populates="cliente")
+    projetos = relationship("ServicoProjetoModel", back_populates="cliente", passive_deletes=True)
+    infra = relationship("InfraestruturaItemModel", back_populates="cliente", passive_deletes=True)
 
 
 # --- ESQUEMAS PYDANTIC (Validação de Dados) ---
@@ -62,3 +74,26 @@ class ClienteRead(ClienteBase):
     class Config:
         from_attributes = True
         populate_by_name = True # Essencial para o relacionamento endereco_obj
+
+
+# --- ESQUEMAS PYDANTIC PARA EXCLUSÃO EM LOTE ---
+CLIENTE_DELETE_MAX_IDS = 1000
+
+
+class ClienteBulkDelete(BaseModel):
+    ids: Optional[List[uuid.UUID]] = Field(None, max_length=CLIENTE_DELETE_MAX_IDS, description="Clientes a remover")
+    segmento: Optional[str] = Field(None, description="Todos os clientes do segmento")
+    status_relacionamento: Optional[str] = Field(None, description="Todos os clientes com este status")
+
+    @model_validator(mode="after")
+    def check_selection(self):
+        if not self.ids and self.segmento is None and self.status_relacionamento is None:
+            raise ValueError("Informe ids, segmento ou status_relacionamento.")
+        return self
+
+
+class ClienteDeleteResult(BaseModel):
+    clientes: int = Field(..., description="Clientes removidos")
+    projetos: int = Field(..., description="Projetos removidos junto com os clientes")
+    itens_infraestrutura: int = Field(..., description="Itens de infraestrutura removidos junto com os clientes")
+    enderecos: int = Field(..., description="Endereços dos clientes removidos")
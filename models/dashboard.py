@@ -0,0 +1,37 @@
+from pydantic import BaseModel, Field
+from typing import Dict, Optional
+
+
+# --- ESQUEMAS PYDANTIC (Resumo do Dashboard) ---
+# Nos agrupamentos, valores nulos aparecem sob a chave "N/A"
+class ProjetosResumo(BaseModel):
+    total: int
+    por_status: Dict[str, int]
+    orcamento_total: float
+    orcamento_medio: Optional[float] = Field(None, description="Média entre os projetos com orçamento informado")
+
+
+class InfraResumo(BaseModel):
+    total: int
+    criticos: int
+    expirados: int
+    expirando: int = Field(..., description="Itens que expiram nos próximos `dias_expiracao` dias")
+    dias_expiracao: int
+
+
+class ClientesResumo(BaseModel):
+    total: int
+    por_status: Dict[str, int]
+    por_segmento: Dict[str, int]
+
+
+class DesenvolvedoresResumo(BaseModel):
+    total: int
+    por_tipo_contrato: Dict[str, int]
+
+
+class DashboardSummary(BaseModel):
+    projetos: ProjetosResumo
+    infra: InfraResumo
+    clientes: ClientesResumo
+    desenvolvedores: DesenvolvedoresResumo
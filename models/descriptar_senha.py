@@ -1,36 +1,91 @@
-from pydantic import BaseModel, Field
-from cryptography.fernet import Fernet
+from pydantic import BaseModel, Field, model_validator
+from functools import lru_cache
+from typing import Iterable, List, Optional
+import hashlib
 import uuid
-from config import ENCRYPTION_KEY
+from config import ENCRYPTION_KEY, ENCRYPTION_OLD_KEYS
 
 
-# Inicializa o objeto Fernet (Criptografia AES-128)
-try:
-    # A chave é passada como bytes para o Fernet (espera-se 44 chars base64-url)
-    if not ENCRYPTION_KEY:
-        raise Exception("ENCRYPTION_KEY não configurada. Verifique o arquivo .env")
-    FERNET = Fernet(ENCRYPTION_KEY.encode()) 
-except Exception as e:
-    raise Exception(f"Erro ao inicializar Fernet. Verifique a chave no .env: {e}")
+# Inicializa o objeto Fernet (Criptografia AES-128) no primeiro uso: o import do
+# cryptography fica fora da inicialização do worker
+@lru_cache(maxsize=None)
+def get_fernet():
+    from cryptography.fernet import Fernet, MultiFernet
+    try:
+        # A chave é passada como bytes para o Fernet (espera-se 44 chars base64-url)
+        if not ENCRYPTION_KEY:
+            raise Exception("ENCRYPTION_KEY não configurada. Verifique o arquivo .env")
+        # A primeira chave cifra; as de ENCRYPTION_OLD_KEYS só decifram (rotação de chave)
+        return MultiFernet([Fernet(ENCRYPTION_KEY.encode()), *(Fernet(key.encode()) for key in ENCRYPTION_OLD_KEYS)])
+    except Exception as e:
+        raise Exception(f"Erro ao inicializar Fernet. Verifique a chave no .env: {e}")
+
+
+def __getattr__(name):
+    # `from models.descriptar_senha import FERNET` continua funcionando
+    if name == "FERNET":
+        return get_fernet()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def key_fingerprint(key: str) -> str:
+    """Identificador não reversível de uma chave (para logs e checkpoints)."""
+    return hashlib.sha256(key.encode()).hexdigest()[:16]
 
 
 # --- FUNÇÕES DE CRIPTOGRAFIA ---
 def encrypt_password(password: str) -> str:
     """Criptografa a string de senha usando Fernet."""
-    # Como a inicialização já validou o FERNET, assumimos que ele está OK
-    return FERNET.encrypt(password.encode()).decode()
+    return get_fernet().encrypt(password.encode()).decode()
 
 def decrypt_password(encrypted_password: str) -> str:
     """Decifra a string de senha usando Fernet."""
     try:
         # Tenta decifrar.
-        return FERNET.decrypt(encrypted_password.encode()).decode()
+        return get_fernet().decrypt(encrypted_password.encode()).decode()
     except Exception:
         # Erro de decriptografia (chave incorreta ou dado corrompido)
         return "[ERRO DE DECRIPTOGRAFIA]"
 
+def decrypt_passwords(encrypted_passwords: Iterable[str]) -> List[Optional[str]]:
+    """Decifra vários tokens numa só passada; None para os que não puderem ser decifrados."""
+    decrypt = get_fernet().decrypt
+    secrets = []
+    for token in encrypted_passwords:
+        try:
+            secrets.append(decrypt(token.encode()).decode())
+        except Exception:
+            secrets.append(None)
+    return secrets
+
 
 # --- ESQUEMA PYDANTIC PARA SENHA DECIFRADA ---
 class DecryptedSecret(BaseModel):
     id_item: uuid.UUID
     secret: str = Field(..., description="Senha decifrada em texto puro.")
+
+
+# --- ESQUEMAS PYDANTIC PARA DECIFRAGEM EM LOTE ---
+DECRYPT_BATCH_MAX = 1000
+
+
+class DecryptBatchRequest(BaseModel):
+    ids: Optional[List[uuid.UUID]] = Field(None, max_length=DECRYPT_BATCH_MAX, description="Itens a decifrar")
+    id_servico: Optional[uuid.UUID] = Field(None, description="Todos os itens do projeto")
+    id_cliente: Optional[uuid.UUID] = Field(None, description="Todos os itens do cliente")
+
+    @model_validator(mode="after")
+    def check_selection(self):
+        if not self.ids and self.id_servico is None and self.id_cliente is None:
+            raise ValueError("Informe ids, id_servico ou id_cliente.")
+        return self
+
+
+class DecryptError(BaseModel):
+    id_item: uuid.UUID
+    detail: str
+
+
+class DecryptBatchResult(BaseModel):
+    secrets: List[DecryptedSecret]
+    errors: List[DecryptError]
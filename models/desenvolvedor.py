@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, Numeric
+from sqlalchemy import Column, String, DateTime, ForeignKey, Index, Numeric
 from sqlalchemy.orm import relationship
 from database_types import UUIDType
 from datetime import datetime
@@ -21,10 +21,18 @@ class DesenvolvedorModel(Base):
     tipo_contrato = Column(String(50), nullable=True)
     taxa_horaria = Column(Numeric(10, 2), nullable=True)
     data_criacao = Column(DateTime(timezone=True), default=datetime.now)
+
+    # Índices por usuário: busca por ID e listagem na ordenação padrão
+    __table_args__ = (
+        Index("ix_desenvolvedores_user_pk", "user_id", "id_desenvolvedor"),
+        Index("ix_desenvolvedores_user_nome", "user_id", "nome", "id_desenvolvedor"),
+        Index("ix_desenvolvedores_user_email", "user_id", "email", "id_desenvolvedor"),
+    )
     
     # Relacionamentos
     endereco_obj = relationship("EnderecoModel", back_populates="desenvolvedores")
-    projetos = relationship("ServicoProjetoModel", back_populates="desenvolvedor")
+    # Projetos ficam sem desenvolvedor (ON DELETE SET NULL), sem o ORM carregá-los
+    projetos = relationship("ServicoProjetoModel", back_populates="desenvolvedor", passive_deletes=True)
 
 # --- ESQUEMAS PYDANTIC (Validação de Dados) ---
 class DesenvolvedorBase(BaseModel):
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime
+from sqlalchemy import Column, String, DateTime, Index
 from sqlalchemy.orm import relationship
 from database_types import UUIDType
 from datetime import datetime
@@ -20,6 +20,11 @@ class EnderecoModel(Base):
     estado = Column(String(50), nullable=False)
     cep = Column(String(20), nullable=False)
     data_criacao = Column(DateTime(timezone=True), default=datetime.now)
+
+    # Busca por ID sempre restrita ao usuário
+    __table_args__ = (
+        Index("ix_enderecos_user_pk", "user_id", "id_endereco"),
+    )
     
     # Relacionamentos
     desenvolvedores = relationship("DesenvolvedorModel", back_populates="endereco_obj")
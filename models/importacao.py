@@ -0,0 +1,15 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+
+# --- ESQUEMAS PYDANTIC (Resultado de Importação em Lote) ---
+class BulkRowError(BaseModel):
+    row: int = Field(..., description="Posição do registro na entrada (1 = primeiro registro)")
+    email: Optional[str] = None
+    detail: str
+
+
+class BulkImportResult(BaseModel):
+    received: int
+    inserted: int
+    errors: List[BulkRowError]
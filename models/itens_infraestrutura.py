@@ -1,19 +1,23 @@
 from pydantic import BaseModel, Field
-from sqlalchemy import Column, String, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, String, DateTime, ForeignKey, Boolean, Index, true
 from sqlalchemy.orm import relationship
 from database_types import UUIDType
 from datetime import datetime
 from typing import Optional
 import uuid
 from database import Base
+from full_text import search_index
+from partitioning import PARTITIONED, partitioned_by_user, user_scoped_foreign_key
 
 # --- MODELOS SQLALCHEMY (Mapeamento das Tabelas) ---
 class InfraestruturaItemModel(Base):
     __tablename__ = "itens_infraestrutura"
     id_item = Column(UUIDType(), primary_key=True, default=uuid.uuid4)
-    user_id = Column(UUIDType(), nullable=False)
-    id_cliente = Column(UUIDType(), ForeignKey('clientes.id_cliente'), nullable=False)
-    id_servico = Column(UUIDType(), ForeignKey('servicos_projetos.id_servico'), nullable=True)
+    # Particionada por hash de user_id (opcional): a chave de partição entra na PK
+    user_id = Column(UUIDType(), primary_key=PARTITIONED, nullable=False)
+    id_cliente = Column(UUIDType(), ForeignKey('clientes.id_cliente', ondelete='CASCADE'), nullable=False)
+    id_servico = Column(UUIDType(), nullable=True)  # FK em __table_args__ (inclui user_id se particionada)
+    # Sem ON DELETE: um desenvolvedor com itens vinculados não pode ser removido
     id_desenvolvedor = Column(UUIDType(), ForeignKey('desenvolvedores.id_desenvolvedor'), nullable=False)
     tipo_item = Column(String(50), nullable=False)
     descricao = Column(String(255), nullable=False)
@@ -23,6 +27,28 @@ class InfraestruturaItemModel(Base):
     is_critico = Column(Boolean, nullable=False, default=False)
     data_expiracao = Column(DateTime(timezone=True), nullable=True)
     notas_acesso = Column(String, nullable=True)
+
+    # Índices por usuário: busca por ID, filtros da listagem (cliente, projeto)
+    # ordenação padrão por descrição e busca textual. Os de expiração atendem /infra/expiring;
+    # o parcial cobre só os itens críticos (PostgreSQL e SQLite aceitam índices parciais)
+    __table_args__ = (
+        Index("ix_itens_infraestrutura_user_pk", "user_id", "id_item"),
+        Index("ix_itens_infraestrutura_user_cliente", "user_id", "id_cliente"),
+        Index("ix_itens_infraestrutura_user_servico", "user_id", "id_servico"),
+        Index("ix_itens_infraestrutura_user_descricao", "user_id", "descricao", "id_item"),
+        Index("ix_itens_infraestrutura_user_tipo", "user_id", "tipo_item", "id_item"),
+        Index("ix_itens_infraestrutura_user_expiracao", "user_id", "data_expiracao"),
+        Index(
+            "ix_itens_infraestrutura_user_expiracao_critico", "user_id", "data_expiracao",
+            postgresql_where=is_critico == true(),
+            sqlite_where=is_critico == true(),
+        ),
+        search_index("itens_infraestrutura", "ix_itens_infraestrutura_busca", descricao, url_acesso, notas_acesso),
+        user_scoped_foreign_key("id_servico", "servicos_projetos", "id_servico", ondelete="SET NULL"),
+        partitioned_by_user(),
+    )
+    # Identidade no ORM: só o id, com ou sem user_id na PK da tabela
+    __mapper_args__ = {"primary_key": [id_item]}
     
     # Relacionamentos
     cliente = relationship("ClienteModel", back_populates="infra")
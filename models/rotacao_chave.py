@@ -0,0 +1,16 @@
+from sqlalchemy import Column, DateTime, Integer, String
+from database_types import UUIDType
+from database import Base
+
+
+# --- MODELOS SQLALCHEMY (Mapeamento das Tabelas) ---
+class RotacaoChaveModel(Base):
+    """Checkpoint da re-criptografia das senhas para uma chave primária (ver migrations/rotate_key.py)."""
+    __tablename__ = "rotacoes_chaves"
+    chave = Column(String(64), primary_key=True)  # key_fingerprint da ENCRYPTION_KEY de destino
+    ultimo_id = Column(UUIDType(), nullable=True)  # último id_item processado (ordem do keyset)
+    rotacionados = Column(Integer, nullable=False, default=0)
+    falhas = Column(Integer, nullable=False, default=0)
+    iniciado_em = Column(DateTime(timezone=True), nullable=True)
+    atualizado_em = Column(DateTime(timezone=True), nullable=True)
+    concluido_em = Column(DateTime(timezone=True), nullable=True)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from sqlalchemy import Column, String, DateTime, ForeignKey, Numeric
+from sqlalchemy import Column, String, DateTime, ForeignKey, Index, Numeric
 from sqlalchemy.orm import relationship
 from database_types import UUIDType
 from datetime import datetime
@@ -8,14 +8,17 @@ import uuid
 from models.cliente import ClienteBase
 from models.desenvolvedor import DesenvolvedorRead
 from database import Base
+from full_text import search_index
+from partitioning import PARTITIONED, partitioned_by_user
 
 # --- MODELOS SQLALCHEMY (Mapeamento das Tabelas) ---
 class ServicoProjetoModel(Base):
     __tablename__ = "servicos_projetos"
     id_servico = Column(UUIDType(), primary_key=True, default=uuid.uuid4)
-    user_id = Column(UUIDType(), nullable=False)
-    id_cliente = Column(UUIDType(), ForeignKey('clientes.id_cliente'), nullable=False)
-    id_desenvolvedor = Column(UUIDType(), ForeignKey('desenvolvedores.id_desenvolvedor'), nullable=True)
+    # Particionada por hash de user_id (opcional): a chave de partição entra na PK
+    user_id = Column(UUIDType(), primary_key=PARTITIONED, nullable=False)
+    id_cliente = Column(UUIDType(), ForeignKey('clientes.id_cliente', ondelete='CASCADE'), nullable=False)
+    id_desenvolvedor = Column(UUIDType(), ForeignKey('desenvolvedores.id_desenvolvedor', ondelete='SET NULL'), nullable=True)
     titulo = Column(String(255), nullable=False)
     escopo = Column(String, nullable=False)
     status_projeto = Column(String(50), nullable=False)
@@ -23,11 +26,26 @@ class ServicoProjetoModel(Base):
     data_limite = Column(DateTime(timezone=True), nullable=True)
     orcamento = Column(Numeric(10, 2), nullable=True)
     notas_internas = Column(String, nullable=True)
+
+    # Índices por usuário: busca por ID, filtros da listagem (cliente,
+    # desenvolvedor, status), ordenação padrão por título e busca textual
+    __table_args__ = (
+        Index("ix_servicos_projetos_user_pk", "user_id", "id_servico"),
+        Index("ix_servicos_projetos_user_cliente", "user_id", "id_cliente"),
+        Index("ix_servicos_projetos_user_desenvolvedor", "user_id", "id_desenvolvedor"),
+        Index("ix_servicos_projetos_user_status_pk", "user_id", "status_projeto", "id_servico"),
+        Index("ix_servicos_projetos_user_titulo", "user_id", "titulo", "id_servico"),
+        search_index("servicos_projetos", "ix_servicos_projetos_busca", titulo, escopo),
+        partitioned_by_user(),
+    )
+    # Identidade no ORM: só o id, com ou sem user_id na PK da tabela
+    __mapper_args__ = {"primary_key": [id_servico]}
     
     # Relacionamentos
     cliente = relationship("ClienteModel", back_populates="projetos")
     desenvolvedor = relationship("DesenvolvedorModel", back_populates="projetos")
-    infra = relationship("InfraestruturaItemModel", back_populates="projeto")
+    # Itens ficam sem projeto (ON DELETE SET NULL), sem o ORM carregá-los
+    infra = relationship("InfraestruturaItemModel", back_populates="projeto", passive_deletes=True)
 
 
 # --- ESQUEMAS PYDANTIC (Validação de Dados) ---
@@ -16,7 +16,7 @@ class UsuarioModel(Base):
     is_active = Column(Boolean, default=True)
     is_admin = Column(Boolean, default=False)
     created_at = Column(DateTime(timezone=True), default=datetime.utcnow)
-    id_desenvolvedor = Column(UUIDType(), ForeignKey('desenvolvedores.id_desenvolvedor'), nullable=True)
+    id_desenvolvedor = Column(UUIDType(), ForeignKey('desenvolvedores.id_desenvolvedor', ondelete='SET NULL'), nullable=True)
 
 
 # --- ESQUEMAS PYDANTIC (Validação de Dados) ---
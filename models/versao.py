@@ -0,0 +1,20 @@
+from sqlalchemy import BigInteger, Column, DateTime, Integer, String
+from database_types import UUIDType
+from database import Base
+
+
+# --- MODELOS SQLALCHEMY (Mapeamento das Tabelas) ---
+class VersaoEntidadeModel(Base):
+    """Contador de alterações por usuário e tabela, base dos ETags das leituras (ver entity_versions.py)."""
+    __tablename__ = "versoes_entidades"
+    user_id = Column(UUIDType(), primary_key=True)
+    entidade = Column(String(50), primary_key=True)
+    versao = Column(BigInteger, nullable=False, default=1)
+
+
+class VersaoSchemaModel(Base):
+    """Impressão digital do schema aplicado por `python -m migrations.schema` (linha única, id = 1)."""
+    __tablename__ = "versao_schema"
+    id = Column(Integer, primary_key=True)
+    fingerprint = Column(String(64), nullable=False)
+    aplicado_em = Column(DateTime(timezone=True), nullable=False)
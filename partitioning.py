@@ -0,0 +1,76 @@
+"""Particionamento por hash de `user_id` das maiores tabelas (opcional, só PostgreSQL).
+
+Com DB_HASH_PARTITIONS > 0 e um banco PostgreSQL, `servicos_projetos` e
+`itens_infraestrutura` viram tabelas particionadas (`PARTITION BY HASH
+(user_id)`) com partições `<tabela>_p<N>`. Como todas as consultas dessas
+tabelas filtram por `user_id`, o planejador lê só a partição do usuário
+(partition pruning); cada partição tem índices menores e é vacuumizada
+separadamente.
+
+O PostgreSQL exige que a chave de partição faça parte das chaves únicas,
+então nesse modo:
+
+- a PK passa a ser (id, user_id); no ORM a identidade continua sendo só o
+  id (`__mapper_args__`), então `db.get`, os helpers de escrita e as rotas não
+  mudam;
+- a FK de `itens_infraestrutura` para o projeto inclui o usuário,
+  (user_id, id_servico), com `ON DELETE SET NULL (id_servico)` (PostgreSQL 15+)
+  para não anular o `user_id`.
+
+No SQLite (e com DB_HASH_PARTITIONS=0) as tabelas e chaves ficam como antes.
+Bancos existentes são convertidos por `python -m migrations.partitions`.
+"""
+from sqlalchemy import ForeignKeyConstraint, text
+from config import DATABASE_URL, DB_HASH_PARTITIONS
+
+PARTITIONED_TABLES = ("servicos_projetos", "itens_infraestrutura")
+
+# Só vale no PostgreSQL: nos demais bancos os modelos ficam sem partição
+HASH_PARTITIONS = DB_HASH_PARTITIONS if (DATABASE_URL or "").startswith("postgres") else 0
+PARTITIONED = HASH_PARTITIONS > 0
+
+
+def partition_names(table_name: str) -> list:
+    return [f"{table_name}_p{remainder}" for remainder in range(HASH_PARTITIONS)]
+
+
+def partition_ddl(table_name: str) -> list:
+    """CREATE TABLE de cada partição (vazio sem particionamento)."""
+    return [
+        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table_name} "
+        f"FOR VALUES WITH (MODULUS {HASH_PARTITIONS}, REMAINDER {remainder})"
+        for remainder, name in enumerate(partition_names(table_name))
+    ]
+
+
+def _create_partitions(target, connection, **kw):
+    if connection.dialect.name == "postgresql":
+        for statement in partition_ddl(target.name):
+            connection.execute(text(statement))
+
+
+def partitioned_by_user() -> dict:
+    """Opções de `__table_args__` da tabela particionada (vazio sem particionamento).
+
+    As partições são criadas logo após a tabela (evento `after_create`), então
+    `create_all` entrega a tabela já utilizável.
+    """
+    if not PARTITIONED:
+        return {}
+    return {"postgresql_partition_by": "HASH (user_id)", "listeners": [("after_create", _create_partitions)]}
+
+
+def user_scoped_foreign_key(column: str, referred: str, referred_column: str, ondelete: str) -> ForeignKeyConstraint:
+    """FK para uma tabela que pode estar particionada.
+
+    Sem particionamento é a FK simples da coluna. Com ele, o PostgreSQL exige
+    que a FK aponte para uma chave única da tabela referenciada, que inclui o
+    `user_id`; `SET NULL` passa a anular só a coluna da FK.
+    """
+    if not PARTITIONED:
+        return ForeignKeyConstraint([column], [f"{referred}.{referred_column}"], ondelete=ondelete)
+    if ondelete == "SET NULL":
+        ondelete = f"SET NULL ({column})"
+    return ForeignKeyConstraint(
+        ["user_id", column], [f"{referred}.user_id", f"{referred}.{referred_column}"], ondelete=ondelete,
+    )
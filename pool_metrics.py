@@ -0,0 +1,96 @@
+"""Pool de conexões instrumentado e métricas para dimensionar workers e pools."""
+import time
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+class PoolMetrics:
+    """Contadores acumulados desde o início do processo."""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.checkout_wait_total = 0.0
+        self.checkout_wait_max = 0.0
+        self.checkout_timeouts = 0
+        self.connections_created = 0
+        self.invalidations = 0
+        self.soft_invalidations = 0
+
+    def record_checkout(self, elapsed: float):
+        self.checkouts += 1
+        self.checkout_wait_total += elapsed
+        if elapsed > self.checkout_wait_max:
+            self.checkout_wait_max = elapsed
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool que mede o tempo de espera de cada checkout.
+
+    O tempo inclui a espera por uma conexão livre, o pre-ping e a abertura de
+    novas conexões (overflow), ou seja, tudo o que a requisição aguarda até
+    ter uma conexão em mãos.
+    """
+
+    def __init__(self, *args, **kw):
+        super().__init__(*args, **kw)
+        self.metrics = PoolMetrics()
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.metrics.checkout_timeouts += 1
+            raise
+        finally:
+            self.metrics.record_checkout(time.perf_counter() - start)
+
+    def recreate(self):
+        # Preserva os contadores quando o pool é recriado (ex.: engine.dispose())
+        new_pool = super().recreate()
+        new_pool.metrics = self.metrics
+        return new_pool
+
+
+def instrument_pool(pool: InstrumentedAsyncQueuePool):
+    """Registra os eventos de conexão/invalidação nas métricas do pool."""
+    metrics = pool.metrics
+
+    @event.listens_for(pool, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        metrics.connections_created += 1
+
+    @event.listens_for(pool, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        metrics.invalidations += 1
+
+    @event.listens_for(pool, "soft_invalidate")
+    def _on_soft_invalidate(dbapi_connection, connection_record, exception):
+        metrics.soft_invalidations += 1
+
+
+def pool_status(engine) -> dict:
+    """Estado atual e contadores acumulados do pool de uma engine (sync ou async)."""
+    pool = engine.pool
+    status = {"pool_class": type(pool).__name__}
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        status.update({
+            "pool_size": pool.size(),
+            "max_overflow": pool._max_overflow,
+            "timeout": pool.timeout(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+        })
+    metrics = getattr(pool, "metrics", None)
+    if metrics is not None:
+        status.update({
+            "checkouts": metrics.checkouts,
+            "checkout_wait_avg_ms": round(metrics.checkout_wait_total / metrics.checkouts * 1000, 3) if metrics.checkouts else 0.0,
+            "checkout_wait_max_ms": round(metrics.checkout_wait_max * 1000, 3),
+            "checkout_timeouts": metrics.checkout_timeouts,
+            "connections_created": metrics.connections_created,
+            "invalidations": metrics.invalidations,
+            "soft_invalidations": metrics.soft_invalidations,
+        })
+    return status
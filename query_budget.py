@@ -0,0 +1,145 @@
+"""Contagem de queries SQL por requisição e orçamento declarado por endpoint.
+
+Uso em testes:
+
+    with assert_max_queries(2):
+        client.get("/projetos", headers=auth)
+
+Uso nas rotas (requer QueryBudgetMiddleware no app):
+
+    @router.get("", dependencies=[Depends(query_budget(2))])
+"""
+import json
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from config import QUERY_BUDGET_STRICT
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Levantada quando um bloco executa mais queries do que o permitido."""
+
+
+class QueryCounter:
+    """Acumula as instruções SQL executadas enquanto está ativo."""
+
+    def __init__(self):
+        self.statements: List[str] = []
+        self.budget: Optional[int] = None
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+
+# Contador da requisição corrente (propaga para o threadpool e para os greenlets do SQLAlchemy)
+_current_counter: ContextVar[Optional[QueryCounter]] = ContextVar("query_counter", default=None)
+# Contadores globais usados por assert_max_queries: o TestClient executa o app em
+# outra thread, fora do contexto do teste
+_global_counters: List[QueryCounter] = []
+_global_lock = threading.Lock()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    counter = _current_counter.get()
+    if counter is not None:
+        counter.statements.append(statement)
+    if _global_counters:
+        with _global_lock:
+            for global_counter in _global_counters:
+                global_counter.statements.append(statement)
+
+
+@contextmanager
+def count_queries():
+    """Conta as queries executadas no contexto corrente (em qualquer engine)."""
+    counter = QueryCounter()
+    token = _current_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _current_counter.reset(token)
+
+
+@contextmanager
+def assert_max_queries(max_queries: int):
+    """Falha com QueryBudgetExceeded se o bloco executar mais de `max_queries` queries.
+
+    Conta todas as queries do processo enquanto o bloco está ativo, inclusive as
+    executadas pelo app em outra thread; use em testes, não em produção.
+    """
+    counter = QueryCounter()
+    with _global_lock:
+        _global_counters.append(counter)
+    try:
+        yield counter
+    finally:
+        with _global_lock:
+            _global_counters.remove(counter)
+    if counter.count > max_queries:
+        raise QueryBudgetExceeded(
+            f"{counter.count} queries executadas (orçamento: {max_queries}):\n" + "\n".join(counter.statements)
+        )
+
+
+def query_budget(max_queries: int):
+    """Dependência FastAPI que declara o orçamento de queries de um endpoint.
+
+    A verificação é feita pelo QueryBudgetMiddleware, depois da serialização
+    (onde os lazy loads acontecem) e antes de a resposta ser enviada.
+    """
+    async def dependency():
+        counter = _current_counter.get()
+        if counter is not None:
+            counter.budget = max_queries
+
+    return dependency
+
+
+class QueryBudgetMiddleware:
+    """Middleware ASGI que conta as queries de cada requisição e aplica o orçamento.
+
+    A contagem inclui a autenticação. Com QUERY_BUDGET_STRICT o excesso vira
+    erro 500; caso contrário é registrado como warning.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with count_queries() as counter:
+            replaced = False
+
+            async def send_checked(message):
+                nonlocal replaced
+                if replaced:
+                    return  # descarta o corpo original
+                if message["type"] == "http.response.start" and counter.budget is not None and counter.count > counter.budget:
+                    logger.warning(
+                        "Orçamento de queries excedido em %s %s: %d > %d",
+                        scope["method"], scope["path"], counter.count, counter.budget,
+                    )
+                    if QUERY_BUDGET_STRICT:
+                        replaced = True
+                        body = json.dumps({"detail": f"Orçamento de queries excedido: {counter.count} > {counter.budget}"}).encode()
+                        await send({
+                            "type": "http.response.start",
+                            "status": 500,
+                            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+                        })
+                        await send({"type": "http.response.body", "body": body})
+                        return
+                await send(message)
+
+            await self.app(scope, receive, send_checked)
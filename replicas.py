@@ -0,0 +1,235 @@
+"""Réplicas de leitura com leitura das próprias escritas (opcional).
+
+Com DATABASE_REPLICA_URL (uma ou mais URLs separadas por vírgula), as
+requisições GET/HEAD leem de uma réplica, em rodízio entre as saudáveis, e as
+demais usam o primário. Continua sendo uma sessão por requisição: a
+`RoutingSession` (database.py) manda para a réplica apenas SELECTs; flush, DML
+e o UPSERT das versões (entity_versions.py) vão sempre para o primário.
+
+- Leitura das próprias escritas: depois de uma escrita bem-sucedida, as
+  leituras do mesmo token (no worker que a atendeu) e do mesmo navegador
+  (cookie `nexus_primary_until`, vale em qualquer worker) ficam no primário por
+  REPLICA_STICKY_SECONDS.
+- Atraso de replicação: um monitor consulta cada réplica a cada
+  REPLICA_CHECK_INTERVAL segundos; as que estiverem mais de
+  REPLICA_MAX_LAG_SECONDS atrás saem do rodízio até alcançarem o primário.
+- Failover: a conexão com a réplica é aberta no início da requisição; se
+  falhar, a réplica é afastada por REPLICA_RETRY_SECONDS e a requisição segue
+  no primário, sem erro para o cliente. Sem réplicas saudáveis, tudo vai para o
+  primário.
+
+SELECTs que precisam do dado mais recente mesmo num GET (ex.: o usuário do
+token) usam `.execution_options(use_primary=True)`.
+"""
+import asyncio
+import hashlib
+import itertools
+import logging
+import math
+import time
+from typing import Optional
+from sqlalchemy import text
+from starlette.datastructures import Headers, MutableHeaders
+from config import (
+    REPLICA_CHECK_INTERVAL,
+    REPLICA_MAX_LAG_SECONDS,
+    REPLICA_RETRY_SECONDS,
+    REPLICA_STICKY_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+READ_METHODS = frozenset({"GET", "HEAD"})
+STICKY_COOKIE = "nexus_primary_until"
+REPLICA_KEY = "read_replica"  # chave em `session.info` com a réplica da requisição
+USE_PRIMARY = "use_primary"   # execution option que força o primário num SELECT
+
+# Atraso em segundos (0 fora de recuperação ou com todo o WAL recebido já aplicado)
+_LAG_SQL = {
+    "postgresql": (
+        "SELECT CASE WHEN NOT pg_is_in_recovery() "
+        "OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+        "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+    ),
+}
+_DEFAULT_LAG_SQL = "SELECT 0"  # SQLite e outros: só confirma que a réplica responde
+
+
+class Replica:
+    """Uma réplica e o estado visto pelo monitor e pelo failover."""
+
+    def __init__(self, name: str, engine):
+        self.name = name
+        self.engine = engine
+        self.lag: Optional[float] = None  # segundos, na última checagem (None = ainda não checada)
+        self.down_until = 0.0             # time.monotonic() até quando fica fora do rodízio
+        self.error: Optional[str] = None
+
+    def available(self, now: float) -> bool:
+        return now >= self.down_until and (self.lag is None or self.lag <= REPLICA_MAX_LAG_SECONDS)
+
+
+class ReplicaSet:
+    """Réplicas configuradas, rodízio entre as saudáveis e contadores do roteamento."""
+
+    def __init__(self, engines):
+        self.replicas = [Replica(str(index), engine) for index, engine in enumerate(engines)]
+        self._next = itertools.count()
+        self._monitor: Optional[asyncio.Task] = None
+        self.reads_replica = 0
+        self.reads_primary = 0
+        self.fallbacks = 0
+
+    def __bool__(self) -> bool:
+        return bool(self.replicas)
+
+    def choose(self) -> Optional[Replica]:
+        now = time.monotonic()
+        healthy = [replica for replica in self.replicas if replica.available(now)]
+        if not healthy:
+            return None
+        return healthy[next(self._next) % len(healthy)]
+
+    def mark_down(self, replica: Replica, error: BaseException):
+        replica.down_until = time.monotonic() + REPLICA_RETRY_SECONDS
+        replica.error = f"{type(error).__name__}: {error}"
+        logger.warning("Réplica %s fora do rodízio por %ss: %s", replica.name, REPLICA_RETRY_SECONDS, replica.error)
+
+    async def route(self, db, request):
+        """Liga a sessão de uma leitura a uma réplica saudável; nos demais casos ela fica no primário."""
+        if request.method not in READ_METHODS:
+            return
+        replica = self.choose() if reads_from_replica(request) else None
+        if replica is None:
+            self.reads_primary += 1
+            return
+        try:
+            # Abre (e testa, com o pre-ping do pool) a conexão agora: se a réplica
+            # caiu, a requisição ainda pode seguir inteira no primário
+            await db.connection(bind_arguments={"bind": replica.engine.sync_engine})
+        except Exception as e:  # driver, rede ou timeout: qualquer falha ao conectar
+            self.mark_down(replica, e)
+            self.fallbacks += 1
+            self.reads_primary += 1
+            await db.rollback()
+            return
+        db.info[REPLICA_KEY] = replica
+        self.reads_replica += 1
+
+    async def check(self, replica: Replica):
+        try:
+            async with replica.engine.connect() as conn:
+                lag = await conn.scalar(text(_LAG_SQL.get(conn.dialect.name, _DEFAULT_LAG_SQL)))
+        except Exception as e:
+            replica.lag = None
+            self.mark_down(replica, e)
+            return
+        replica.lag = float(lag or 0)
+        replica.down_until = 0.0
+        replica.error = None
+        if replica.lag > REPLICA_MAX_LAG_SECONDS:
+            logger.warning("Réplica %s com %.1fs de atraso: leituras no primário", replica.name, replica.lag)
+
+    async def _run_monitor(self):
+        while True:
+            await asyncio.gather(*(self.check(replica) for replica in self.replicas))
+            await asyncio.sleep(REPLICA_CHECK_INTERVAL)
+
+    def start_monitor(self):
+        if self.replicas and REPLICA_CHECK_INTERVAL > 0 and self._monitor is None:
+            self._monitor = asyncio.get_running_loop().create_task(self._run_monitor())
+
+    async def stop_monitor(self):
+        if self._monitor is not None:
+            self._monitor.cancel()
+            try:
+                await self._monitor
+            except asyncio.CancelledError:
+                pass
+            self._monitor = None
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+    def status(self) -> dict:
+        now = time.monotonic()
+        return {
+            "reads_replica": self.reads_replica,
+            "reads_primary": self.reads_primary,
+            "fallbacks": self.fallbacks,
+            "replicas": [
+                {
+                    "replica": replica.name,
+                    "url": replica.engine.url.render_as_string(hide_password=True),
+                    "available": replica.available(now),
+                    "lag_seconds": replica.lag,
+                    "retry_in_seconds": round(max(replica.down_until - now, 0.0), 1),
+                    "error": replica.error,
+                }
+                for replica in self.replicas
+            ],
+        }
+
+
+class RecentWriters:
+    """Tokens que escreveram há pouco, neste worker: as leituras deles ficam no primário."""
+
+    MAX_ENTRIES = 10_000
+
+    def __init__(self):
+        self._until = {}
+
+    @staticmethod
+    def _key(authorization: str) -> str:
+        return hashlib.sha256(authorization.encode()).hexdigest()
+
+    def mark(self, authorization: str):
+        now = time.monotonic()
+        if len(self._until) >= self.MAX_ENTRIES:
+            self._until = {key: until for key, until in self._until.items() if until > now}
+        self._until[self._key(authorization)] = now + REPLICA_STICKY_SECONDS
+
+    def is_recent(self, authorization: str) -> bool:
+        until = self._until.get(self._key(authorization))
+        return until is not None and until > time.monotonic()
+
+
+recent_writers = RecentWriters()
+
+
+def reads_from_replica(request) -> bool:
+    """A requisição pode ler de uma réplica? Só leituras de quem não escreveu há pouco."""
+    if request.method not in READ_METHODS:
+        return False
+    authorization = request.headers.get("authorization")
+    if authorization and recent_writers.is_recent(authorization):
+        return False
+    try:
+        return float(request.cookies.get(STICKY_COOKIE, 0)) <= time.time()
+    except ValueError:
+        return True
+
+
+class ReadYourWritesMiddleware:
+    """Marca o autor de cada escrita bem-sucedida (token e cookie) para ler do primário em seguida."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in READ_METHODS or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_marking(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                authorization = Headers(scope=scope).get("authorization")
+                if authorization:
+                    recent_writers.mark(authorization)
+                until = math.ceil(time.time() + REPLICA_STICKY_SECONDS)
+                MutableHeaders(scope=message).append(
+                    "set-cookie",
+                    f"{STICKY_COOKIE}={until}; Max-Age={math.ceil(REPLICA_STICKY_SECONDS)}; Path=/; HttpOnly; SameSite=Lax",
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_marking)
@@ -1,48 +1,70 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Form
 from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-from jose import JWTError, jwt
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
 
 from database import get_db
 from models.usuario import UsuarioModel, UsuarioCreate, UsuarioRead
-from auth.utils import verify_password, hash_password, create_access_token, ALGORITHM
+from auth.utils import create_access_token, ALGORITHM
+from auth.password_pool import PasswordPoolSaturated, password_pool
+from auth.principal import Principal, principal_cache
 from config import SECRET_KEY
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
 
+def _login_overloaded() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Muitas autenticações simultâneas. Tente novamente em instantes.",
+        headers={"Retry-After": "1"},
+    )
+
+
 @router.post("/users/", response_model=UsuarioRead, status_code=status.HTTP_201_CREATED)
-def create_user(user_in: UsuarioCreate, db: Session = Depends(get_db)):
+async def create_user(user_in: UsuarioCreate, db: AsyncSession = Depends(get_db)):
     # Verifica usuario existente por nome ou email
-    exists = db.query(UsuarioModel).filter((UsuarioModel.nome == user_in.nome) | (UsuarioModel.email == user_in.email)).first()
+    exists = await db.scalar(select(UsuarioModel).where((UsuarioModel.nome == user_in.nome) | (UsuarioModel.email == user_in.email)).limit(1))
     if exists:
         raise HTTPException(status_code=400, detail="Usuário ou email já cadastrado")
 
-    hashed = hash_password(user_in.password)
+    # Devolve a conexão ao pool antes do bcrypt (~250ms de CPU)
+    await db.close()
+    try:
+        hashed = await password_pool.hash_password(user_in.password)
+    except PasswordPoolSaturated:
+        raise _login_overloaded()
     user = UsuarioModel(
         nome=user_in.nome,
         email=user_in.email,
         hashed_password=hashed
     )
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
     return user
 
 
 @router.post("/token")
-def login_for_access_token(
+async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
     remember: str | None = Form(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     # form_data.username corresponde ao campo `nome` no model
-    user = db.query(UsuarioModel).filter((UsuarioModel.nome == form_data.username) | (UsuarioModel.email == form_data.username)).first()
+    user = await db.scalar(select(UsuarioModel).where((UsuarioModel.nome == form_data.username) | (UsuarioModel.email == form_data.username)).limit(1))
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Credenciais inválidas")
-    if not verify_password(form_data.password, user.hashed_password):
+
+    # Devolve a conexão ao pool antes do bcrypt (~250ms de CPU)
+    await db.close()
+    try:
+        valid = await password_pool.verify_password(form_data.password, user.hashed_password)
+    except PasswordPoolSaturated:
+        raise _login_overloaded()
+    if not valid:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Credenciais inválidas")
 
     # Se o usuário marcou "Lembrar", aumenta a validade do token (ex.: 30 dias)
@@ -59,7 +81,14 @@ def login_for_access_token(
     return {"access_token": token, "token_type": "bearer"}
 
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> UsuarioModel:
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> Principal:
+    # Caminho quente: token já verificado e usuário já carregado por este worker
+    principal = principal_cache.get(token)
+    if principal is not None:
+        return principal
+
+    from jose import JWTError, jwt  # importado no primeiro uso (inicialização mais rápida)
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Não foi possível validar as credenciais",
@@ -73,12 +102,21 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     except JWTError:
         raise credentials_exception
 
-    user = db.query(UsuarioModel).filter(UsuarioModel.id_usuario == sub).first()
+    # Sempre no primário: um usuário recém-criado pode ainda não estar na réplica
+    user = await db.scalar(
+        select(UsuarioModel).where(UsuarioModel.id_usuario == sub).execution_options(use_primary=True)
+    )
     if not user:
         raise credentials_exception
-    return user
+
+    principal = Principal.from_user(user, payload)
+    principal_cache.put(token, principal)
+    return principal
 
 
 @router.get("/me", response_model=UsuarioRead)
-def read_me(current_user: UsuarioModel = Depends(get_current_user)):
-    return current_user
+async def read_me(current_user: Principal = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    user = await db.get(UsuarioModel, current_user.id_usuario)
+    if not user:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Usuário não encontrado.")
+    return user
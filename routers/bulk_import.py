@@ -0,0 +1,171 @@
+# ------------------------------------------------------------------
+# IMPORTAÇÃO EM LOTE (JSON OU CSV) DE ENTIDADES COM ENDEREÇO
+# ------------------------------------------------------------------
+import csv
+import io
+import uuid
+from datetime import datetime
+from fastapi import HTTPException, Request, status
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import BULK_IMPORT_CHUNK_SIZE, BULK_IMPORT_MAX_ROWS
+from entity_versions import touch
+from models.endereco import EnderecoBase, EnderecoModel
+from models.importacao import BulkImportResult, BulkRowError
+
+ADDRESS_FIELDS = tuple(EnderecoBase.model_fields)
+
+# Documenta no OpenAPI os dois formatos aceitos pelas rotas /bulk
+BULK_OPENAPI_EXTRA = {
+    "requestBody": {
+        "content": {
+            "application/json": {"schema": {"type": "array", "items": {"type": "object"}}},
+            "text/csv": {"schema": {"type": "string"}},
+            "multipart/form-data": {
+                "schema": {"type": "object", "properties": {"file": {"type": "string", "format": "binary"}}}
+            },
+        },
+        "required": True,
+    }
+}
+
+
+def _csv_rows(text: str) -> list:
+    """Converte o CSV (colunas da entidade + colunas do endereço) no formato aninhado do JSON."""
+    rows = []
+    for record in csv.DictReader(io.StringIO(text)):
+        values = {
+            key.strip(): (value.strip() if value and value.strip() else None)
+            for key, value in record.items() if key
+        }
+        values["endereco_obj"] = {field: values.pop(field, None) for field in ADDRESS_FIELDS}
+        rows.append(values)
+    return rows
+
+
+async def read_bulk_rows(request: Request) -> list:
+    """Lê os registros da requisição: array JSON, corpo text/csv ou upload multipart (campo `file`)."""
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Envie o CSV no campo 'file'.")
+        rows = _csv_rows((await upload.read()).decode("utf-8-sig"))
+    elif content_type.startswith("text/csv"):
+        rows = _csv_rows((await request.body()).decode("utf-8-sig"))
+    else:
+        try:
+            rows = await request.json()
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Corpo JSON inválido.")
+        if not isinstance(rows, list):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Envie um array JSON de registros.")
+
+    if len(rows) > BULK_IMPORT_MAX_ROWS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Máximo de {BULK_IMPORT_MAX_ROWS} registros por importação.",
+        )
+    return rows
+
+
+def _validation_detail(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in error.errors())
+
+
+def _build_rows(chunk, model, user_id):
+    """Monta os valores de endereço e entidade com IDs gerados no cliente (sem RETURNING)."""
+    pk_name = model.__mapper__.primary_key[0].key
+    now = datetime.now()
+    enderecos, entidades = [], []
+    for _, item in chunk:
+        id_endereco = uuid.uuid4()
+        enderecos.append({
+            **item.endereco_obj.model_dump(),
+            "id_endereco": id_endereco,
+            "user_id": user_id,
+            "data_criacao": now,
+        })
+        entidades.append({
+            **item.model_dump(exclude={"endereco_obj"}),
+            pk_name: uuid.uuid4(),
+            "id_endereco": id_endereco,
+            "user_id": user_id,
+            "data_criacao": now,
+        })
+    return enderecos, entidades
+
+
+async def bulk_import_with_address(db: AsyncSession, rows: list, schema, model, user_id) -> BulkImportResult:
+    """Valida e insere registros (entidade + endereço) em lotes transacionais.
+
+    Cada lote executa um SELECT para detectar e-mails já cadastrados e um INSERT
+    em lote (executemany, com a instrução compilada em cache) por tabela.
+    Registros inválidos ou duplicados são reportados individualmente sem abortar
+    os demais; se um lote ainda assim violar uma restrição (ex.: inserção
+    concorrente), ele é refeito linha a linha.
+    """
+    errors = []
+    valid = []
+    seen_emails = set()
+    for row_number, raw in enumerate(rows, start=1):
+        email = raw.get("email") if isinstance(raw, dict) else None
+        try:
+            item = schema.model_validate(raw)
+        except ValidationError as e:
+            errors.append(BulkRowError(row=row_number, email=email, detail=_validation_detail(e)))
+            continue
+        if item.email in seen_emails:
+            errors.append(BulkRowError(row=row_number, email=item.email, detail="E-mail duplicado na importação."))
+            continue
+        seen_emails.add(item.email)
+        valid.append((row_number, item))
+
+    inserted = 0
+    for start in range(0, len(valid), BULK_IMPORT_CHUNK_SIZE):
+        chunk = valid[start:start + BULK_IMPORT_CHUNK_SIZE]
+
+        existing = set(await db.scalars(select(model.email).where(model.email.in_([item.email for _, item in chunk]))))
+        if existing:
+            for row_number, item in chunk:
+                if item.email in existing:
+                    errors.append(BulkRowError(row=row_number, email=item.email, detail="E-mail já cadastrado."))
+            chunk = [(row_number, item) for row_number, item in chunk if item.email not in existing]
+        if not chunk:
+            await db.rollback()
+            continue
+
+        enderecos, entidades = _build_rows(chunk, model, user_id)
+        try:
+            await db.execute(insert(EnderecoModel), enderecos)
+            await db.execute(insert(model), entidades)
+            touch(db, user_id, EnderecoModel.__tablename__, model.__tablename__)
+            await db.commit()
+            inserted += len(chunk)
+        except IntegrityError:
+            await db.rollback()
+            inserted += await _insert_row_by_row(db, chunk, enderecos, entidades, model, errors)
+
+    errors.sort(key=lambda error: error.row)
+    return BulkImportResult(received=len(rows), inserted=inserted, errors=errors)
+
+
+async def _insert_row_by_row(db: AsyncSession, chunk, enderecos, entidades, model, errors) -> int:
+    """Caminho lento: isola cada registro num SAVEPOINT para apontar quais violam restrições."""
+    inserted = 0
+    for (row_number, item), endereco, entidade in zip(chunk, enderecos, entidades):
+        try:
+            async with db.begin_nested():
+                await db.execute(insert(EnderecoModel).values(endereco))
+                await db.execute(insert(model).values(entidade))
+            inserted += 1
+        except IntegrityError as e:
+            detail = "E-mail já cadastrado." if "email" in str(e.orig).lower() else f"Violação de restrição: {e.orig}"
+            errors.append(BulkRowError(row=row_number, email=item.email, detail=detail))
+    if inserted:
+        touch(db, entidades[0]["user_id"], EnderecoModel.__tablename__, model.__tablename__)
+    await db.commit()
+    return inserted
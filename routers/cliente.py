@@ -1,128 +1,235 @@
 # ------------------------------------------------------------------
 # ROTAS CRUD: CLIENTES (Inclui Endereço)
 # ------------------------------------------------------------------
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from typing import List, Literal, Optional
 from models.cliente import ClienteModel
-from models.cliente import ClienteCreate, ClienteRead
+from models.cliente import ClienteCreate, ClienteRead, ClienteBulkDelete, ClienteDeleteResult
 from models.endereco import EnderecoModel
+from models.servico_projeto import ServicoProjetoModel
+from models.itens_infraestrutura import InfraestruturaItemModel
+from models.importacao import BulkImportResult
 from database import get_db
-from models.usuario import UsuarioModel
+from auth.principal import Principal
 from .auth import get_current_user
+from .pagination import PageParams, apply_keyset, finish_page
+from .serialization import list_response
+from .conditional import conditional_get
+from .bulk_import import BULK_OPENAPI_EXTRA, bulk_import_with_address, read_bulk_rows
+from .writes import attach, delete_unused_enderecos, delete_where, insert_returning, update_returning
+from query_budget import query_budget
+from entity_versions import touch
+from audit import audit_trail
 import uuid
 
 
 router = APIRouter(prefix="/clientes", tags=["Clientes"])
 
-@router.get("", response_model=List[ClienteRead], summary="Lista todos os Clientes")
-def read_clientes(db: Session = Depends(get_db), current_user: UsuarioModel = Depends(get_current_user)):
-    """ Lista todos os clientes """
-    clientes = db.query(ClienteModel).filter(ClienteModel.user_id == current_user.id_usuario).all()
-    return clientes
+# Tabelas exibidas nas leituras de clientes (base do ETag)
+read_etag = conditional_get("clientes", "enderecos")
 
+# Estratégias de carregamento alinhadas ao ClienteRead (evita N+1 em endereco_obj)
+def cliente_read_options():
+    return (joinedload(ClienteModel.endereco_obj),)
 
-@router.get("/{cliente_id}", response_model=ClienteRead, summary="Busca um Cliente por ID")
-def read_cliente(cliente_id: uuid.UUID, db: Session = Depends(get_db), current_user: UsuarioModel = Depends(get_current_user)):
+
+async def _get_cliente(db: AsyncSession, cliente_id: uuid.UUID, user_id: uuid.UUID):
+    """Carrega um cliente do usuário já com os relacionamentos do ClienteRead."""
+    return await db.scalar(
+        select(ClienteModel).options(*cliente_read_options()).where(
+            ClienteModel.id_cliente == cliente_id,
+            ClienteModel.user_id == user_id
+        )
+    )
+
+
+@router.get("", response_model=List[ClienteRead], summary="Lista os Clientes (paginado por cursor)", dependencies=[Depends(query_budget(3)), Depends(read_etag)])
+async def read_clientes(
+    response: Response,
+    segmento: Optional[str] = Query(None),
+    status_relacionamento: Optional[str] = Query(None),
+    sort: Literal["nome", "email"] = Query("nome", description="Campo de ordenação"),
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """ Lista os clientes, uma página por vez. O cursor da próxima página vem no cabeçalho X-Next-Cursor """
+    query = select(ClienteModel).options(*cliente_read_options()).where(ClienteModel.user_id == current_user.id_usuario)
+    if segmento is not None:
+        query = query.filter(ClienteModel.segmento == segmento)
+    if status_relacionamento is not None:
+        query = query.filter(ClienteModel.status_relacionamento == status_relacionamento)
+
+    sort_column = getattr(ClienteModel, sort)
+    clientes = (await db.scalars(apply_keyset(query, sort_column, ClienteModel.id_cliente, page))).all()
+    clientes = finish_page(clientes, sort_column, ClienteModel.id_cliente, page, response)
+    return list_response(ClienteRead, clientes, response)
+
+
+@router.get("/{cliente_id}", response_model=ClienteRead, summary="Busca um Cliente por ID", dependencies=[Depends(query_budget(3)), Depends(read_etag)])
+async def read_cliente(cliente_id: uuid.UUID, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(get_current_user)):
     """ Busca um cliente pelo ID """
     
-    cliente = db.query(ClienteModel).filter(
-        ClienteModel.id_cliente == cliente_id,
-        ClienteModel.user_id == current_user.id_usuario
-    ).first()
+    cliente = await _get_cliente(db, cliente_id, current_user.id_usuario)
     if not cliente:
         raise HTTPException(status_code=404, detail="Cliente não encontrado ou inacessível.")
     return cliente
 
 
-@router.post("", response_model=ClienteRead, status_code=status.HTTP_201_CREATED, summary="Cria um novo Cliente e seu Endereço Principal")
-def create_cliente(cliente: ClienteCreate, db: Session = Depends(get_db), current_user: UsuarioModel = Depends(get_current_user)):
+@router.post("", response_model=ClienteRead, status_code=status.HTTP_201_CREATED, summary="Cria um novo Cliente e seu Endereço Principal", dependencies=[Depends(query_budget(4))])
+async def create_cliente(cliente: ClienteCreate, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(get_current_user)):
     """ Cria um novo cliente junto com seu endereço principal """
     try:
-        # 1. Cria o Endereço (se fornecido)
+        # 1. Cria o Endereço (INSERT ... RETURNING, ID gerado no Python: sem flush)
         endereco_data = cliente.endereco_obj.model_dump()
-        novo_endereco = EnderecoModel(
-            **endereco_data,
-            user_id=current_user.id_usuario
-        )
-        db.add(novo_endereco)
-        db.flush() 
+        novo_endereco = await insert_returning(db, EnderecoModel, {**endereco_data, "user_id": current_user.id_usuario})
 
-        # 2. Cria o Cliente
+        # 2. Cria o Cliente já apontando para o endereço
         cliente_data = cliente.model_dump(exclude={"endereco_obj"})
-        novo_cliente = ClienteModel(
+        novo_cliente = await insert_returning(db, ClienteModel, {
             **cliente_data,
-            user_id=current_user.id_usuario,
-            id_endereco=novo_endereco.id_endereco
-        )
-        db.add(novo_cliente)
-        db.commit()
-        db.refresh(novo_cliente)
+            "user_id": current_user.id_usuario,
+            "id_endereco": novo_endereco.id_endereco,
+        })
+        await db.commit()
+        audit_trail.record(current_user.id_usuario, "create", ClienteModel.__tablename__, novo_cliente.id_cliente)
 
-        return novo_cliente
+        return attach(novo_cliente, endereco_obj=novo_endereco)
 
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         if "duplicate key value violates unique constraint" in str(e):
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Erro: O email fornecido já está cadastrado.")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Erro ao adicionar cliente: {e}")
 
 
-@router.put("/{cliente_id}", response_model=ClienteRead, summary="Atualiza um Cliente existente")
-def update_cliente(cliente_id: uuid.UUID, cliente: ClienteCreate, db: Session = Depends (get_db), current_user: UsuarioModel = Depends(get_current_user)):
+@router.post("/bulk", response_model=BulkImportResult, summary="Importa clientes em lote (JSON ou CSV)", openapi_extra=BULK_OPENAPI_EXTRA)
+async def bulk_import_clientes(request: Request, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(get_current_user)):
+    """ Importa milhares de clientes com seus endereços em lotes transacionais.
+
+    Aceita um array JSON no formato do POST individual, um corpo text/csv ou um
+    upload multipart (campo `file`) com as colunas da entidade e do endereço.
+    Registros inválidos ou com e-mail duplicado são reportados em `errors` sem
+    interromper a importação dos demais.
+    """
+    rows = await read_bulk_rows(request)
+    result = await bulk_import_with_address(db, rows, ClienteCreate, ClienteModel, current_user.id_usuario)
+    if result.inserted:
+        audit_trail.record(current_user.id_usuario, "create", ClienteModel.__tablename__, detalhe=f"importação em lote: {result.inserted} cliente(s)")
+    return result
+
+
+@router.put("/{cliente_id}", response_model=ClienteRead, summary="Atualiza um Cliente existente", dependencies=[Depends(query_budget(4))])
+async def update_cliente(cliente_id: uuid.UUID, cliente: ClienteCreate, db: AsyncSession = Depends (get_db), current_user: Principal = Depends(get_current_user)):
     """ Atualiza os dados de um cliente existente, incluindo seu endereço principal """
-    
-    cliente_db = db.query(ClienteModel).filter(
-        ClienteModel.id_cliente == cliente_id,
-        ClienteModel.user_id == current_user.id_usuario
-    ).first()
-    
-    if not cliente_db:
-        raise HTTPException(status_code=404, detail="Cliente não encontrado ou inacessível.")
-    
     try:
-        # 1. Atualiza o Endereço (se fornecido)
-        if cliente.endereco_obj:
-            endereco_data = cliente.endereco_obj.model_dump()
-            endereco_db = db.query(EnderecoModel).filter(
-                EnderecoModel.id_endereco == cliente_db.id_endereco,
-                EnderecoModel.user_id == current_user.id_usuario
-            ).first()
-            for key, value in endereco_data.items():
-                setattr(endereco_db, key, value)
-            db.add(endereco_db)
-
-        # 2. Atualiza o Cliente
+        # 1. Atualiza o Cliente (a posse vai no WHERE; nenhuma linha = não encontrado)
         cliente_data = cliente.model_dump(exclude={"endereco_obj"})
-        for key, value in cliente_data.items():
-            setattr(cliente_db, key, value)
-        db.add(cliente_db)
+        cliente_db = await update_returning(db, ClienteModel, cliente_id, current_user.id_usuario, cliente_data)
+        if not cliente_db:
+            raise HTTPException(status_code=404, detail="Cliente não encontrado ou inacessível.")
 
-        db.commit()
-        db.refresh(cliente_db)
+        # 2. Atualiza o Endereço vinculado
+        endereco_data = cliente.endereco_obj.model_dump()
+        endereco_db = await update_returning(db, EnderecoModel, cliente_db.id_endereco, current_user.id_usuario, endereco_data)
 
-        return cliente_db
+        await db.commit()
+        audit_trail.record(current_user.id_usuario, "update", ClienteModel.__tablename__, cliente_id)
+        return attach(cliente_db, endereco_obj=endereco_db)
 
+    except HTTPException:
+        await db.rollback()
+        raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Erro ao atualizar cliente: {e}")
 
 
-@router.delete("/{cliente_id}", status_code=status.HTTP_204_NO_CONTENT, summary="Deleta um Cliente existente")
-def delete_cliente(cliente_id: uuid.UUID, db: Session = Depends (get_db), current_user: UsuarioModel = Depends(get_current_user)):
-    """ Deleta um cliente existente """
-    
-    cliente_db = db.query(ClienteModel).filter(
-        ClienteModel.id_cliente == cliente_id,
-        ClienteModel.user_id == current_user.id_usuario
-    ).first()
-    
-    if not cliente_db:
-        raise HTTPException(status_code=404, detail="Cliente não encontrado ou inacessível.")
-    
+async def _delete_clientes(db: AsyncSession, user_id: uuid.UUID, *criteria) -> ClienteDeleteResult:
+    """Remove os clientes selecionados com seus itens, projetos e endereços, por conjunto.
+
+    São cinco instruções na transação corrente, qualquer que seja o número de
+    clientes. Itens e projetos saem antes, pela mesma subconsulta de seleção, e
+    itens de outros clientes perdem o vínculo com os projetos removidos: as FKs
+    têm ON DELETE CASCADE/SET NULL, mas o SQLite só as aplica com PRAGMA
+    foreign_keys, e assim as versões dos ETags de cada tabela são incrementadas.
+    """
+    selecionados = select(ClienteModel.id_cliente).where(ClienteModel.user_id == user_id, *criteria)
+    itens = await delete_where(db, InfraestruturaItemModel, user_id, InfraestruturaItemModel.id_cliente.in_(selecionados))
+    projetos_removidos = select(ServicoProjetoModel.id_servico).where(
+        ServicoProjetoModel.user_id == user_id, ServicoProjetoModel.id_cliente.in_(selecionados),
+    )
+    desvinculados = await db.execute(
+        update(InfraestruturaItemModel)
+        .where(InfraestruturaItemModel.user_id == user_id, InfraestruturaItemModel.id_servico.in_(projetos_removidos))
+        .values(id_servico=None)
+        .execution_options(synchronize_session=False)
+    )
+    if desvinculados.rowcount:
+        touch(db, user_id, InfraestruturaItemModel.__tablename__)
+    projetos = await delete_where(db, ServicoProjetoModel, user_id, ServicoProjetoModel.id_cliente.in_(selecionados))
+
+    removidos = (await db.execute(
+        delete(ClienteModel)
+        .where(ClienteModel.user_id == user_id, *criteria)
+        .returning(ClienteModel.id_endereco)
+        .execution_options(synchronize_session=False)
+    )).scalars().all()
+    if removidos:
+        touch(db, user_id, ClienteModel.__tablename__)
+    enderecos = await delete_unused_enderecos(db, user_id, removidos)
+    return ClienteDeleteResult(clientes=len(removidos), projetos=projetos, itens_infraestrutura=itens, enderecos=enderecos)
+
+
+def _removed_summary(result: ClienteDeleteResult) -> str:
+    return (
+        f"{result.clientes} cliente(s), {result.projetos} projeto(s), "
+        f"{result.itens_infraestrutura} item(ns) de infraestrutura"
+    )
+
+
+@router.delete("", response_model=ClienteDeleteResult, summary="Remove clientes em lote (por IDs e/ou filtro)", dependencies=[Depends(query_budget(7))])
+async def bulk_delete_clientes(selection: ClienteBulkDelete, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(get_current_user)):
+    """ Remove, numa única transação, os clientes em `ids` e/ou que atendem ao filtro (segmento, status).
+
+    Os critérios informados se combinam (ex.: IDs de um segmento). Projetos,
+    itens de infraestrutura e endereços dos clientes saem junto; IDs de outros
+    usuários são ignorados. As contagens removidas vêm na resposta.
+    """
+    criteria = []
+    if selection.ids:
+        criteria.append(ClienteModel.id_cliente.in_(selection.ids))
+    if selection.segmento is not None:
+        criteria.append(ClienteModel.segmento == selection.segmento)
+    if selection.status_relacionamento is not None:
+        criteria.append(ClienteModel.status_relacionamento == selection.status_relacionamento)
+
+    try:
+        result = await _delete_clientes(db, current_user.id_usuario, *criteria)
+        await db.commit()
+        if result.clientes:
+            audit_trail.record(current_user.id_usuario, "delete", ClienteModel.__tablename__, detalhe=f"remoção em lote: {_removed_summary(result)}")
+        return result
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Erro ao remover clientes: {e}")
+
+
+@router.delete("/{cliente_id}", status_code=status.HTTP_204_NO_CONTENT, summary="Deleta um Cliente existente", dependencies=[Depends(query_budget(7))])
+async def delete_cliente(cliente_id: uuid.UUID, db: AsyncSession = Depends (get_db), current_user: Principal = Depends(get_current_user)):
+    """ Deleta um cliente existente, com seus projetos, itens de infraestrutura e endereço """
     try:
-        db.delete(cliente_db)
-        db.commit()
+        result = await _delete_clientes(db, current_user.id_usuario, ClienteModel.id_cliente == cliente_id)
+        if not result.clientes:
+            raise HTTPException(status_code=404, detail="Cliente não encontrado ou inacessível.")
+        await db.commit()
+        audit_trail.record(current_user.id_usuario, "delete", ClienteModel.__tablename__, cliente_id, detalhe=_removed_summary(result))
+    except HTTPException:
+        await db.rollback()
+        raise
     except Exception as e:
-        db.rollback()
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Erro ao deletar cliente: {e}")
\ No newline at end of file
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Erro ao deletar cliente: {e}")
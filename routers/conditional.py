@@ -0,0 +1,60 @@
+# ------------------------------------------------------------------
+# GET CONDICIONAL (ETag / If-None-Match) COMPARTILHADO PELAS LEITURAS
+# ------------------------------------------------------------------
+import hashlib
+from fastapi import Depends, HTTPException, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_db
+from auth.principal import Principal
+from entity_versions import read_versions
+from .auth import get_current_user
+
+# Revalida sempre, mas permite ao navegador reaproveitar o corpo quando a resposta é 304
+CACHE_CONTROL = "private, no-cache"
+
+
+def compute_etag(user_id, request: Request, versions: dict) -> str:
+    """ETag fraco: usuário, URL (caminho + filtros/cursor) e versões das tabelas lidas.
+
+    Fraco porque identifica o conteúdo, não os bytes: a mesma resposta pode sair
+    comprimida ou não (GZipMiddleware) com o mesmo ETag.
+    """
+    key = "|".join([
+        str(user_id),
+        request.url.path,
+        "&".join(sorted(f"{k}={v}" for k, v in request.query_params.multi_items())),
+        *(f"{table}:{version}" for table, version in sorted(versions.items())),
+    ])
+    return 'W/"' + hashlib.sha256(key.encode()).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Comparação fraca do If-None-Match (RFC 9110): ignora o prefixo W/ e aceita '*'."""
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    etag = etag.removeprefix("W/")
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def conditional_get(*tables: str):
+    """Dependência das rotas GET: responde 304 se nada mudou, senão publica o ETag.
+
+    `tables` são todas as tabelas cujo conteúdo aparece na resposta (inclusive as
+    de relacionamentos serializados). As versões são lidas antes das linhas, então
+    uma escrita concorrente no máximo gera um ETag antigo para dados novos, o que
+    só custa uma resposta 200 a mais na revalidação seguinte.
+    """
+    async def dependency(
+        request: Request,
+        response: Response,
+        db: AsyncSession = Depends(get_db),
+        current_user: Principal = Depends(get_current_user),
+    ):
+        versions = await read_versions(db, current_user.id_usuario, tables)
+        etag = compute_etag(current_user.id_usuario, request, versions)
+        headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and etag_matches(if_none_match, etag):
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        response.headers.update(headers)
+
+    return dependency
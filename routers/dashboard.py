@@ -0,0 +1,110 @@
+# ------------------------------------------------------------------
+# ROTAS: DASHBOARD (AGREGADOS CALCULADOS NO BANCO)
+# ------------------------------------------------------------------
+from datetime import datetime, timedelta
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_db
+from auth.principal import Principal
+from .auth import get_current_user
+from query_budget import query_budget
+from models.cliente import ClienteModel
+from models.desenvolvedor import DesenvolvedorModel
+from models.itens_infraestrutura import InfraestruturaItemModel
+from models.servico_projeto import ServicoProjetoModel
+from models.dashboard import (
+    ClientesResumo,
+    DashboardSummary,
+    DesenvolvedoresResumo,
+    InfraResumo,
+    ProjetosResumo,
+)
+
+router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
+
+
+def _key(value) -> str:
+    return value if value is not None else "N/A"
+
+
+def _count_if(condition):
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+
+async def _projetos_resumo(db: AsyncSession, user_id) -> ProjetosResumo:
+    rows = (await db.execute(
+        select(
+            ServicoProjetoModel.status_projeto,
+            func.count(),
+            func.sum(ServicoProjetoModel.orcamento),
+            func.count(ServicoProjetoModel.orcamento),
+        )
+        .where(ServicoProjetoModel.user_id == user_id)
+        .group_by(ServicoProjetoModel.status_projeto)
+    )).all()
+
+    # Totais derivados dos grupos: a média considera só projetos com orçamento
+    orcamento_total = sum(float(soma or 0) for _, _, soma, _ in rows)
+    com_orcamento = sum(quantidade for _, _, _, quantidade in rows)
+    return ProjetosResumo(
+        total=sum(total for _, total, _, _ in rows),
+        por_status={_key(status_projeto): total for status_projeto, total, _, _ in rows},
+        orcamento_total=round(orcamento_total, 2),
+        orcamento_medio=round(orcamento_total / com_orcamento, 2) if com_orcamento else None,
+    )
+
+
+async def _infra_resumo(db: AsyncSession, user_id, dias: int) -> InfraResumo:
+    agora = datetime.now()
+    expiracao = InfraestruturaItemModel.data_expiracao
+    total, criticos, expirados, expirando = (await db.execute(
+        select(
+            func.count(),
+            _count_if(InfraestruturaItemModel.is_critico.is_(True)),
+            _count_if(expiracao < agora),
+            _count_if(expiracao.between(agora, agora + timedelta(days=dias))),
+        )
+        .where(InfraestruturaItemModel.user_id == user_id)
+    )).one()
+    return InfraResumo(total=total, criticos=criticos, expirados=expirados, expirando=expirando, dias_expiracao=dias)
+
+
+async def _clientes_resumo(db: AsyncSession, user_id) -> ClientesResumo:
+    rows = (await db.execute(
+        select(ClienteModel.status_relacionamento, ClienteModel.segmento, func.count())
+        .where(ClienteModel.user_id == user_id)
+        .group_by(ClienteModel.status_relacionamento, ClienteModel.segmento)
+    )).all()
+
+    por_status, por_segmento = {}, {}
+    for status_relacionamento, segmento, total in rows:
+        por_status[_key(status_relacionamento)] = por_status.get(_key(status_relacionamento), 0) + total
+        por_segmento[_key(segmento)] = por_segmento.get(_key(segmento), 0) + total
+    return ClientesResumo(total=sum(por_status.values()), por_status=por_status, por_segmento=por_segmento)
+
+
+async def _desenvolvedores_resumo(db: AsyncSession, user_id) -> DesenvolvedoresResumo:
+    rows = (await db.execute(
+        select(DesenvolvedorModel.tipo_contrato, func.count())
+        .where(DesenvolvedorModel.user_id == user_id)
+        .group_by(DesenvolvedorModel.tipo_contrato)
+    )).all()
+    por_tipo_contrato = {_key(tipo_contrato): total for tipo_contrato, total in rows}
+    return DesenvolvedoresResumo(total=sum(por_tipo_contrato.values()), por_tipo_contrato=por_tipo_contrato)
+
+
+@router.get("/summary", response_model=DashboardSummary, summary="Resumo agregado para os cards do dashboard", dependencies=[Depends(query_budget(5))])
+async def read_dashboard_summary(
+    dias: int = Query(30, ge=1, le=365, description="Janela, em dias, para os itens de infraestrutura a expirar"),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Contagens e totais do usuário calculados com um GROUP BY por entidade (4 queries, sem carregar registros)"""
+    user_id = current_user.id_usuario
+    return DashboardSummary(
+        projetos=await _projetos_resumo(db, user_id),
+        infra=await _infra_resumo(db, user_id, dias),
+        clientes=await _clientes_resumo(db, user_id),
+        desenvolvedores=await _desenvolvedores_resumo(db, user_id),
+    )
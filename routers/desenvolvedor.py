@@ -1,140 +1,199 @@
 # ------------------------------------------------------------------
 # ROTAS CRUD: DESENVOLVEDORES (Inclui Endereço)
 # ------------------------------------------------------------------
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from typing import List, Literal, Optional
+from sqlalchemy import delete, exists, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 import uuid
 from models.desenvolvedor import DesenvolvedorModel
 from models.desenvolvedor import DesenvolvedorCreate, DesenvolvedorRead
 from models.endereco import EnderecoModel
-from database import get_db
+from models.servico_projeto import ServicoProjetoModel
+from models.itens_infraestrutura import InfraestruturaItemModel
 from models.usuario import UsuarioModel
+from models.importacao import BulkImportResult
+from database import get_db
+from auth.principal import Principal
 from .auth import get_current_user
+from .pagination import PageParams, apply_keyset, finish_page
+from .serialization import list_response
+from .bulk_import import BULK_OPENAPI_EXTRA, bulk_import_with_address, read_bulk_rows
+from query_budget import query_budget
+from .conditional import conditional_get
+from .writes import attach, delete_unused_enderecos, insert_returning, owned, update_returning
+from entity_versions import touch
 
 router = APIRouter(prefix="/desenvolvedores", tags=["Desenvolvedores"])
 
-@router.get("", response_model=List[DesenvolvedorRead], summary="Lista todos os Desenvolvedores")
-def listar_desenvolvedores(db: Session = Depends(get_db), current_user: UsuarioModel = Depends(get_current_user)):
-    """ Lista todos os desenvolvedores """
-    desenvolvedores = db.query(DesenvolvedorModel).filter(DesenvolvedorModel.user_id == current_user.id_usuario).all()
-    return desenvolvedores
+# Tabelas exibidas nas leituras de desenvolvedores (base do ETag)
+read_etag = conditional_get("desenvolvedores", "enderecos")
+
+# Estratégias de carregamento alinhadas ao DesenvolvedorRead (evita N+1 em endereco_obj)
+def desenvolvedor_read_options():
+    return (joinedload(DesenvolvedorModel.endereco_obj),)
 
 
-@router.get("/{dev_id}", response_model=DesenvolvedorRead, summary="Busca um Desenvolvedor por ID")
-def read_desenvolvedor(dev_id: uuid.UUID, db: Session = Depends(get_db), current_user: UsuarioModel = Depends(get_current_user)):
+async def _get_desenvolvedor(db: AsyncSession, dev_id: uuid.UUID, user_id: uuid.UUID):
+    """Carrega um desenvolvedor do usuário já com os relacionamentos do DesenvolvedorRead."""
+    return await db.scalar(
+        select(DesenvolvedorModel).options(*desenvolvedor_read_options()).where(
+            DesenvolvedorModel.id_desenvolvedor == dev_id,
+            DesenvolvedorModel.user_id == user_id
+        )
+    )
+
+
+@router.get("", response_model=List[DesenvolvedorRead], summary="Lista os Desenvolvedores (paginado por cursor)", dependencies=[Depends(query_budget(3)), Depends(read_etag)])
+async def listar_desenvolvedores(
+    response: Response,
+    tipo_contrato: Optional[str] = Query(None),
+    sort: Literal["nome", "email"] = Query("nome", description="Campo de ordenação"),
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """ Lista os desenvolvedores, uma página por vez. O cursor da próxima página vem no cabeçalho X-Next-Cursor """
+    query = select(DesenvolvedorModel).options(*desenvolvedor_read_options()).where(DesenvolvedorModel.user_id == current_user.id_usuario)
+    if tipo_contrato is not None:
+        query = query.filter(DesenvolvedorModel.tipo_contrato == tipo_contrato)
+
+    sort_column = getattr(DesenvolvedorModel, sort)
+    desenvolvedores = (await db.scalars(apply_keyset(query, sort_column, DesenvolvedorModel.id_desenvolvedor, page))).all()
+    desenvolvedores = finish_page(desenvolvedores, sort_column, DesenvolvedorModel.id_desenvolvedor, page, response)
+    return list_response(DesenvolvedorRead, desenvolvedores, response)
+
+
+@router.get("/{dev_id}", response_model=DesenvolvedorRead, summary="Busca um Desenvolvedor por ID", dependencies=[Depends(query_budget(3)), Depends(read_etag)])
+async def read_desenvolvedor(dev_id: uuid.UUID, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(get_current_user)):
     """ Busca um desenvolvedor pelo ID """
     
-    desenvolvedor = db.query(DesenvolvedorModel).filter(
-        DesenvolvedorModel.id_desenvolvedor == dev_id,
-        DesenvolvedorModel.user_id == current_user.id_usuario
-    ).first()
+    desenvolvedor = await _get_desenvolvedor(db, dev_id, current_user.id_usuario)
     if not desenvolvedor:
         raise HTTPException(status_code=404, detail="Desenvolvedor não encontrado ou inacessível.")
     return desenvolvedor
 
 
-@router.post("", response_model=DesenvolvedorRead, status_code=status.HTTP_201_CREATED, summary="Cria um novo Desenvolvedor e seu Endereço Legal")
-def create_desenvolvedor(dev: DesenvolvedorCreate, db: Session = Depends(get_db), current_user: UsuarioModel = Depends(get_current_user)):
+@router.post("", response_model=DesenvolvedorRead, status_code=status.HTTP_201_CREATED, summary="Cria um novo Desenvolvedor e seu Endereço Legal", dependencies=[Depends(query_budget(4))])
+async def create_desenvolvedor(dev: DesenvolvedorCreate, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(get_current_user)):
 
     try:
-        # 1. Cria o Endereço
+        # 1. Cria o Endereço (INSERT ... RETURNING, ID gerado no Python: sem flush)
         endereco_data = dev.endereco_obj.model_dump()
-        novo_endereco = EnderecoModel(
-            **endereco_data,
-            user_id=current_user.id_usuario
-        )
-        db.add(novo_endereco)
-        db.flush() 
+        novo_endereco = await insert_returning(db, EnderecoModel, {**endereco_data, "user_id": current_user.id_usuario})
 
-        # 2. Cria o Desenvolvedor
+        # 2. Cria o Desenvolvedor já apontando para o endereço
         dev_data = dev.model_dump(exclude={"endereco_obj"})
-        novo_desenvolvedor = DesenvolvedorModel(
+        novo_desenvolvedor = await insert_returning(db, DesenvolvedorModel, {
             **dev_data,
-            user_id=current_user.id_usuario,
-            id_endereco=novo_endereco.id_endereco
-        )
-        db.add(novo_desenvolvedor)
-        db.commit()
-        db.refresh(novo_desenvolvedor)
+            "user_id": current_user.id_usuario,
+            "id_endereco": novo_endereco.id_endereco,
+        })
+        await db.commit()
 
-        return novo_desenvolvedor
+        return attach(novo_desenvolvedor, endereco_obj=novo_endereco)
 
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         if "duplicate key value violates unique constraint" in str(e):
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Erro: O email fornecido já está cadastrado.")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Erro interno: {e}")
 
 
-@router.put("/{dev_id}", response_model=DesenvolvedorRead, summary="Atualiza um Desenvolvedor existente")
-def update_desenvolvedor(dev_id: uuid.UUID, dev: DesenvolvedorCreate, db: Session = Depends(get_db), current_user: UsuarioModel = Depends(get_current_user)):
-    """ Atualiza um desenvolvedor existente """
-    desenvolvedor = db.query(DesenvolvedorModel).filter(
-        DesenvolvedorModel.id_desenvolvedor == dev_id,
-        DesenvolvedorModel.user_id == current_user.id_usuario
-    ).first()
-    if not desenvolvedor:
-        raise HTTPException(status_code=404, detail="Desenvolvedor não encontrado ou inacessível.")
+@router.post("/bulk", response_model=BulkImportResult, summary="Importa desenvolvedores em lote (JSON ou CSV)", openapi_extra=BULK_OPENAPI_EXTRA)
+async def bulk_import_desenvolvedores(request: Request, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(get_current_user)):
+    """ Importa milhares de desenvolvedores com seus endereços em lotes transacionais.
 
-    try:
-        # Atualiza o Endereço
-        endereco_data = dev.endereco_obj.model_dump()
-        db.query(EnderecoModel).filter(
-            EnderecoModel.id_endereco == desenvolvedor.id_endereco,
-            EnderecoModel.user_id == current_user.id_usuario
-        ).update(endereco_data)
+    Aceita um array JSON no formato do POST individual, um corpo text/csv ou um
+    upload multipart (campo `file`) com as colunas da entidade e do endereço.
+    Registros inválidos ou com e-mail duplicado são reportados em `errors` sem
+    interromper a importação dos demais.
+    """
+    rows = await read_bulk_rows(request)
+    return await bulk_import_with_address(db, rows, DesenvolvedorCreate, DesenvolvedorModel, current_user.id_usuario)
 
-        # Atualiza o Desenvolvedor
-        dev_data = dev.model_dump(exclude={"endereco_obj"})
-        db.query(DesenvolvedorModel).filter(
-            DesenvolvedorModel.id_desenvolvedor == dev_id,
-            DesenvolvedorModel.user_id == current_user.id_usuario
-        ).update(dev_data)
 
-        db.commit()
+@router.put("/{dev_id}", response_model=DesenvolvedorRead, summary="Atualiza um Desenvolvedor existente", dependencies=[Depends(query_budget(4))])
+async def update_desenvolvedor(dev_id: uuid.UUID, dev: DesenvolvedorCreate, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(get_current_user)):
+    """ Atualiza um desenvolvedor existente """
+    try:
+        # Atualiza o Desenvolvedor (a posse vai no WHERE; nenhuma linha = não encontrado)
+        dev_data = dev.model_dump(exclude={"endereco_obj"})
+        desenvolvedor = await update_returning(db, DesenvolvedorModel, dev_id, current_user.id_usuario, dev_data)
+        if not desenvolvedor:
+            raise HTTPException(status_code=404, detail="Desenvolvedor não encontrado ou inacessível.")
 
-        atualizado_desenvolvedor = db.query(DesenvolvedorModel).filter(
-            DesenvolvedorModel.id_desenvolvedor == dev_id,
-            DesenvolvedorModel.user_id == current_user.id_usuario
-        ).first()
+        # Atualiza o Endereço vinculado
+        endereco_data = dev.endereco_obj.model_dump()
+        endereco = await update_returning(db, EnderecoModel, desenvolvedor.id_endereco, current_user.id_usuario, endereco_data)
 
-        return atualizado_desenvolvedor
+        await db.commit()
+        return attach(desenvolvedor, endereco_obj=endereco)
 
+    except HTTPException:
+        await db.rollback()
+        raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         if "duplicate key value violates unique constraint" in str(e):
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Erro: O email fornecido já está cadastrado.")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Erro ao alterar Desenvolvedor: {e}")
     
 
-@router.delete("/{dev_id}", status_code=status.HTTP_204_NO_CONTENT, summary="Deleta um Desenvolvedor existente")
-def delete_desenvolvedor(dev_id: uuid.UUID, db: Session = Depends(get_db), current_user: UsuarioModel = Depends(get_current_user)):
-    """ Deleta um desenvolvedor existente """
-    desenvolvedor = db.query(DesenvolvedorModel).filter(
-        DesenvolvedorModel.id_desenvolvedor == dev_id,
-        DesenvolvedorModel.user_id == current_user.id_usuario
-    ).first()
-    if not desenvolvedor:
-        raise HTTPException(status_code=404, detail="Desenvolvedor não encontrado ou inacessível.")
+@router.delete("/{dev_id}", status_code=status.HTTP_204_NO_CONTENT, summary="Deleta um Desenvolvedor existente", dependencies=[Depends(query_budget(7))])
+async def delete_desenvolvedor(dev_id: uuid.UUID, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(get_current_user)):
+    """ Deleta um desenvolvedor existente; os projetos e o usuário vinculados ficam sem desenvolvedor.
 
+    Itens de infraestrutura exigem um desenvolvedor (FK sem ON DELETE), então um
+    desenvolvedor com itens vinculados não é removido (409).
+    """
+    user_id = current_user.id_usuario
     try:
-        # Deleta o Desenvolvedor
-        db.delete(desenvolvedor)
-
-        # Opcional: Deleta o Endereço associado
-        endereco = db.query(EnderecoModel).filter(
-            EnderecoModel.id_endereco == desenvolvedor.id_endereco,
-            EnderecoModel.user_id == current_user.id_usuario
-        ).first()
-        if endereco:
-            db.delete(endereco)
-
-        db.commit()
+        # Mesmo efeito do ON DELETE SET NULL, explícito para valer também no SQLite
+        # (FKs não aplicadas) e para marcar a versão de servicos_projetos
+        projetos = await db.execute(
+            update(ServicoProjetoModel)
+            .where(ServicoProjetoModel.id_desenvolvedor == dev_id, ServicoProjetoModel.user_id == user_id)
+            .values(id_desenvolvedor=None)
+            .execution_options(synchronize_session=False)
+        )
+        if projetos.rowcount:
+            touch(db, user_id, ServicoProjetoModel.__tablename__)
+        await db.execute(
+            update(UsuarioModel)
+            .where(UsuarioModel.id_desenvolvedor == dev_id, owned(DesenvolvedorModel, dev_id, user_id))
+            .values(id_desenvolvedor=None)
+            .execution_options(synchronize_session=False)
+        )
+
+        removidos = (await db.execute(
+            delete(DesenvolvedorModel)
+            .where(
+                DesenvolvedorModel.id_desenvolvedor == dev_id,
+                DesenvolvedorModel.user_id == user_id,
+                ~exists().where(InfraestruturaItemModel.user_id == user_id, InfraestruturaItemModel.id_desenvolvedor == dev_id),
+            )
+            .returning(DesenvolvedorModel.id_endereco)
+            .execution_options(synchronize_session=False)
+        )).scalars().all()
+        if not removidos:
+            await db.rollback()
+            # Diagnóstico só no caminho de erro: distingue 404 de 409
+            if await db.scalar(select(owned(DesenvolvedorModel, dev_id, user_id))):
+                raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Desenvolvedor possui itens de infraestrutura vinculados.")
+            raise HTTPException(status_code=404, detail="Desenvolvedor não encontrado ou inacessível.")
+        touch(db, user_id, DesenvolvedorModel.__tablename__)
+
+        await delete_unused_enderecos(db, user_id, removidos)
+        await db.commit()
         return
 
+    except HTTPException:
+        await db.rollback()
+        raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Erro ao Deletar Desenvolvedor: {e}")
 
 
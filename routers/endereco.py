@@ -2,23 +2,30 @@
 # ROTAS CRUD: ENDERECOS (Read e Update)
 # ------------------------------------------------------------------
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 import uuid
 from models.endereco import EnderecoModel
 from models.endereco import EnderecoBase, EnderecoRead
 from database import get_db
-from models.usuario import UsuarioModel
+from auth.principal import Principal
 from .auth import get_current_user
+from .conditional import conditional_get
+from .writes import update_returning
+from query_budget import query_budget
 
 
 router = APIRouter(prefix="/enderecos", tags=["Enderecos"])
 
-@router.get("/{endereco_id}", response_model=EnderecoRead, summary="Busca um Endereço por ID")
-def read_endereco(endereco_id: uuid.UUID, db: Session = Depends(get_db), current_user: UsuarioModel = Depends(get_current_user)):
-    endereco = db.query(EnderecoModel).filter(
+# Base do ETag das leituras
+read_etag = conditional_get("enderecos")
+
+@router.get("/{endereco_id}", response_model=EnderecoRead, summary="Busca um Endereço por ID", dependencies=[Depends(read_etag)])
+async def read_endereco(endereco_id: uuid.UUID, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(get_current_user)):
+    endereco = await db.scalar(select(EnderecoModel).where(
         EnderecoModel.id_endereco == endereco_id,
         EnderecoModel.user_id == current_user.id_usuario
-    ).first()
+    ))
     
     if not endereco:
         raise HTTPException(status_code=404, detail="Endereço não encontrado ou inacessível.")
@@ -26,24 +33,19 @@ def read_endereco(endereco_id: uuid.UUID, db: Session = Depends(get_db), current
     return endereco
 
 
-@router.put("/{endereco_id}", response_model=EnderecoRead, summary="Atualiza os detalhes de um Endereço por ID")
-def update_endereco(endereco_id: uuid.UUID, endereco_update: EnderecoBase, db: Session = Depends(get_db), current_user: UsuarioModel = Depends(get_current_user)):
-    endereco = db.query(EnderecoModel).filter(
-        EnderecoModel.id_endereco == endereco_id,
-        EnderecoModel.user_id == current_user.id_usuario
-    ).first()
-    
-    if not endereco:
-        raise HTTPException(status_code=404, detail="Endereço não encontrado ou inacessível.")
-
+@router.put("/{endereco_id}", response_model=EnderecoRead, summary="Atualiza os detalhes de um Endereço por ID", dependencies=[Depends(query_budget(3))])
+async def update_endereco(endereco_id: uuid.UUID, endereco_update: EnderecoBase, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(get_current_user)):
     try:
         update_data = endereco_update.model_dump(exclude_unset=True)
-        for key, value in update_data.items():
-            setattr(endereco, key, value)
-            
-        db.commit()
-        db.refresh(endereco)
+        endereco = await update_returning(db, EnderecoModel, endereco_id, current_user.id_usuario, update_data)
+        if not endereco:
+            raise HTTPException(status_code=404, detail="Endereço não encontrado ou inacessível.")
+
+        await db.commit()
         return endereco
+    except HTTPException:
+        await db.rollback()
+        raise
     except Exception as e:
-        db.rollback()
-        raise HTTPException(status_code=500, detail=f"Erro interno ao atualizar endereço: {e}")
\ No newline at end of file
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Erro interno ao atualizar endereço: {e}")
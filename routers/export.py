@@ -0,0 +1,127 @@
+# ------------------------------------------------------------------
+# EXPORTAÇÃO COMPLETA (NDJSON OU CSV) EM STREAMING
+# ------------------------------------------------------------------
+import csv
+import io
+import json
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Literal
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, func, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import EXPORT_BATCH_SIZE
+from database import get_db
+from auth.principal import Principal
+from .auth import get_current_user
+from models.cliente import ClienteModel
+from models.endereco import EnderecoBase, EnderecoModel
+from models.itens_infraestrutura import InfraestruturaItemModel
+from models.servico_projeto import ServicoProjetoModel
+
+router = APIRouter(prefix="/export", tags=["Exportação"])
+
+# Mesma máscara aplicada em read_infra_items: o texto cifrado nem sai do banco
+SECRET_MASK = "*** CRIPTOGRAFADO ***"
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def _columns(model, *exclude):
+    return [column for column in model.__table__.columns if column.key not in ("user_id", *exclude)]
+
+
+def _export_query(entity: str, user_id: uuid.UUID):
+    """Monta o SELECT (somente colunas, sem objetos ORM) da exportação de uma entidade."""
+    if entity == "clientes":
+        # Endereço achatado nas mesmas colunas aceitas pelo CSV de /clientes/bulk
+        endereco = [EnderecoModel.__table__.c[field] for field in EnderecoBase.model_fields]
+        query = (
+            select(*_columns(ClienteModel), *endereco)
+            .outerjoin(EnderecoModel, EnderecoModel.id_endereco == ClienteModel.id_endereco)
+            .where(ClienteModel.user_id == user_id)
+        )
+        return query.order_by(ClienteModel.id_cliente)
+
+    if entity == "projetos":
+        query = select(*_columns(ServicoProjetoModel)).where(ServicoProjetoModel.user_id == user_id)
+        return query.order_by(ServicoProjetoModel.id_servico)
+
+    columns = [
+        literal(SECRET_MASK).label("referencia_senha") if column.key == "referencia_senha" else column
+        for column in _columns(InfraestruturaItemModel)
+    ]
+    query = (
+        select(*columns, func.coalesce(ServicoProjetoModel.titulo, "N/A").label("projeto_titulo"))
+        .outerjoin(ServicoProjetoModel, and_(
+            ServicoProjetoModel.id_servico == InfraestruturaItemModel.id_servico,
+            ServicoProjetoModel.user_id == InfraestruturaItemModel.user_id,
+        ))
+        .where(InfraestruturaItemModel.user_id == user_id)
+    )
+    return query.order_by(InfraestruturaItemModel.id_item)
+
+
+def _plain(value):
+    """Converte os tipos do banco para valores serializáveis (JSON e CSV)."""
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _ndjson_lines(rows) -> str:
+    return "".join(
+        json.dumps({key: _plain(value) for key, value in row._mapping.items()}, ensure_ascii=False) + "\n"
+        for row in rows
+    )
+
+
+def _csv_lines(rows) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerows([[_plain(value) for value in row] for row in rows])
+    return buffer.getvalue()
+
+
+async def _stream_export(db: AsyncSession, query, fmt: str):
+    """Gera o corpo da resposta lote a lote a partir de um cursor no servidor."""
+    result = await db.stream(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+    try:
+        if fmt == "csv":
+            buffer = io.StringIO()
+            csv.writer(buffer, lineterminator="\n").writerow(result.keys())
+            yield buffer.getvalue()
+        encode = _csv_lines if fmt == "csv" else _ndjson_lines
+        async for partition in result.partitions():
+            yield encode(partition)
+    finally:
+        await result.close()
+
+
+@router.get("/{entity}", summary="Exporta todos os registros do usuário (NDJSON ou CSV, em streaming)")
+async def export_entity(
+    entity: Literal["clientes", "projetos", "infra"],
+    format: Literal["ndjson", "csv"] = Query("ndjson", description="Formato do arquivo exportado"),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Exporta clientes (com endereço), projetos ou itens de infraestrutura (senha mascarada).
+
+    As linhas são lidas do banco em lotes de EXPORT_BATCH_SIZE e enviadas à
+    medida que chegam, então o consumo de memória não depende do volume.
+    """
+    query = _export_query(entity, current_user.id_usuario)
+    return StreamingResponse(
+        _stream_export(db, query, format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{entity}.{format}"'},
+    )
@@ -1,89 +1,190 @@
 # ------------------------------------------------------------------
 # ROTAS CRUD: ITENS_INFRAESTRUTURA (AGORA COM CRIPTOGRAFIA)
 # ------------------------------------------------------------------
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from typing import List, Literal, Optional
+from sqlalchemy import select, true
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 import uuid
+from datetime import datetime, timedelta
 from models.itens_infraestrutura import InfraestruturaItemModel
 from models.itens_infraestrutura import InfraestruturaCreate, InfraestruturaRead
 from models.servico_projeto import ServicoProjetoModel
 from models.cliente import ClienteModel
 from database import get_db
-from models.usuario import UsuarioModel
+from auth.principal import Principal
 from .auth import get_current_user
-from models.descriptar_senha import DecryptedSecret
-from models.descriptar_senha import encrypt_password, decrypt_password
+from .pagination import PageParams, apply_keyset, finish_page
+from .serialization import list_response
+from .conditional import conditional_get
+from .writes import insert_returning_if, owned, update_returning
+from query_budget import query_budget
+from audit import audit_trail
+from models.descriptar_senha import DecryptedSecret, DecryptBatchRequest, DecryptBatchResult, DecryptError, DECRYPT_BATCH_MAX
+from models.descriptar_senha import encrypt_password, decrypt_password, decrypt_passwords
 
 router = APIRouter(prefix="/infra", tags=["Infraestrutura"])
 
+# Tabelas exibidas nas leituras de itens, com o título do projeto (base do ETag). A rota
+# /expiring fica de fora: o resultado depende da data corrente, não só das escritas
+read_etag = conditional_get("itens_infraestrutura", "servicos_projetos")
 
-@router.post("", response_model=InfraestruturaRead, status_code=status.HTTP_201_CREATED, summary="Cria um novo Item de Infraestrutura (Criptografa a senha)")
-def create_infra_item(item: InfraestruturaCreate, db: Session = Depends(get_db), current_user: UsuarioModel = Depends(get_current_user)):
+# Estratégias de carregamento alinhadas ao InfraestruturaRead: projeto_titulo
+# lê self.projeto, então o título do projeto vem no mesmo SELECT
+def infra_read_options():
+    return (joinedload(InfraestruturaItemModel.projeto).load_only(ServicoProjetoModel.titulo),)
+
+
+async def _get_infra_item(db: AsyncSession, item_id: uuid.UUID, user_id: uuid.UUID):
+    """Carrega um item do usuário já com o projeto usado por projeto_titulo."""
+    return await db.scalar(
+        select(InfraestruturaItemModel).options(*infra_read_options()).where(
+            InfraestruturaItemModel.id_item == item_id,
+            InfraestruturaItemModel.user_id == user_id
+        )
+    )
+
+
+def _reference_conditions(item: InfraestruturaCreate, user_id: uuid.UUID):
+    """Cliente e projeto (se fornecido) precisam pertencer ao usuário."""
+    conditions = [owned(ClienteModel, item.id_cliente, user_id)]
+    if item.id_servico:
+        conditions.append(owned(ServicoProjetoModel, item.id_servico, user_id))
+    return conditions
+
+
+async def _invalid_reference(db: AsyncSession, item: InfraestruturaCreate, user_id: uuid.UUID) -> HTTPException:
+    """Só no caminho de erro: descobre qual referência falhou para a mensagem de 400."""
+    if item.id_servico and await db.scalar(select(owned(ClienteModel, item.id_cliente, user_id))):
+        return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Projeto não encontrado ou inacessível.")
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cliente não encontrado ou inacessível.")
+
+
+async def _projeto_titulo(db: AsyncSession, item: InfraestruturaItemModel) -> Optional[str]:
+    if item.id_servico is None:
+        return None
+    # Com user_id: no PostgreSQL particionado a consulta lê só a partição do usuário
+    return await db.scalar(select(ServicoProjetoModel.titulo).where(
+        ServicoProjetoModel.id_servico == item.id_servico, ServicoProjetoModel.user_id == item.user_id,
+    ))
+
+
+def _masked_read(item: InfraestruturaItemModel, projeto_titulo: Optional[str]) -> InfraestruturaRead:
+    """Resposta das escritas: colunas gravadas, título do projeto e senha mascarada."""
+    data = {column.key: getattr(item, column.key) for column in InfraestruturaItemModel.__table__.columns}
+    data.update(projeto_titulo=projeto_titulo or "N/A", referencia_senha="*** CRIPTOGRAFADO ***")
+    return InfraestruturaRead.model_validate(data)
+
+
+@router.post("", response_model=InfraestruturaRead, status_code=status.HTTP_201_CREATED, summary="Cria um novo Item de Infraestrutura (Criptografa a senha)", dependencies=[Depends(query_budget(4))])
+async def create_infra_item(item: InfraestruturaCreate, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(get_current_user)):
     """Cria um novo Item de Infraestrutura"""
     try:
-        # 1. Validação de FKs: Cliente
-        cliente = db.query(ClienteModel).filter(
-            ClienteModel.id_cliente == item.id_cliente, 
-            ClienteModel.user_id == current_user.id_usuario
-        ).first()
-        if not cliente:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cliente não encontrado ou inacessível.")
-        
-        # 2. Validação de FKs: Projeto (se fornecido)
-        if item.id_servico:
-             projeto = db.query(ServicoProjetoModel).filter(
-                ServicoProjetoModel.id_servico == item.id_servico, 
-                ServicoProjetoModel.user_id == current_user.id_usuario
-            ).first()
-             if not projeto:
-                 raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Projeto não encontrado ou inacessível.")
-
-        # 3. Criptografa a Senha ANTES de salvar
+        # 1. Criptografa a Senha ANTES de salvar
         item_data = item.model_dump()
         raw_password = item_data.pop("referencia_senha", None)
         
         encrypted_password = None
         if raw_password:
             encrypted_password = encrypt_password(raw_password)
-            
-        # 4. Cria o Item com a senha criptografada
-        novo_item = InfraestruturaItemModel(
-            **item_data,
-            referencia_senha=encrypted_password,
-            user_id=current_user.id_usuario
+
+        # 2. Cria o Item: a posse do cliente e do projeto é checada na própria instrução
+        novo_item = await insert_returning_if(
+            db, InfraestruturaItemModel,
+            {**item_data, "referencia_senha": encrypted_password, "user_id": current_user.id_usuario},
+            *_reference_conditions(item, current_user.id_usuario),
         )
-        db.add(novo_item)
-        db.commit()
-        db.refresh(novo_item)
-        
+        if not novo_item:
+            raise await _invalid_reference(db, item, current_user.id_usuario)
+        projeto_titulo = await _projeto_titulo(db, novo_item)
+        await db.commit()
+        audit_trail.record(current_user.id_usuario, "create", InfraestruturaItemModel.__tablename__, novo_item.id_item)
+
         # Mascara a senha no retorno para o cliente
-        novo_item.referencia_senha = "*** CRIPTOGRAFADO ***"
-        return novo_item
+        return _masked_read(novo_item, projeto_titulo)
 
+    except HTTPException:
+        await db.rollback()
+        raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Erro interno: {e}")
 
 
-@router.get("", response_model=List[InfraestruturaRead], summary="Lista todos os Itens de Infraestrutura (Senha Mascarada)")
-def read_infra_items(db: Session = Depends(get_db), current_user: UsuarioModel = Depends(get_current_user)):
-    """Lista todos os Itens de Infraestrutura do usuário"""
-    items = db.query(InfraestruturaItemModel).filter(InfraestruturaItemModel.user_id == current_user.id_usuario).all()
-    
+@router.get("", response_model=List[InfraestruturaRead], summary="Lista os Itens de Infraestrutura (Senha Mascarada, paginado por cursor)", dependencies=[Depends(query_budget(3)), Depends(read_etag)])
+async def read_infra_items(
+    response: Response,
+    is_critico: Optional[bool] = Query(None),
+    tipo_item: Optional[str] = Query(None),
+    id_cliente: Optional[uuid.UUID] = Query(None),
+    id_servico: Optional[uuid.UUID] = Query(None),
+    sort: Literal["descricao", "tipo_item"] = Query("descricao", description="Campo de ordenação"),
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Lista os Itens de Infraestrutura do usuário, uma página por vez (cursor no cabeçalho X-Next-Cursor)"""
+    query = select(InfraestruturaItemModel).options(*infra_read_options()).where(InfraestruturaItemModel.user_id == current_user.id_usuario)
+    if is_critico is not None:
+        query = query.filter(InfraestruturaItemModel.is_critico == is_critico)
+    if tipo_item is not None:
+        query = query.filter(InfraestruturaItemModel.tipo_item == tipo_item)
+    if id_cliente is not None:
+        query = query.filter(InfraestruturaItemModel.id_cliente == id_cliente)
+    if id_servico is not None:
+        query = query.filter(InfraestruturaItemModel.id_servico == id_servico)
+
+    sort_column = getattr(InfraestruturaItemModel, sort)
+    items = (await db.scalars(apply_keyset(query, sort_column, InfraestruturaItemModel.id_item, page))).all()
+    items = finish_page(items, sort_column, InfraestruturaItemModel.id_item, page, response)
+
     # Mascara a senha para a lista de leitura
     for item in items:
         item.referencia_senha = "*** CRIPTOGRAFADO ***"
-    return items
+    return list_response(InfraestruturaRead, items, response)
+
 
+@router.get("/expiring", response_model=List[InfraestruturaRead], summary="Lista os itens que expiram nos próximos dias, do mais próximo ao mais distante (Senha Mascarada)", dependencies=[Depends(query_budget(2))])
+async def read_expiring_infra_items(
+    response: Response,
+    within_days: int = Query(30, ge=0, le=3650, description="Janela, em dias a partir de agora"),
+    critical_only: bool = Query(False, description="Somente itens críticos"),
+    include_expired: bool = Query(True, description="Inclui itens já expirados"),
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Lista os itens com data de expiração na janela, ordenados pela expiração (cursor no cabeçalho X-Next-Cursor)
+
+    A consulta percorre uma faixa do índice (user_id, data_expiracao), ou do
+    índice parcial dos críticos, e traz o título do projeto no mesmo SELECT.
+    """
+    agora = datetime.now()
+    query = select(InfraestruturaItemModel).options(*infra_read_options()).where(
+        InfraestruturaItemModel.user_id == current_user.id_usuario,
+        InfraestruturaItemModel.data_expiracao <= agora + timedelta(days=within_days)
+    )
+    if not include_expired:
+        query = query.filter(InfraestruturaItemModel.data_expiracao >= agora)
+    if critical_only:
+        # Mesmo predicado do índice parcial, para que o planner possa usá-lo
+        query = query.filter(InfraestruturaItemModel.is_critico == true())
+
+    sort_column = InfraestruturaItemModel.data_expiracao
+    items = (await db.scalars(apply_keyset(query, sort_column, InfraestruturaItemModel.id_item, page))).all()
+    items = finish_page(items, sort_column, InfraestruturaItemModel.id_item, page, response)
+
+    # Mascara a senha para a lista de leitura
+    for item in items:
+        item.referencia_senha = "*** CRIPTOGRAFADO ***"
+    return list_response(InfraestruturaRead, items, response)
 
-@router.get("/{item_id}", response_model=InfraestruturaRead, summary="Busca um Item de Infraestrutura por ID (Senha Mascarada)")
-def read_infra_item(item_id: uuid.UUID, db: Session = Depends(get_db), current_user: UsuarioModel = Depends(get_current_user)):
+
+@router.get("/{item_id}",response_model=InfraestruturaRead, summary="Busca um Item de Infraestrutura por ID (Senha Mascarada)", dependencies=[Depends(query_budget(3)), Depends(read_etag)])
+async def read_infra_item(item_id: uuid.UUID, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(get_current_user)):
     """Busca um Item de Infraestrutura pelo ID"""
-    item = db.query(InfraestruturaItemModel).filter(
-        InfraestruturaItemModel.id_item == item_id,
-        InfraestruturaItemModel.user_id == current_user.id_usuario
-    ).first()
+    item = await _get_infra_item(db, item_id, current_user.id_usuario)
     
     if not item:
         raise HTTPException(status_code=404, detail="Item de Infraestrutura não encontrado.")
@@ -93,85 +194,118 @@ def read_infra_item(item_id: uuid.UUID, db: Session = Depends(get_db), current_u
     return item
 
 
-@router.put("/{item_id}", response_model=InfraestruturaRead, summary="Atualiza um Item de Infraestrutura (Re-criptografa a senha se alterada)")
-def update_infra_item(item_id: uuid.UUID, item: InfraestruturaCreate, db: Session = Depends(get_db), current_user: UsuarioModel = Depends(get_current_user)):
+@router.put("/{item_id}", response_model=InfraestruturaRead, summary="Atualiza um Item de Infraestrutura (Re-criptografa a senha se alterada)", dependencies=[Depends(query_budget(4))])
+async def update_infra_item(item_id: uuid.UUID, item: InfraestruturaCreate, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(get_current_user)):
     """Atualiza um Item de Infraestrutura existente pelo ID"""
-    existing_item = db.query(InfraestruturaItemModel).filter(
-        InfraestruturaItemModel.id_item == item_id,
-        InfraestruturaItemModel.user_id == current_user.id_usuario
-    ).first()
-    
-    if not existing_item:
-        raise HTTPException(status_code=404, detail="Item de Infraestrutura não encontrado.")
-    
     try:
-        # 1. Validação de FKs: Cliente
-        cliente = db.query(ClienteModel).filter(
-            ClienteModel.id_cliente == item.id_cliente, 
-            ClienteModel.user_id == current_user.id_usuario
-        ).first()
-        if not cliente:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cliente não encontrado ou inacessível.")
-        
-        # 2. Validação de FKs: Projeto (se fornecido)
-        if item.id_servico:
-             projeto = db.query(ServicoProjetoModel).filter(
-                ServicoProjetoModel.id_servico == item.id_servico, 
-                ServicoProjetoModel.user_id == current_user.id_usuario
-            ).first()
-             if not projeto:
-                 raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Projeto não encontrado ou inacessível.")
-        
-        # 3. Atualiza os campos do item
+        # 1. Campos do item; a senha só é re-criptografada se foi enviada
         item_data = item.model_dump()
         raw_password = item_data.pop("referencia_senha", None)
         
         if raw_password is not None:
-            # Re-criptografa a senha se foi alterada
-            encrypted_password = encrypt_password(raw_password)
-            existing_item.referencia_senha = encrypted_password
-        
-        for key, value in item_data.items():
-            setattr(existing_item, key, value)
-        
-        db.commit()
-        db.refresh(existing_item)
-        
+            item_data["referencia_senha"] = encrypt_password(raw_password)
+
+        # 2. Posse do item, do cliente e do projeto no WHERE do UPDATE
+        existing_item = await update_returning(
+            db, InfraestruturaItemModel, item_id, current_user.id_usuario, item_data,
+            *_reference_conditions(item, current_user.id_usuario),
+        )
+        if not existing_item:
+            if not await db.scalar(select(owned(InfraestruturaItemModel, item_id, current_user.id_usuario))):
+                raise HTTPException(status_code=404, detail="Item de Infraestrutura não encontrado.")
+            raise await _invalid_reference(db, item, current_user.id_usuario)
+        projeto_titulo = await _projeto_titulo(db, existing_item)
+        await db.commit()
+        audit_trail.record(
+            current_user.id_usuario, "update", InfraestruturaItemModel.__tablename__, item_id,
+            detalhe="senha alterada" if raw_password is not None else None,
+        )
+
         # Mascara a senha no retorno
-        existing_item.referencia_senha = "*** CRIPTOGRAFADO ***"
-        return existing_item
+        return _masked_read(existing_item, projeto_titulo)
 
+    except HTTPException:
+        await db.rollback()
+        raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Erro interno: {e}") 
 
 
 @router.delete("/{item_id}", status_code=status.HTTP_204_NO_CONTENT, summary="Deleta um Item de Infraestrutura existente")
-def delete_infra_item(item_id: uuid.UUID, db: Session = Depends(get_db), current_user: UsuarioModel = Depends(get_current_user)):
+async def delete_infra_item(item_id: uuid.UUID, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(get_current_user)):
     """Deleta um Item de Infraestrutura existente pelo ID"""
-    item = db.query(InfraestruturaItemModel).filter(
+    item = await db.scalar(select(InfraestruturaItemModel).where(
         InfraestruturaItemModel.id_item == item_id,
         InfraestruturaItemModel.user_id == current_user.id_usuario
-    ).first()
+    ))
     
     if not item:
         raise HTTPException(status_code=404, detail="Item de Infraestrutura não encontrado.")
     
     try:
-        db.delete(item)
-        db.commit()
+        await db.delete(item)
+        await db.commit()
+        audit_trail.record(current_user.id_usuario, "delete", InfraestruturaItemModel.__tablename__, item_id)
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Erro interno: {e}")
 
 
+@router.post("/decrypt", response_model=DecryptBatchResult, summary="DECIFRA E RETORNA as senhas de vários itens numa só requisição (Acesso Restrito!)", dependencies=[Depends(query_budget(2))])
+async def decrypt_infra_secrets(selection: DecryptBatchRequest, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(get_current_user)):
+    """Decifra as senhas dos itens em `ids` e/ou de um projeto (`id_servico`) ou cliente (`id_cliente`).
+
+    Os critérios informados se combinam (ex.: IDs dentro de um projeto). Os itens do
+    usuário vêm numa única consulta e são decifrados numa só passada; itens não
+    encontrados, sem senha ou que não puderem ser decifrados vão para `errors`
+    sem derrubar o restante do lote.
+    """
+    conditions = [InfraestruturaItemModel.user_id == current_user.id_usuario]
+    requested = list(dict.fromkeys(selection.ids or ()))
+    if requested:
+        conditions.append(InfraestruturaItemModel.id_item.in_(requested))
+    if selection.id_servico is not None:
+        conditions.append(InfraestruturaItemModel.id_servico == selection.id_servico)
+    if selection.id_cliente is not None:
+        conditions.append(InfraestruturaItemModel.id_cliente == selection.id_cliente)
+
+    rows = (await db.execute(
+        select(InfraestruturaItemModel.id_item, InfraestruturaItemModel.referencia_senha)
+        .where(*conditions)
+        .order_by(InfraestruturaItemModel.descricao, InfraestruturaItemModel.id_item)
+        .limit(DECRYPT_BATCH_MAX + 1)
+    )).all()
+    if len(rows) > DECRYPT_BATCH_MAX:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"A seleção tem mais de {DECRYPT_BATCH_MAX} itens; envie os IDs em lotes.")
+
+    errors = []
+    if requested:
+        # Resultados na ordem pedida; IDs de outros usuários contam como não encontrados
+        position = {item_id: index for index, item_id in enumerate(requested)}
+        rows.sort(key=lambda row: position[row.id_item])
+        found = {row.id_item for row in rows}
+        errors += [DecryptError(id_item=item_id, detail="Item de Infraestrutura não encontrado.") for item_id in requested if item_id not in found]
+    errors += [DecryptError(id_item=row.id_item, detail="Item não possui senha registrada.") for row in rows if not row.referencia_senha]
+
+    with_secret = [row for row in rows if row.referencia_senha]
+    secrets = []
+    for row, secret in zip(with_secret, decrypt_passwords(row.referencia_senha for row in with_secret)):
+        if secret is None:
+            errors.append(DecryptError(id_item=row.id_item, detail="Não foi possível decifrar o segredo. Verifique a ENCRYPTION_KEY."))
+        else:
+            secrets.append(DecryptedSecret(id_item=row.id_item, secret=secret))
+            audit_trail.record(current_user.id_usuario, "decrypt", InfraestruturaItemModel.__tablename__, row.id_item, detalhe="lote")
+    return DecryptBatchResult(secrets=secrets, errors=errors)
+
+
 @router.get("/decrypt/{item_id}", response_model=DecryptedSecret, summary="DECIFRA E RETORNA a senha de um item (Acesso Restrito!)")
-def decrypt_infra_secret(item_id: uuid.UUID, db: Session = Depends(get_db), current_user: UsuarioModel = Depends(get_current_user)):
+async def decrypt_infra_secret(item_id: uuid.UUID, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(get_current_user)):
     """Decifra e retorna a senha de um Item de Infraestrutura pelo ID"""
-    item = db.query(InfraestruturaItemModel).filter(
+    item = await db.scalar(select(InfraestruturaItemModel).where(
         InfraestruturaItemModel.id_item == item_id,
         InfraestruturaItemModel.user_id == current_user.id_usuario
-    ).first()
+    ))
     
     if not item:
         raise HTTPException(status_code=404, detail="Item de Infraestrutura não encontrado.")
@@ -183,7 +317,9 @@ def decrypt_infra_secret(item_id: uuid.UUID, db: Session = Depends(get_db), curr
     
     if decrypted_secret == "[ERRO DE DECRIPTOGRAFIA]":
         raise HTTPException(status_code=500, detail="Não foi possível decifrar o segredo. Verifique a ENCRYPTION_KEY.")
-    
+
+    # Quem leu qual senha e quando (gravado em segundo plano, ver audit.py)
+    audit_trail.record(current_user.id_usuario, "decrypt", InfraestruturaItemModel.__tablename__, item_id)
     return DecryptedSecret(
         id_item=item_id,
         secret=decrypted_secret
@@ -0,0 +1,104 @@
+# ------------------------------------------------------------------
+# PAGINAÇÃO POR CURSOR (KEYSET) COMPARTILHADA PELAS LISTAGENS
+# ------------------------------------------------------------------
+import base64
+import binascii
+import json
+import uuid
+from datetime import datetime
+from typing import Literal, Optional
+from fastapi import HTTPException, Query, Response, status
+from sqlalchemy import DateTime, literal, tuple_
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class PageParams:
+    """Parâmetros de paginação aceitos por todas as rotas de listagem."""
+
+    def __init__(
+        self,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Quantidade máxima de itens na página"),
+        cursor: Optional[str] = Query(None, description=f"Cursor opaco devolvido no cabeçalho {NEXT_CURSOR_HEADER}"),
+        order: Literal["asc", "desc"] = Query("asc", description="Direção da ordenação"),
+    ):
+        self.limit = limit
+        self.cursor = cursor
+        self.order = order
+
+
+def encode_cursor(sort: str, value, pk) -> str:
+    """Serializa a posição do último item da página em um token opaco."""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps({"s": sort, "v": value, "id": str(pk)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _invalid_cursor() -> HTTPException:
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor de paginação inválido.")
+
+
+def _sort_value(value, sort_column):
+    """Converte o valor do cursor para o tipo da coluna de ordenação (ValueError se não couber)."""
+    if value is None:
+        return None  # última linha da página com a coluna vazia
+    if isinstance(value, (dict, list, bool)):
+        raise ValueError("valor do cursor não é escalar")
+    if isinstance(sort_column.type, DateTime):
+        if not isinstance(value, str):
+            raise ValueError("data do cursor não é texto ISO")
+        return datetime.fromisoformat(value)
+    expected = sort_column.type.python_type
+    if expected is str:
+        if not isinstance(value, str):
+            raise ValueError("valor do cursor não é texto")
+        return value
+    return expected(value)
+
+
+def decode_cursor(cursor: str, sort_column):
+    """Recupera (valor, pk) de um cursor, validando a ordenação, o tipo do valor e o UUID."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if data["s"] != sort_column.key:
+            raise ValueError("ordenação diferente")
+        if not isinstance(data["id"], str):
+            raise ValueError("id do cursor não é texto")
+        return _sort_value(data["v"], sort_column), uuid.UUID(data["id"])
+    except (ValueError, KeyError, TypeError, binascii.Error, NotImplementedError):
+        raise _invalid_cursor()
+
+
+def apply_keyset(query, sort_column, pk_column, page: PageParams):
+    """Aplica ordenação estável (coluna + PK), posição do cursor e limite.
+
+    Busca `limit + 1` linhas para saber se existe uma próxima página sem
+    precisar de um COUNT.
+    """
+    key = tuple_(sort_column, pk_column)
+    if page.cursor:
+        value, pk = decode_cursor(page.cursor, sort_column)
+        position = tuple_(literal(value, sort_column.type), literal(pk, pk_column.type))
+        query = query.filter(key > position if page.order == "asc" else key < position)
+
+    if page.order == "asc":
+        query = query.order_by(sort_column.asc(), pk_column.asc())
+    else:
+        query = query.order_by(sort_column.desc(), pk_column.desc())
+    return query.limit(page.limit + 1)
+
+
+def finish_page(rows, sort_column, pk_column, page: PageParams, response: Response):
+    """Descarta a linha extra e publica o cursor da próxima página no cabeçalho."""
+    rows = list(rows)
+    if len(rows) > page.limit:
+        rows = rows[:page.limit]
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(
+            sort_column.key, getattr(last, sort_column.key), getattr(last, pk_column.key)
+        )
+    return rows
@@ -0,0 +1,69 @@
+# ------------------------------------------------------------------
+# ROTAS: BUSCA TEXTUAL (CLIENTES, PROJETOS E INFRAESTRUTURA)
+# ------------------------------------------------------------------
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import desc
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_db
+from auth.principal import Principal
+from .auth import get_current_user
+from .conditional import conditional_get
+from query_budget import query_budget
+from full_text import search_select, search_terms
+from models.busca import SearchHit, SearchPage, SearchResults
+from models.cliente import ClienteModel
+from models.itens_infraestrutura import InfraestruturaItemModel
+from models.servico_projeto import ServicoProjetoModel
+
+router = APIRouter(prefix="/search", tags=["Busca"])
+
+# Entidade -> (modelo, PK, coluna exibida, coluna de detalhe)
+SEARCH_TARGETS = {
+    "clientes": (ClienteModel, ClienteModel.id_cliente, ClienteModel.nome, ClienteModel.email),
+    "projetos": (ServicoProjetoModel, ServicoProjetoModel.id_servico, ServicoProjetoModel.titulo, ServicoProjetoModel.status_projeto),
+    "infra": (InfraestruturaItemModel, InfraestruturaItemModel.id_item, InfraestruturaItemModel.descricao, InfraestruturaItemModel.tipo_item),
+}
+
+# Tabelas pesquisadas (base do ETag)
+read_etag = conditional_get(*(model.__tablename__ for model, *_ in SEARCH_TARGETS.values()))
+
+
+async def _search_entity(db: AsyncSession, entity: str, terms: list, user_id, limit: int, offset: int) -> SearchPage:
+    """Uma página de resultados de uma entidade, do mais ao menos relevante."""
+    model, pk, titulo, detalhe = SEARCH_TARGETS[entity]
+    query = (
+        search_select(model, pk, titulo, detalhe, terms=terms, dialect_name=db.bind.dialect.name)
+        .where(model.user_id == user_id)
+        .order_by(desc("score"), pk)
+        .offset(offset)
+        .limit(limit + 1)
+    )
+    rows = (await db.execute(query)).all()
+    hits = [SearchHit(id=row[0], titulo=row[1], detalhe=row[2], score=row[3]) for row in rows[:limit]]
+    return SearchPage(items=hits, next_offset=offset + limit if len(rows) > limit else None)
+
+
+@router.get("", response_model=SearchResults, summary="Busca textual em clientes, projetos e itens de infraestrutura", dependencies=[Depends(query_budget(5)), Depends(read_etag)])
+async def search(
+    q: str = Query(..., min_length=1, max_length=200, description="Termos buscados (cada termo é tratado como prefixo)"),
+    entity: Optional[Literal["clientes", "projetos", "infra"]] = Query(None, description="Restringe a busca a uma entidade"),
+    limit: int = Query(10, ge=1, le=50, description="Resultados por entidade"),
+    offset: int = Query(0, ge=0, le=1000, description="Resultados a pular (use o next_offset da entidade)"),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Busca os termos em clientes (nome, e-mail, documento), projetos (título, escopo) e
+    itens de infraestrutura (descrição, URL, notas), com resultados ranqueados por entidade.
+
+    Usa o índice GIN de tsvector no PostgreSQL e as tabelas FTS5 no SQLite (ver full_text.py).
+    """
+    terms = search_terms(q)
+    entities = [entity] if entity else list(SEARCH_TARGETS)
+    if not terms:
+        return SearchResults(q=q, resultados={name: SearchPage(items=[]) for name in entities})
+
+    resultados = {}
+    for name in entities:
+        resultados[name] = await _search_entity(db, name, terms, current_user.id_usuario, limit, offset)
+    return SearchResults(q=q, resultados=resultados)
@@ -0,0 +1,68 @@
+# ------------------------------------------------------------------
+# SERIALIZAÇÃO RÁPIDA DAS LISTAGENS (OPT-IN: FAST_JSON_RESPONSES)
+# ------------------------------------------------------------------
+import types
+from functools import lru_cache
+from typing import List, Union, get_args, get_origin
+from fastapi import Response
+from pydantic import BaseModel, EmailStr, TypeAdapter, create_model
+from config import FAST_JSON_RESPONSES
+
+
+class RawJSONResponse(Response):
+    """Resposta cujo corpo já é JSON serializado (bytes)."""
+    media_type = "application/json"
+
+
+def _output_annotation(annotation):
+    if annotation is EmailStr:
+        return str
+    if get_origin(annotation) in (Union, types.UnionType):
+        return Union[tuple(_output_annotation(arg) for arg in get_args(annotation))]
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return output_schema(annotation)
+    return annotation
+
+
+@lru_cache(maxsize=None)
+def output_schema(schema):
+    """Cópia do schema de leitura (mesmos campos, ordem e config) para dados vindos do banco.
+
+    Troca EmailStr por str, inclusive nos schemas aninhados: os e-mails já foram
+    validados e normalizados na escrita, e revalidá-los (email-validator) era o
+    custo dominante das listagens.
+    """
+    fields = {name: (_output_annotation(field.annotation), field) for name, field in schema.model_fields.items()}
+    return create_model(schema.__name__, __config__=schema.model_config, **fields)
+
+
+@lru_cache(maxsize=None)
+def list_adapter(schema) -> TypeAdapter:
+    """TypeAdapter de List[output_schema(schema)], construído uma vez por schema."""
+    return TypeAdapter(List[output_schema(schema)])
+
+
+def dump_list_json(schema, rows) -> bytes:
+    """Lê os objetos ORM pelo schema e gera o JSON direto no pydantic-core.
+
+    Produz os mesmos bytes que o caminho padrão do FastAPI (validação do
+    response_model, dump_python em modo JSON e json.dumps compacto). A única
+    diferença possível é a notação científica de floats (`1e16` x `1e+16`,
+    abaixo de 1e-4 ou a partir de 1e16), fora da faixa das colunas Numeric(10, 2).
+    """
+    adapter = list_adapter(schema)
+    return adapter.dump_json(adapter.validate_python(rows, from_attributes=True), by_alias=True)
+
+
+def list_response(schema, rows, response: Response):
+    """Devolve a listagem pelo caminho rápido quando FAST_JSON_RESPONSES está ativo.
+
+    Desativado, devolve as linhas para o response_model da rota. Ativo, os
+    cabeçalhos já definidos em `response` (X-Next-Cursor, ETag) são copiados
+    para a resposta pronta.
+    """
+    if not FAST_JSON_RESPONSES:
+        return rows
+    fast = RawJSONResponse(dump_list_json(schema, rows))
+    fast.raw_headers.extend(response.raw_headers)
+    return fast
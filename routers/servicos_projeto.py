@@ -1,98 +1,146 @@
 # ------------------------------------------------------------------
 # ROTAS CRUD: SERVICOS_PROJETOS
 # ------------------------------------------------------------------
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from typing import List, Literal, Optional
 import uuid
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 from models.servico_projeto import ServicoProjetoModel
 from models.servico_projeto import ServicoProjetoCreate, ServicoProjetoRead
 from models.cliente import ClienteModel
 from models.desenvolvedor import DesenvolvedorModel
 from database import get_db
-from models.usuario import UsuarioModel
+from auth.principal import Principal
 from .auth import get_current_user
+from .pagination import PageParams, apply_keyset, finish_page
+from .serialization import list_response
+from .conditional import conditional_get
+from .writes import insert_returning_if, owned, update_returning
+from query_budget import query_budget
+from audit import audit_trail
 
 router = APIRouter(prefix="/projetos", tags=["Projetos"])
 
+# Tabelas exibidas nas leituras de projetos, com cliente e desenvolvedor (base do ETag)
+read_etag = conditional_get("servicos_projetos", "clientes", "desenvolvedores", "enderecos")
 
-@router.post("", response_model=ServicoProjetoRead, status_code=status.HTTP_201_CREATED, summary="Cria um novo Serviço ou Projeto")
-def create_projeto(projeto: ServicoProjetoCreate, db: Session = Depends(get_db), current_user: UsuarioModel = Depends(get_current_user)):
+# Estratégias de carregamento alinhadas ao ServicoProjetoRead: cliente, desenvolvedor
+# e o endereço do desenvolvedor vêm no mesmo SELECT (evita N+1 na serialização)
+def projeto_read_options():
+    return (
+        joinedload(ServicoProjetoModel.cliente),
+        joinedload(ServicoProjetoModel.desenvolvedor).joinedload(DesenvolvedorModel.endereco_obj),
+    )
+
+
+async def _get_projeto(db: AsyncSession, projeto_id: uuid.UUID, user_id: uuid.UUID):
+    """Carrega um projeto do usuário já com os relacionamentos do ServicoProjetoRead."""
+    return await db.scalar(
+        select(ServicoProjetoModel).options(*projeto_read_options()).where(
+            ServicoProjetoModel.id_servico == projeto_id,
+            ServicoProjetoModel.user_id == user_id
+        )
+    )
+
+
+def _reference_conditions(projeto: ServicoProjetoCreate, user_id: uuid.UUID):
+    """Cliente e desenvolvedor (se fornecido) precisam pertencer ao usuário."""
+    conditions = [owned(ClienteModel, projeto.id_cliente, user_id)]
+    if projeto.id_desenvolvedor:
+        conditions.append(owned(DesenvolvedorModel, projeto.id_desenvolvedor, user_id))
+    return conditions
+
+
+async def _invalid_reference(db: AsyncSession, projeto: ServicoProjetoCreate, user_id: uuid.UUID) -> HTTPException:
+    """Só no caminho de erro: descobre qual referência falhou para a mensagem de 400."""
+    if projeto.id_desenvolvedor and await db.scalar(select(owned(ClienteModel, projeto.id_cliente, user_id))):
+        return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Desenvolvedor não encontrado ou inacessível.")
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cliente não encontrado ou inacessível.")
+
+
+@router.post("", response_model=ServicoProjetoRead, status_code=status.HTTP_201_CREATED, summary="Cria um novo Serviço ou Projeto", dependencies=[Depends(query_budget(4))])
+async def create_projeto(projeto: ServicoProjetoCreate, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(get_current_user)):
     """Cria um novo Serviço ou Projeto"""
     try:
-        # 1. Validação de FKs: Garante que o Cliente existe e pertence ao usuário
-        cliente = db.query(ClienteModel).filter(
-            ClienteModel.id_cliente == projeto.id_cliente, 
-            ClienteModel.user_id == current_user.id_usuario
-        ).first()
-        if not cliente:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cliente não encontrado ou inacessível.")
-
-        # 2. Validação de FKs: Garante que o Desenvolvedor existe e pertence ao usuário (se fornecido)
-        if projeto.id_desenvolvedor:
-             desenvolvedor = db.query(DesenvolvedorModel).filter(
-                DesenvolvedorModel.id_desenvolvedor == projeto.id_desenvolvedor, 
-                DesenvolvedorModel.user_id == current_user.id_usuario
-            ).first()
-             if not desenvolvedor:
-                 raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Desenvolvedor não encontrado ou inacessível.")
-
-
-        # 3. Cria o Projeto
-        projeto_data = projeto.model_dump()
-        novo_projeto = ServicoProjetoModel(
-            **projeto_data,
-            user_id=current_user.id_usuario
+        # INSERT ... SELECT ... WHERE: a posse do cliente e do desenvolvedor é checada na própria instrução
+        novo_projeto = await insert_returning_if(
+            db, ServicoProjetoModel, {**projeto.model_dump(), "user_id": current_user.id_usuario},
+            *_reference_conditions(projeto, current_user.id_usuario),
         )
-        db.add(novo_projeto)
-        db.commit()
-        db.refresh(novo_projeto)
+        if not novo_projeto:
+            raise await _invalid_reference(db, projeto, current_user.id_usuario)
+        await db.commit()
+        audit_trail.record(current_user.id_usuario, "create", ServicoProjetoModel.__tablename__, novo_projeto.id_servico)
 
-        return novo_projeto
+        # A resposta inclui cliente e desenvolvedor: uma leitura com os relacionamentos
+        return await _get_projeto(db, novo_projeto.id_servico, current_user.id_usuario)
 
+    except HTTPException:
+        await db.rollback()
+        raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Erro interno: {e}")
 
 
-@router.get("", response_model=List[ServicoProjetoRead], summary="Lista todos os Serviços e Projetos")
-def read_projetos(db: Session = Depends(get_db), current_user: UsuarioModel = Depends(get_current_user)):
-    """Lista todos os Serviços e Projetos do usuário"""
-    projetos = db.query(ServicoProjetoModel).filter(ServicoProjetoModel.user_id == current_user.id_usuario).all()
-    return projetos
-
-
-@router.get("/{projeto_id}", response_model=ServicoProjetoRead, summary="Busca um Serviço ou Projeto por ID")
-def read_projeto(projeto_id: uuid.UUID, db: Session = Depends(get_db), current_user: UsuarioModel = Depends(get_current_user)):
+@router.get("", response_model=List[ServicoProjetoRead], summary="Lista os Serviços e Projetos (paginado por cursor)", dependencies=[Depends(query_budget(3)), Depends(read_etag)])
+async def read_projetos(
+    response: Response,
+    status_projeto: Optional[str] = Query(None),
+    id_cliente: Optional[uuid.UUID] = Query(None),
+    id_desenvolvedor: Optional[uuid.UUID] = Query(None),
+    sort: Literal["titulo", "status_projeto"] = Query("titulo", description="Campo de ordenação"),
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Lista os Serviços e Projetos do usuário, uma página por vez (cursor no cabeçalho X-Next-Cursor)"""
+    query = select(ServicoProjetoModel).options(*projeto_read_options()).where(ServicoProjetoModel.user_id == current_user.id_usuario)
+    if status_projeto is not None:
+        query = query.filter(ServicoProjetoModel.status_projeto == status_projeto)
+    if id_cliente is not None:
+        query = query.filter(ServicoProjetoModel.id_cliente == id_cliente)
+    if id_desenvolvedor is not None:
+        query = query.filter(ServicoProjetoModel.id_desenvolvedor == id_desenvolvedor)
+
+    sort_column = getattr(ServicoProjetoModel, sort)
+    projetos = (await db.scalars(apply_keyset(query, sort_column, ServicoProjetoModel.id_servico, page))).all()
+    projetos = finish_page(projetos, sort_column, ServicoProjetoModel.id_servico, page, response)
+    return list_response(ServicoProjetoRead, projetos, response)
+
+
+@router.get("/{projeto_id}", response_model=ServicoProjetoRead, summary="Busca um Serviço ou Projeto por ID", dependencies=[Depends(query_budget(3)), Depends(read_etag)])
+async def read_projeto(projeto_id: uuid.UUID, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(get_current_user)):
     """Busca um Serviço ou Projeto pelo ID"""
-    projeto = db.query(ServicoProjetoModel).filter(
-        ServicoProjetoModel.id_servico == projeto_id,
-        ServicoProjetoModel.user_id == current_user.id_usuario
-    ).first()
+    projeto = await _get_projeto(db, projeto_id, current_user.id_usuario)
     if not projeto:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Serviço ou Projeto não encontrado ou inacessível.")
     return projeto
 
 
-@router.put("/{projeto_id}", response_model=ServicoProjetoRead, summary="Atualiza um Serviço ou Projeto existente")
-def update_projeto(projeto_id: uuid.UUID, projeto: ServicoProjetoCreate, db: Session = Depends(get_db), current_user: UsuarioModel = Depends(get_current_user)):
+@router.put("/{projeto_id}", response_model=ServicoProjetoRead, summary="Atualiza um Serviço ou Projeto existente", dependencies=[Depends(query_budget(4))])
+async def update_projeto(projeto_id: uuid.UUID, projeto: ServicoProjetoCreate, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(get_current_user)):
     """Atualiza um Serviço ou Projeto existente pelo ID"""
-    existing_projeto = db.query(ServicoProjetoModel).filter(
-        ServicoProjetoModel.id_servico == projeto_id,
-        ServicoProjetoModel.user_id == current_user.id_usuario
-    ).first()
-    if not existing_projeto:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Serviço ou Projeto não encontrado ou inacessível.")
-
     try:
-        # Atualiza os campos do projeto
-        for key, value in projeto.model_dump().items():
-            setattr(existing_projeto, key, value)
-
-        db.commit()
-        db.refresh(existing_projeto)
-        return existing_projeto
-
+        # Posse do projeto e das referências no WHERE do UPDATE
+        atualizado = await update_returning(
+            db, ServicoProjetoModel, projeto_id, current_user.id_usuario, projeto.model_dump(),
+            *_reference_conditions(projeto, current_user.id_usuario),
+        )
+        if not atualizado:
+            if not await db.scalar(select(owned(ServicoProjetoModel, projeto_id, current_user.id_usuario))):
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Serviço ou Projeto não encontrado ou inacessível.")
+            raise await _invalid_reference(db, projeto, current_user.id_usuario)
+
+        await db.commit()
+        audit_trail.record(current_user.id_usuario, "update", ServicoProjetoModel.__tablename__, projeto_id)
+        return await _get_projeto(db, projeto_id, current_user.id_usuario)
+
+    except HTTPException:
+        await db.rollback()
+        raise
     except Exception as e:
-        db.rollback()
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Erro interno: {e}")
\ No newline at end of file
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Erro interno: {e}")
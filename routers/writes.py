@@ -0,0 +1,115 @@
+# ------------------------------------------------------------------
+# ESCRITAS EM UMA IDA AO BANCO (INSERT/UPDATE ... RETURNING)
+# ------------------------------------------------------------------
+"""Helpers das rotas de criação, atualização e exclusão.
+
+Cada escrita é uma única instrução que devolve a linha gravada (RETURNING),
+então a rota não precisa de um SELECT antes (para checar o dono) nem de um
+`refresh`/releitura depois:
+
+- a posse entra no WHERE do UPDATE (`user_id` do usuário corrente) e, nas
+  referências a outras entidades, em condições EXISTS; nenhuma linha devolvida
+  significa "não encontrado ou inacessível";
+- os IDs são gerados no Python, então endereço e entidade são inseridos em
+  sequência sem `flush` intermediário;
+- a versão da tabela (ETags) é marcada com `touch`, já que DML direto não passa
+  pelo flush do ORM.
+
+Exclusões também são instruções por conjunto (DELETE ... WHERE ... IN
+(subconsulta)): o número de instruções não depende de quantas linhas saem.
+
+PostgreSQL e SQLite (3.35+) suportam RETURNING em INSERT, UPDATE e DELETE.
+"""
+import uuid
+from sqlalchemy import delete, exists, insert, literal, select, update
+from sqlalchemy.orm.attributes import set_committed_value
+from entity_versions import touch
+from models.cliente import ClienteModel
+from models.desenvolvedor import DesenvolvedorModel
+from models.endereco import EnderecoModel
+
+
+def primary_key(model):
+    return model.__mapper__.primary_key[0]
+
+
+def owned(model, pk, user_id):
+    """Condição EXISTS: a linha `pk` de `model` pertence ao usuário."""
+    return exists().where(primary_key(model) == pk, model.user_id == user_id)
+
+
+def _new_values(model, values: dict) -> dict:
+    # ID gerado aqui: a linha seguinte (ex.: entidade do endereço) já pode referenciá-lo
+    return {primary_key(model).key: uuid.uuid4(), **values}
+
+
+async def insert_returning(db, model, values: dict):
+    """INSERT ... RETURNING: devolve o objeto ORM gravado, sem releitura."""
+    obj = await db.scalar(insert(model).values(**_new_values(model, values)).returning(model))
+    touch(db, values["user_id"], model.__tablename__)
+    return obj
+
+
+async def insert_returning_if(db, model, values: dict, *conditions):
+    """INSERT ... SELECT ... WHERE <condições> RETURNING.
+
+    Usado quando a linha referencia entidades que precisam pertencer ao usuário:
+    a checagem (`owned(...)`) vai no WHERE do SELECT, na mesma instrução.
+    Devolve None se alguma condição falhar (nada é inserido).
+    """
+    table = model.__table__
+    values = _new_values(model, values)
+    source = select(*(literal(value, type_=table.c[key].type) for key, value in values.items())).where(*conditions)
+    obj = await db.scalar(insert(model).from_select(list(values), source).returning(model))
+    if obj is not None:
+        touch(db, values["user_id"], model.__tablename__)
+    return obj
+
+
+async def update_returning(db, model, pk, user_id, values: dict, *conditions):
+    """UPDATE ... WHERE pk AND user_id [AND condições] RETURNING.
+
+    Devolve o objeto ORM atualizado ou None se a linha não existir, for de outro
+    usuário ou alguma condição falhar.
+    """
+    statement = (
+        update(model)
+        .where(primary_key(model) == pk, model.user_id == user_id, *conditions)
+        .values(**values)
+        .returning(model)
+        .execution_options(synchronize_session=False)
+    )
+    obj = await db.scalar(statement)
+    if obj is not None:
+        touch(db, user_id, model.__tablename__)
+    return obj
+
+
+def attach(obj, **related):
+    """Preenche relacionamentos já conhecidos sem disparar lazy load na serialização."""
+    for name, value in related.items():
+        set_committed_value(obj, name, value)
+    return obj
+
+
+async def delete_where(db, model, user_id, *conditions) -> int:
+    """DELETE por conjunto das linhas do usuário que atendem às condições; devolve quantas saíram."""
+    result = await db.execute(
+        delete(model).where(model.user_id == user_id, *conditions).execution_options(synchronize_session=False)
+    )
+    if result.rowcount:
+        touch(db, user_id, model.__tablename__)
+    return result.rowcount
+
+
+async def delete_unused_enderecos(db, user_id, ids) -> int:
+    """Remove os endereços de entidades excluídas que ninguém mais referencia."""
+    ids = [id_endereco for id_endereco in ids if id_endereco is not None]
+    if not ids:
+        return 0
+    return await delete_where(
+        db, EnderecoModel, user_id,
+        EnderecoModel.id_endereco.in_(ids),
+        ~exists().where(ClienteModel.id_endereco == EnderecoModel.id_endereco),
+        ~exists().where(DesenvolvedorModel.id_endereco == EnderecoModel.id_endereco),
+    )
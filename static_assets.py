@@ -0,0 +1,217 @@
+"""Build e entrega do dashboard (`admin/`) pré-comprimido e com cache longo.
+
+`python -m static_assets` gera `build/admin/`:
+
+- os `<script>` e `<style>` embutidos no `index.html` viram arquivos em
+  `assets/`, com o hash do conteúdo no nome (`app-2.3f9c0a1b2c4d.js`). O nome
+  muda a cada alteração, então podem ser servidos com `Cache-Control: immutable`
+  e o navegador só baixa de novo o que mudou;
+- cada arquivo ganha as variantes `.gz` (gzip nível 9) e `.br` (brotli, se o
+  pacote `brotli` estiver instalado), comprimidas uma única vez no build;
+- `manifest.json` guarda o hash do `index.html` de origem.
+
+`PrecompressedStaticFiles` escolhe a variante pelo `Accept-Encoding` (br, depois
+gzip) e responde com `Content-Encoding` e `Vary: Accept-Encoding`. O
+`index.html` sai com `no-cache` (sempre revalidado pelo ETag), os assets com
+hash ficam um ano em cache. Enquanto o build não existir ou estiver
+desatualizado em relação a `admin/index.html`, o app serve `admin/` como está.
+
+    python -m static_assets             # gera build/admin
+    python -m static_assets --check     # código de saída 1 se o build estiver desatualizado
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import shutil
+import sys
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+try:
+    import brotli
+except ImportError:  # opcional: sem ele o build gera só as variantes .gz
+    brotli = None
+
+SOURCE_DIR = "admin"
+BUILD_DIR = os.path.join("build", "admin")
+ASSETS_DIR = "assets"
+MANIFEST = "manifest.json"
+
+# Assets com hash no nome nunca mudam de conteúdo; o index.html é sempre revalidado
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+HTML_CACHE = "no-cache"
+
+# Extensões que valem a pena comprimir (imagens e fontes já vêm comprimidas)
+COMPRESSIBLE = (".html", ".js", ".css", ".json", ".svg", ".txt", ".map")
+# Sufixo da variante -> Content-Encoding, em ordem de preferência
+ENCODINGS = ((".br", "br"), (".gz", "gzip"))
+
+# Só blocos sem atributos: <script src=...> externos (Tailwind via CDN) ficam no HTML
+_INLINE_BLOCK = re.compile(r"<(script|style)>(.*?)</\1>", re.DOTALL)
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _write(path: str, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def _write_compressed(path: str, data: bytes) -> dict:
+    """Grava as variantes comprimidas de `path`; devolve o tamanho de cada uma."""
+    sizes = {"identity": len(data)}
+    if not path.endswith(COMPRESSIBLE):
+        return sizes
+    # mtime=0: o mesmo conteúdo gera sempre o mesmo .gz (build reproduzível)
+    compressed = {"gzip": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        compressed["br"] = brotli.compress(data, quality=11)
+    for suffix, encoding in ENCODINGS:
+        if encoding in compressed:
+            _write(path + suffix, compressed[encoding])
+            sizes[encoding] = len(compressed[encoding])
+    return sizes
+
+
+def source_hash(source_dir: str = SOURCE_DIR) -> str:
+    with open(os.path.join(source_dir, "index.html"), "rb") as f:
+        return _digest(f.read())
+
+
+def build_assets(source_dir: str = SOURCE_DIR, build_dir: str = BUILD_DIR) -> dict:
+    """Gera o build do dashboard; devolve o manifesto (arquivos e tamanhos)."""
+    with open(os.path.join(source_dir, "index.html"), encoding="utf-8") as f:
+        html = f.read()
+
+    if os.path.isdir(build_dir):
+        shutil.rmtree(build_dir)
+    files = {}
+    counter = 0
+
+    def extract(match: re.Match) -> str:
+        nonlocal counter
+        kind, body = match.group(1), match.group(2)
+        counter += 1
+        data = body.strip("\n").encode("utf-8") + b"\n"
+        extension = "js" if kind == "script" else "css"
+        name = f"{ASSETS_DIR}/app-{counter}.{_digest(data)[:12]}.{extension}"
+        _write(os.path.join(build_dir, name), data)
+        files[name] = _write_compressed(os.path.join(build_dir, name), data)
+        # Caminho relativo: vale tanto para /admin/ quanto para /admin/login
+        if kind == "script":
+            return f'<script src="{name}"></script>'
+        return f'<link rel="stylesheet" href="{name}">'
+
+    html = _INLINE_BLOCK.sub(extract, html)
+    index = html.encode("utf-8")
+    index_path = os.path.join(build_dir, "index.html")
+    _write(index_path, index)
+    files["index.html"] = _write_compressed(index_path, index)
+
+    # Demais arquivos de admin/ (imagens, etc.) são copiados como estão
+    for root, _, names in os.walk(source_dir):
+        for name in names:
+            relative = os.path.relpath(os.path.join(root, name), source_dir)
+            if relative == "index.html":
+                continue
+            with open(os.path.join(root, name), "rb") as f:
+                data = f.read()
+            target = os.path.join(build_dir, relative)
+            _write(target, data)
+            files[relative.replace(os.sep, "/")] = _write_compressed(target, data)
+
+    manifest = {"source": source_hash(source_dir), "brotli": brotli is not None, "files": files}
+    _write(os.path.join(build_dir, MANIFEST), json.dumps(manifest, indent=2).encode())
+    return manifest
+
+
+def build_is_current(source_dir: str = SOURCE_DIR, build_dir: str = BUILD_DIR) -> bool:
+    try:
+        with open(os.path.join(build_dir, MANIFEST), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return manifest.get("source") == source_hash(source_dir)
+
+
+def admin_directory() -> str:
+    """Diretório servido em /admin: o build, se estiver em dia com a origem."""
+    return BUILD_DIR if build_is_current() else SOURCE_DIR
+
+
+def accepted_encodings(accept_encoding: str) -> set:
+    """Codificações aceitas pelo cliente (ignora as marcadas com q=0)."""
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.partition(";")
+        name = name.strip()
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if name:
+            accepted.add(name)
+    return accepted
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles que entrega as variantes .br/.gz do build e define o cache."""
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200):
+        request_headers = Headers(scope=scope)
+        full_path = str(full_path)
+        path, media_type, encoding = full_path, None, None
+
+        if full_path.endswith(COMPRESSIBLE):
+            accepted = accepted_encodings(request_headers.get("accept-encoding", ""))
+            for suffix, candidate in ENCODINGS:
+                if candidate in accepted or "*" in accepted:
+                    try:
+                        variant_stat = os.stat(full_path + suffix)
+                    except OSError:
+                        continue
+                    path, stat_result, encoding = full_path + suffix, variant_stat, candidate
+                    # O tipo é o do arquivo original, não o de um .br/.gz
+                    media_type = mimetypes.guess_type(full_path)[0] or "text/plain"
+                    break
+
+        response = FileResponse(path, status_code=status_code, stat_result=stat_result, media_type=media_type)
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+        if full_path.endswith(COMPRESSIBLE):
+            response.headers["Vary"] = "Accept-Encoding"
+        is_hashed_asset = os.path.basename(os.path.dirname(full_path)) == ASSETS_DIR
+        response.headers["Cache-Control"] = IMMUTABLE_CACHE if is_hashed_asset else HTML_CACHE
+
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--check", action="store_true", help="Apenas verifica se o build está em dia com admin/")
+    args = parser.parse_args()
+
+    if args.check:
+        current = build_is_current()
+        print("Build em dia." if current else f"Build de {SOURCE_DIR}/ ausente ou desatualizado.")
+        sys.exit(0 if current else 1)
+
+    manifest = build_assets()
+    print(json.dumps(manifest, indent=2))
+
+
+if __name__ == "__main__":
+    main()